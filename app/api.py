@@ -1,12 +1,33 @@
-from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks
+from fastapi import FastAPI, APIRouter, Depends, Header, HTTPException, BackgroundTasks, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from typing import List
+from typing import AsyncIterator, Dict, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import hmac
+import json
 import logging
+import os
+import threading
 
-from app.rag.chain import main_rag_chain
-from app.evaluation.test_data import TestDataGenerator
-from app.evaluation.evaluator import RagasEvaluator
+from app.config import settings
+from app.graph.driver import (
+    close_async_neo4j_driver, close_neo4j_driver, get_async_neo4j_driver, init_async_neo4j_driver,
+)
+from app.limits.admission import Overloaded, chat_admission
+from app.limits.outbound import outbound_limiter, outbound_priority
+from app.monitoring.metrics import mark_worker_dead, metric_totals, render_metrics
+from app.monitoring.tracing import MetricsMiddleware, annotate, metrics_callback, span
+from app.rag.cache import InvalidationLog, SemanticAnswerCache, normalize_question
+from app.rag import chain as chain_module
+from app.rag.chain import awarmup_main_rag_chain, get_main_components, get_main_rag_chain
+from app.rag.context import context_packer
+from app.rag.embedding import embeddings
+from app.rag.listing import answer_listing_question
+from app.rag.router import tier_stats
+from app.rag.singleflight import SingleFlight
 
 # --- Pydantic 스키마 정의 ---
 class Query(BaseModel):
@@ -24,9 +45,101 @@ class Answer(BaseModel):
     sources: List[Source]
 
 
+class BatchQuery(BaseModel):
+    questions: List[str]
+
+
+class BatchAnswerItem(BaseModel):
+    question: str
+    answer: Optional[str] = None
+    sources: List[Source] = []
+    error: Optional[str] = None
+
+
+class BatchAnswer(BaseModel):
+    results: List[BatchAnswerItem]
+
+
+class CacheInvalidation(BaseModel):
+    urls: List[str]
+
+
+class EvaluationRequest(BaseModel):
+    testset_id: Optional[str] = None  # 지정하면 저장된 테스트셋을 재사용
+    doc_sample_count: int = 20
+    test_size: int = 3
+
+
+async def refresh_vector_mirror_periodically(mirror):
+    """벡터 미러를 주기적으로 Neo4j와 동기화합니다. 동기화는 파일 잠금을 얻은 워커 하나만 수행합니다."""
+    while True:
+        await asyncio.sleep(settings.VECTOR_MIRROR_REFRESH_SECONDS)
+        try:
+            await asyncio.to_thread(mirror.sync)
+        except Exception as e:
+            logger.error(f"벡터 미러 동기화 실패: {e}", exc_info=True)
+
+
+# 체인 생성과 워밍업이 끝나면 ready가 True가 되며, /ready는 그 전까지 503을 반환합니다.
+app_state = {"ready": False, "startup_error": None}
+
+
+async def prepare_rag_pipeline():
+    """
+    RAG 체인 생성, 벡터 미러 초기 동기화, 워밍업을 백그라운드에서 실행합니다.
+    서버는 이 작업을 기다리지 않고 바로 요청을 받으며, Neo4j가 아직 준비되지 않았으면 간격을 늘려가며 재시도합니다.
+    """
+    attempt = 0
+    while True:
+        try:
+            if settings.RETRIEVER_BACKEND == "mirror":
+                from app.graph.vector_mirror import get_vector_mirror
+                # 첫 워커는 미러 파일을 만들고, 나머지 워커는 이미 만들어진 파일을 매핑합니다.
+                await asyncio.to_thread(get_vector_mirror().sync)
+
+            # langchain 백엔드는 체인 생성 중 Neo4j에 동기로 접속하므로 스레드에서 생성합니다.
+            await asyncio.to_thread(get_main_rag_chain)
+            if context_packer is not None:
+                # 토크나이저 파일을 내려받을 수 있으므로 요청 처리 전에 스레드에서 불러옵니다.
+                await asyncio.to_thread(context_packer.load_encoding)
+            if settings.WARMUP_ON_STARTUP:
+                await awarmup_main_rag_chain(settings.WARMUP_QUESTION)
+
+            app_state["ready"] = True
+            app_state["startup_error"] = None
+            logger.info("RAG 파이프라인 준비가 완료되었습니다.")
+            return
+        except Exception as e:
+            attempt += 1
+            delay = min(2 ** attempt, 30)
+            app_state["startup_error"] = str(e)
+            logger.error(f"RAG 파이프라인 준비 실패, {delay}초 후 재시도합니다: {e}")
+            await asyncio.sleep(delay)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 비동기 Neo4j 커넥션 풀은 앱 수명 동안 하나만 유지합니다.
+    init_async_neo4j_driver()
+
+    background_tasks = [asyncio.create_task(prepare_rag_pipeline())]
+    if settings.RETRIEVER_BACKEND == "mirror":
+        from app.graph.vector_mirror import get_vector_mirror
+        background_tasks.append(asyncio.create_task(refresh_vector_mirror_periodically(get_vector_mirror())))
+
+    yield
+
+    for task in background_tasks:
+        task.cancel()
+    await close_async_neo4j_driver()
+    close_neo4j_driver()
+    mark_worker_dead(os.getpid())
+
+
 app = FastAPI(
     title="모듈화된 한국교통대학교 챗봇 API",
-    version="5.0.0"
+    version="5.0.0",
+    lifespan=lifespan
 )
 
 origins = [
@@ -44,95 +157,479 @@ app.add_middleware(
     allow_methods=["*"],         # 모든 HTTP 메소드 허용 (GET, POST, 등)
     allow_headers=["*"],         # 모든 HTTP 헤더 허용
 )
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(Overloaded)
+async def handle_overloaded(request, exc: Overloaded):
+    # 대기열이 가득 찬 요청은 기다리게 하지 않고 바로 503으로 응답하여 클라이언트가 나중에 다시 시도하게 합니다.
+    return JSONResponse(status_code=503, content={"detail": "요청이 많아 잠시 후 다시 시도해 주세요."},
+                        headers={"Retry-After": str(exc.retry_after)})
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-evaluation_status = {"is_running": False, "result": None}
+answer_cache = SemanticAnswerCache(
+    embeddings=embeddings,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES,
+    similarity_threshold=settings.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+    invalidation_log=InvalidationLog(settings.ANSWER_CACHE_INVALIDATION_DB_PATH, settings.ANSWER_CACHE_TTL_SECONDS),
+    invalidation_poll_seconds=settings.ANSWER_CACHE_INVALIDATION_POLL_SECONDS,
+) if settings.ANSWER_CACHE_ENABLED else None
 
+single_flight = SingleFlight() if settings.SINGLE_FLIGHT_ENABLED else None
 
-async def run_evaluation_task():
-    """백그라운드에서 전체 평가 파이프라인을 실행하는 함수"""
-    global evaluation_status
-    if evaluation_status["is_running"]:
-        return
+_testset_store = None
+_job_store = None
 
-    evaluation_status["is_running"] = True
-    evaluation_status["result"] = None
 
-    try:
-        logger.info("평가 파이프라인 시작...")
-        # 1. 테스트 데이터 생성
-        data_gen = TestDataGenerator()
-        test_dataset = data_gen.generate(doc_sample_count=20, test_size=3)
+def get_testset_store():
+    """평가 모듈(ragas, datasets, pandas 등)은 import 비용이 커서 평가 기능을 처음 사용할 때 불러옵니다."""
+    global _testset_store
+    if _testset_store is None:
+        from app.evaluation.testset_store import TestSetStore
+        _testset_store = TestSetStore()
+    return _testset_store
+
+
+def get_job_store():
+    """여러 워커가 공유하는 평가 작업 저장소를 반환합니다."""
+    global _job_store
+    if _job_store is None:
+        from app.evaluation.jobs import EvaluationJobStore
+        _job_store = EvaluationJobStore(settings.EVALUATION_JOB_DB_PATH, settings.EVALUATION_JOB_STALE_SECONDS)
+    return _job_store
+
+
+def _start_heartbeat(job_id: str) -> threading.Event:
+    """
+    평가 중인 작업의 heartbeat를 주기적으로 갱신합니다. 반환된 Event를 set하면 멈춥니다.
+    Ragas 평가가 이벤트 루프를 오래 점유할 수 있어 별도 스레드에서 실행합니다.
+    """
+    stop = threading.Event()
+    interval = max(settings.EVALUATION_JOB_STALE_SECONDS / 5, 1)
+
+    def beat():
+        while not stop.wait(interval):
+            get_job_store().heartbeat(job_id)
 
-        # 2. 평가 실행
-        evaluator = RagasEvaluator()
-        result = await evaluator.run(test_dataset)
+    threading.Thread(target=beat, name=f"evaluation-heartbeat-{job_id}", daemon=True).start()
+    return stop
 
-        evaluation_status["result"] = result
-        logger.info("평가 파이프라인 완료.")
+
+async def run_evaluation_task(job_id: str, request: EvaluationRequest):
+    """백그라운드에서 전체 평가 파이프라인을 실행하고, 상태와 결과를 공유 작업 저장소에 기록하는 함수"""
+    job_store = get_job_store()
+    stop_heartbeat = _start_heartbeat(job_id)
+
+    try:
+        # 평가/테스트셋 생성의 OpenAI 요청은 background 우선순위로 보내 채팅 요청이 먼저 처리되게 합니다.
+        # (asyncio.to_thread는 현재 컨텍스트를 복사하므로 스레드에서 보내는 요청에도 적용됩니다)
+        with outbound_priority("background"):
+            logger.info(f"평가 파이프라인 시작... (작업 {job_id})")
+            # 1. 테스트 데이터 준비 (저장된 테스트셋 재사용 또는 새 공지만큼 증분 생성)
+            test_dataset, testset_id = await asyncio.to_thread(
+                get_testset_store().get_or_create,
+                doc_sample_count=request.doc_sample_count,
+                test_size=request.test_size,
+                testset_id=request.testset_id
+            )
+            await asyncio.to_thread(job_store.set_testset, job_id, testset_id)
+
+            # 2. 평가 실행
+            from app.evaluation.evaluator import RagasEvaluator
+            evaluator = RagasEvaluator()
+            result = await evaluator.run(test_dataset)
+
+            # Ragas 결과 객체는 JSON으로 바로 변환 불가하므로, 지표별 점수 dict로 변환
+            await asyncio.to_thread(job_store.complete, job_id, {name: float(score) for name, score in dict(result).items()})
+            logger.info(f"평가 파이프라인 완료. (작업 {job_id})")
 
     except Exception as e:
         logger.error(f"평가 중 오류 발생: {e}", exc_info=True)
-        evaluation_status["result"] = {"error": str(e)}
+        await asyncio.to_thread(job_store.fail, job_id, str(e))
     finally:
-        evaluation_status["is_running"] = False
+        stop_heartbeat.set()
 
 
 @router.post("/evaluate", summary="RAG 시스템 평가 실행")
-async def start_evaluation(background_tasks: BackgroundTasks):
-    if evaluation_status["is_running"]:
-        raise HTTPException(status_code=409, detail="평가가 이미 진행 중입니다.")
+async def start_evaluation(background_tasks: BackgroundTasks, request: Optional[EvaluationRequest] = None):
+    request = request or EvaluationRequest()
+    if request.testset_id is not None and not get_testset_store().exists(request.testset_id):
+        raise HTTPException(status_code=404, detail=f"테스트셋 '{request.testset_id}'을(를) 찾을 수 없습니다.")
+
+    job, running = await asyncio.to_thread(get_job_store().try_create, request.dict())
+    if job is None:
+        raise HTTPException(status_code=409, detail=f"평가가 이미 진행 중입니다. (작업 {running['id']})")
+
+    background_tasks.add_task(run_evaluation_task, job["id"], request)
+    return {
+        "job_id": job["id"],
+        "message": "RAG 시스템 평가가 시작되었습니다. 완료까지 몇 분 정도 소요됩니다. /evaluate/status 로 상태를 확인하세요."
+    }
+
 
-    background_tasks.add_task(run_evaluation_task)
-    return {"message": "RAG 시스템 평가가 시작되었습니다. 완료까지 몇 분 정도 소요됩니다. /evaluate/status 로 상태를 확인하세요."}
+@router.get("/evaluate/testsets", summary="저장된 평가 테스트셋 목록 확인")
+async def list_testsets():
+    return {"testsets": get_testset_store().list()}
+
+
+@router.get("/evaluate/jobs", summary="최근 평가 작업 목록 확인")
+async def list_evaluation_jobs(limit: int = 20):
+    return {"jobs": await asyncio.to_thread(get_job_store().list, limit)}
 
 
 @router.get("/evaluate/status", summary="RAG 시스템 평가 상태 및 결과 확인")
-async def get_evaluation_status():
-    if evaluation_status["is_running"]:
-        return {"status": "running", "message": "평가가 진행 중입니다..."}
+async def get_evaluation_status(job_id: Optional[str] = None):
+    """job_id를 지정하지 않으면 가장 최근 작업의 상태를 반환합니다."""
+    job_store = get_job_store()
+    job = await asyncio.to_thread(job_store.get, job_id) if job_id else await asyncio.to_thread(job_store.latest)
+    if job is None:
+        if job_id:
+            raise HTTPException(status_code=404, detail=f"평가 작업 '{job_id}'을(를) 찾을 수 없습니다.")
+        return {"status": "idle", "message": "실행된 평가가 없습니다. /evaluate 엔드포인트를 POST로 호출하여 평가를 시작하세요."}
+
+    if job["status"] == "running":
+        return {"status": "running", "job_id": job["id"], "message": "평가가 진행 중입니다..."}
+    if job["status"] == "failed":
+        return {"status": "failed", "job_id": job["id"], "result": {"error": job["error"]}}
+    return {"status": "completed", "job_id": job["id"], "testset_id": job["testset_id"], "result": job["result"]}
+
+
+def _extract_sources(documents) -> List[dict]:
+    """검색된 문서 목록에서 url 기준으로 중복을 제거한 출처 목록을 만듭니다."""
+    unique_sources = {}
+    for doc in documents or []:
+        url = doc.metadata.get("source")
+        if url and url not in unique_sources:
+            unique_sources[url] = {"title": doc.metadata.get("title", "제목 없음"), "url": url}
+    return list(unique_sources.values())
+
+
+async def _listing_answer(question: str) -> Optional[dict]:
+    """조건만 있는 목록 질문이면 LLM 없이 만든 답변을 반환합니다. 조회에 실패하면 RAG 체인으로 답합니다."""
+    if not settings.LISTING_ANSWER_ENABLED:
+        return None
+    try:
+        listing = await answer_listing_question(question)
+    except Exception as e:
+        logger.warning(f"목록 질문 조회 실패, RAG 체인으로 답변합니다: {e}")
+        return None
+    if listing is not None:
+        annotate(listing_answer=True)
+    return listing
+
 
-    if evaluation_status["result"]:
-        # Dataset 객체는 JSON으로 바로 변환 불가하므로, dict로 변환
-        result_dict = dict(evaluation_status["result"])
-        return {"status": "completed", "result": result_dict}
+def _sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
 
-    return {"status": "idle", "message": "실행된 평가가 없습니다. /evaluate 엔드포인트를 POST로 호출하여 평가를 시작하세요."}
 
 @router.post("/chat", response_model=Answer, summary="챗봇에게 질문하기")
 async def ask_question(query: Query):
+    async with chat_admission.admit():
+        try:
+            question = query.question
+            logger.info(f"수신된 질문: {question}")
+
+            listing = await _listing_answer(question)
+            if listing is not None:
+                return Answer(question=question, **listing)
+
+            question_embedding = None
+            if answer_cache is not None:
+                with span("cache_lookup"):
+                    cached, question_embedding = await answer_cache.alookup(question)
+                annotate(answer_cache="hit" if cached is not None else "miss")
+                if cached is not None:
+                    return Answer(question=question, **cached)
+
+            def run_chain():
+                return get_main_rag_chain().ainvoke({"input": question}, config={"callbacks": [metrics_callback]})
+
+            # 같은 질문이 이미 처리 중이면 그 실행 결과를 함께 받습니다. 캐시 저장은 실제로 실행한 요청만 합니다.
+            if single_flight is not None:
+                response, leader = await single_flight.do(normalize_question(question), run_chain)
+                annotate(coalesced=not leader)
+            else:
+                response, leader = await run_chain(), True
+            answer_text = response.get("answer", "답변을 생성하는 데 문제가 발생했습니다.")
+
+            source_documents = _extract_sources(response.get("context"))
+
+            if answer_cache is not None and leader and "answer" in response:
+                answer_cache.put(question, question_embedding, {"answer": answer_text, "sources": source_documents})
+
+            return Answer(
+                question=question,
+                answer=answer_text,
+                sources=source_documents
+            )
+        except Exception as e:
+            logger.error(f"챗봇 처리 중 오류 발생: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="서버 내부 오류가 발생했습니다.")
+
+
+async def _stream_answer(question: str) -> AsyncIterator[str]:
+    """
+    검색된 출처(sources)를 먼저 보내고, 이어서 생성되는 답변 토큰을 SSE 이벤트로 전송합니다.
+    이벤트 종류: sources, token, done, error
+    """
     try:
-        question = query.question
-        logger.info(f"수신된 질문: {question}")
-
-        response = await main_rag_chain.ainvoke({"input": question})
-        answer_text = response.get("answer", "답변을 생성하는 데 문제가 발생했습니다.")
+        listing = await _listing_answer(question)
+        if listing is not None:
+            yield _sse_event("sources", listing["sources"])
+            yield _sse_event("token", listing["answer"])
+            yield _sse_event("done", {"question": question})
+            return
+
+        question_embedding = None
+        if answer_cache is not None:
+            with span("cache_lookup"):
+                cached, question_embedding = await answer_cache.alookup(question)
+            annotate(answer_cache="hit" if cached is not None else "miss")
+            if cached is not None:
+                yield _sse_event("sources", cached["sources"])
+                yield _sse_event("token", cached["answer"])
+                yield _sse_event("done", {"question": question})
+                return
+
+        def run_chain():
+            return get_main_rag_chain().astream({"input": question}, config={"callbacks": [metrics_callback]})
+
+        # 같은 질문의 스트림이 이미 진행 중이면 지금까지의 청크부터 이어서 함께 받습니다.
+        if single_flight is not None:
+            chunks, leader = single_flight.stream(normalize_question(question), run_chain)
+            annotate(coalesced=not leader)
+        else:
+            chunks, leader = run_chain(), True
 
         source_documents = []
-        if "context" in response and response["context"]:
-            unique_sources = {}
-            for doc in response["context"]:
-                url = doc.metadata.get("source")
-                if url and url not in unique_sources:
-                    unique_sources[url] = {"title": doc.metadata.get("title", "제목 없음"), "url": url}
-            source_documents = list(unique_sources.values())
-
-        return Answer(
-            question=question,
-            answer=answer_text,
-            sources=source_documents
-        )
+        answer_parts = []
+        async for chunk in chunks:
+            if "context" in chunk:
+                source_documents = _extract_sources(chunk["context"])
+                yield _sse_event("sources", source_documents)
+            if chunk.get("answer"):
+                answer_parts.append(chunk["answer"])
+                yield _sse_event("token", chunk["answer"])
+
+        if answer_cache is not None and leader and answer_parts:
+            answer_cache.put(question, question_embedding,
+                             {"answer": "".join(answer_parts), "sources": source_documents})
+        yield _sse_event("done", {"question": question})
     except Exception as e:
-        logger.error(f"챗봇 처리 중 오류 발생: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="서버 내부 오류가 발생했습니다.")
+        logger.error(f"스트리밍 챗봇 처리 중 오류 발생: {e}", exc_info=True)
+        yield _sse_event("error", {"detail": "서버 내부 오류가 발생했습니다."})
+
+
+@router.post("/chat/stream", summary="챗봇에게 질문하기 (SSE 스트리밍)")
+async def ask_question_stream(query: Query):
+    logger.info(f"수신된 질문(스트리밍): {query.question}")
+    # 입장은 응답을 시작하기 전에 확인하여 503으로 응답할 수 있게 하고, 슬롯은 스트림이 끝나면 반납합니다.
+    ticket = await chat_admission.acquire()
+
+    async def events():
+        try:
+            async for event in _stream_answer(query.question):
+                yield event
+        finally:
+            ticket.release()
+
+    # 클라이언트가 스트림 시작 전에 끊어 events가 실행되지 않은 경우에도 background 작업에서 슬롯을 반납합니다.
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(ticket.release)
+    )
+
+
+async def _retrieve_batch(retriever, questions: List[str], vectors: List[List[float]]):
+    # 배치 검색을 지원하지 않는 retriever(langchain 백엔드)는 질문별 검색을 동시에 실행합니다.
+    if hasattr(retriever, "abatch_search"):
+        return await retriever.abatch_search(questions, vectors)
+    return await retriever.abatch(questions)
+
+
+async def _answer_batch(questions: List[str]) -> List[BatchAnswerItem]:
+    """
+    질문 목록을 한 번에 처리합니다.
+    임베딩은 한 번의 embed_documents 호출로, 검색은 한 번의 배치(UNWIND) 쿼리로 실행하고,
+    답변 생성만 BATCH_GENERATION_CONCURRENCY개씩 동시에 실행합니다. 결과는 입력 순서를 따릅니다.
+    """
+    # 정규화된 질문이 같으면 한 번만 처리합니다.
+    unique: Dict[str, str] = {}
+    for question in questions:
+        unique.setdefault(normalize_question(question), question)
+    results: Dict[str, dict] = {}
+
+    # 목록 질문은 임베딩/검색/생성 없이 Cypher 조회로 답합니다.
+    listings = await asyncio.gather(*(_listing_answer(question) for question in unique.values()))
+    for key, listing in zip(list(unique), listings):
+        if listing is not None:
+            results[key] = listing
+    keys = [key for key in unique if key not in results]
+    texts = [unique[key] for key in keys]
+    if not texts:
+        return [BatchAnswerItem(question=question, **results[normalize_question(question)]) for question in questions]
+
+    with span("embedding"):
+        vectors = await embeddings.aembed_documents(texts)
+
+    pending = []
+    for key, text, vector in zip(keys, texts, vectors):
+        cached = answer_cache.lookup_by_embedding(text, vector) if answer_cache is not None else None
+        if cached is not None:
+            results[key] = cached
+        else:
+            pending.append((key, text, vector))
+
+    retriever, qa_chain = get_main_components()
+    contexts = None
+    if pending and retriever is not None:
+        with span("retrieval"):
+            contexts = await _retrieve_batch(retriever, [text for _, text, _ in pending],
+                                             [vector for _, _, vector in pending])
+        if context_packer is not None:
+            contexts = [context_packer.pack(documents) for documents in contexts]
+
+    semaphore = asyncio.Semaphore(settings.BATCH_GENERATION_CONCURRENCY)
+
+    async def generate(index: int, key: str, text: str, vector: List[float]):
+        async with semaphore:
+            try:
+                if contexts is not None:
+                    context = contexts[index]
+                    answer = await qa_chain.ainvoke({"input": text, "context": context},
+                                                    config={"callbacks": [metrics_callback]})
+                else:
+                    # 공유 체인이 교체된 경우(벤치마크 등)에는 질문별로 전체 체인을 실행합니다.
+                    response = await get_main_rag_chain().ainvoke({"input": text},
+                                                                  config={"callbacks": [metrics_callback]})
+                    answer, context = response.get("answer"), response.get("context")
+            except Exception as e:
+                logger.error(f"배치 질문 처리 중 오류 발생 ('{text}'): {e}", exc_info=True)
+                results[key] = {"error": "답변을 생성하는 데 문제가 발생했습니다."}
+                return
+
+        payload = {"answer": answer, "sources": _extract_sources(context)}
+        results[key] = payload
+        if answer_cache is not None:
+            answer_cache.put(text, vector, payload)
+
+    await asyncio.gather(*(generate(index, *item) for index, item in enumerate(pending)))
+    return [BatchAnswerItem(question=question, **results[normalize_question(question)]) for question in questions]
+
+
+@router.post("/chat/batch", response_model=BatchAnswer, summary="여러 질문을 한 번에 질문하기")
+async def ask_questions_batch(query: BatchQuery):
+    if len(query.questions) > settings.BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=413,
+                            detail=f"한 번에 최대 {settings.BATCH_MAX_QUESTIONS}개의 질문까지 요청할 수 있습니다.")
+    if not query.questions:
+        return BatchAnswer(results=[])
+
+    logger.info(f"수신된 배치 질문: {len(query.questions)}개")
+    # 배치 요청은 답변 생성 동시 실행 수가 따로 제한되므로 입장 슬롯 하나만 사용합니다.
+    async with chat_admission.admit():
+        try:
+            return BatchAnswer(results=await _answer_batch(query.questions))
+        except Exception as e:
+            logger.error(f"배치 챗봇 처리 중 오류 발생: {e}", exc_info=True)
+            raise HTTPException(status_code=500, detail="서버 내부 오류가 발생했습니다.")
+
+
+LOCAL_HOSTS = {"127.0.0.1", "::1", "localhost"}
+
+
+def verify_cache_invalidation(request: Request,
+                              x_cache_invalidation_token: Optional[str] = Header(default=None)):
+    """
+    답변 캐시 무효화는 수집 DAG만 호출할 수 있도록, CACHE_INVALIDATION_TOKEN이 설정되어 있으면 같은 값의 헤더를 요구하고
+    설정되어 있지 않으면 같은 호스트에서 온 요청만 허용합니다.
+    """
+    expected = settings.CACHE_INVALIDATION_TOKEN
+    if expected:
+        if not x_cache_invalidation_token or not hmac.compare_digest(x_cache_invalidation_token, expected):
+            raise HTTPException(status_code=401, detail="캐시 무효화 토큰이 올바르지 않습니다.")
+    elif request.client is None or request.client.host not in LOCAL_HOSTS:
+        raise HTTPException(status_code=403, detail="캐시 무효화는 내부에서만 호출할 수 있습니다.")
+
+
+@router.post("/cache/invalidate", summary="재수집된 공지의 답변 캐시 무효화",
+             dependencies=[Depends(verify_cache_invalidation)])
+async def invalidate_answer_cache(payload: CacheInvalidation):
+    if answer_cache is None:
+        return {"invalidated": 0}
+    return {"invalidated": answer_cache.invalidate_sources(payload.urls)}
+
+
+def _all_workers_cache_stats() -> dict:
+    """메트릭에 기록된 답변/임베딩 캐시 조회 수를 모든 워커에 걸쳐 합칩니다."""
+    answer_lookups = metric_totals("chatbot_answer_cache_lookups_total", "result")
+    embedding_lookups = metric_totals("chatbot_embedding_cache_lookups_total", "result")
+    return {
+        "answer_cache": {
+            "entries": int(metric_totals("chatbot_answer_cache_entries").get("", 0)),
+            "exact_hits": int(answer_lookups.get("exact_hit", 0)),
+            "semantic_hits": int(answer_lookups.get("semantic_hit", 0)),
+            "misses": int(answer_lookups.get("miss", 0)),
+        },
+        "embedding_cache": {
+            "memory_hits": int(embedding_lookups.get("memory_hit", 0)),
+            "disk_hits": int(embedding_lookups.get("disk_hit", 0)),
+            "misses": int(embedding_lookups.get("miss", 0)),
+        },
+    }
+
+
+@router.get("/cache/stats", summary="답변/임베딩 캐시, RAG 파이프라인 및 요청 한도 통계 확인")
+async def get_answer_cache_stats():
+    """
+    all_workers는 모든 워커를 합친 캐시 통계이고, 나머지 항목은 이 요청을 처리한 워커(worker)의 값입니다.
+    """
+    stats = {
+        "worker": os.getpid(),
+        "all_workers": _all_workers_cache_stats(),
+        "answer_cache": answer_cache.stats() if answer_cache is not None else {"enabled": False},
+    }
+    if hasattr(embeddings, "stats"):
+        stats["embedding_cache"] = embeddings.stats()
+    if single_flight is not None:
+        stats["single_flight"] = single_flight.stats()
+    if context_packer is not None:
+        stats["context_packing"] = context_packer.stats()
+    stats["llm_routing"] = chain_module.model_router.stats() if chain_module.model_router else tier_stats.stats()
+    stats["admission"] = chat_admission.stats()
+    stats["openai_limiter"] = outbound_limiter.stats()
+    return stats
 
 
+app.include_router(router, prefix="/api/v1", tags=["Chat & Evaluation"])
 
 
-app.include_router(router, prefix="/api/v1", tags=["Chat & Evaluation"])
+@app.get("/metrics", summary="Prometheus 메트릭", include_in_schema=False)
+def get_metrics():
+    content, content_type = render_metrics()
+    return Response(content, media_type=content_type)
 
 @app.get("/", summary="서버 상태 확인")
 def read_root():
-    return {"status": "OK"}
\ No newline at end of file
+    return {"status": "OK"}
+
+
+@app.get("/ready", summary="서비스 준비 상태 확인 (readiness)")
+async def read_ready():
+    if not app_state["ready"]:
+        return JSONResponse(status_code=503, content={"status": "starting", "detail": app_state["startup_error"]})
+
+    # 미러 백엔드는 로컬에서 검색하므로 Neo4j가 잠시 끊겨도 질문에 답할 수 있습니다.
+    if settings.RETRIEVER_BACKEND != "mirror":
+        try:
+            await asyncio.wait_for(get_async_neo4j_driver().verify_connectivity(),
+                                   timeout=settings.READINESS_CHECK_TIMEOUT_SECONDS)
+        except Exception as e:
+            return JSONResponse(status_code=503, content={"status": "unavailable", "detail": f"Neo4j 연결 실패: {e}"})
+
+    return {"status": "ready"}
\ No newline at end of file
@@ -9,9 +9,140 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
 NEO4J_URI = "bolt://localhost:7687"
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME", "neo4j")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD", "")
+NEO4J_MAX_POOL_SIZE = int(os.getenv("NEO4J_MAX_POOL_SIZE", "50"))
+NEO4J_CONNECTION_ACQUISITION_TIMEOUT = float(os.getenv("NEO4J_CONNECTION_ACQUISITION_TIMEOUT", "30"))
+
+# 실행 중에 만들어지는 캐시 파일(임베딩 캐시, 벡터 미러)을 두는 디렉터리. 기본값은 저장소 밖의 사용자 캐시 디렉터리입니다.
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "knut_chatbot"))
 
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-3-small")
+# 활성 벡터 인덱스 포인터(인덱스 마이그레이션 DAG가 전환)를 다시 읽는 주기(초).
+# 질문 임베딩은 모델의 전체 차원으로 받아, 포인터가 가리키는 인덱스의 차원으로 줄여 검색합니다.
+VECTOR_INDEX_REFRESH_SECONDS = float(os.getenv("VECTOR_INDEX_REFRESH_SECONDS", "60"))
 LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o")
 
+# --- 모델 라우팅 설정 ---
+# 짧고 한 공지로 답할 수 있는 질문은 빠른 모델(fast 티어)로, 나머지는 LLM_MODEL(strong 티어)로 답합니다.
+LLM_ROUTING_ENABLED = os.getenv("LLM_ROUTING_ENABLED", "true").lower() == "true"
+LLM_FAST_MODEL = os.getenv("LLM_FAST_MODEL", "gpt-4o-mini")
+# 티어별 요청 타임아웃(초). 타임아웃이나 오류가 나면 다른 티어로 다시 시도합니다.
+LLM_FAST_TIMEOUT_SECONDS = float(os.getenv("LLM_FAST_TIMEOUT_SECONDS", "10"))
+LLM_STRONG_TIMEOUT_SECONDS = float(os.getenv("LLM_STRONG_TIMEOUT_SECONDS", "30"))
+ROUTER_FAST_MAX_QUESTION_CHARS = int(os.getenv("ROUTER_FAST_MAX_QUESTION_CHARS", "60"))
+# fast 티어로 보내려면 상위 문서의 벡터 유사도가 이 값 이상이고, 2위와 ROUTER_SCORE_MARGIN 이상 차이가 나야 합니다.
+ROUTER_MIN_CONFIDENCE = float(os.getenv("ROUTER_MIN_CONFIDENCE", "0.8"))
+ROUTER_SCORE_MARGIN = float(os.getenv("ROUTER_SCORE_MARGIN", "0.05"))
+
+# --- 검색 설정 ---
+# 'neo4j_async': 공유 비동기 드라이버로 직접 벡터 검색, 'hybrid': 전문 + 벡터 검색 RRF 결합,
+# 'mirror': 로컬 메모리 매핑 벡터 미러 검색, 'langchain': Neo4jVector 스토어 사용
+RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "neo4j_async")
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# 전문 검색 1위 점수가 MIN_SCORE 이상이고 2위의 MIN_RATIO배 이상이면 임베딩/벡터 검색을 생략
+HYBRID_LEXICAL_FAST_PATH = os.getenv("HYBRID_LEXICAL_FAST_PATH", "true").lower() == "true"
+HYBRID_LEXICAL_MIN_SCORE = float(os.getenv("HYBRID_LEXICAL_MIN_SCORE", "5.0"))
+HYBRID_LEXICAL_MIN_RATIO = float(os.getenv("HYBRID_LEXICAL_MIN_RATIO", "1.5"))
+VECTOR_MIRROR_DIR = os.getenv("VECTOR_MIRROR_DIR", os.path.join(CACHE_DIR, "vector_mirror"))
+VECTOR_MIRROR_REFRESH_SECONDS = int(os.getenv("VECTOR_MIRROR_REFRESH_SECONDS", "300"))
+# 'chunk': Chunk 노드 검색 후 공지별로 묶음, 'document': Announcement 노드 직접 검색
+RETRIEVER_GRANULARITY = os.getenv("RETRIEVER_GRANULARITY", "chunk")
+CHUNK_SEARCH_FANOUT = int(os.getenv("CHUNK_SEARCH_FANOUT", "4"))
+
+# --- 메타데이터 조건 검색 설정 ---
+# 질문의 게시일/마감일/부서/게시판 조건을 Cypher 사전 필터로 바꿔 벡터 검색 범위를 좁힙니다.
+METADATA_FILTER_ENABLED = os.getenv("METADATA_FILTER_ENABLED", "true").lower() == "true"
+METADATA_FILTER_MAX_CANDIDATES = int(os.getenv("METADATA_FILTER_MAX_CANDIDATES", "2000"))
+METADATA_VOCABULARY_REFRESH_SECONDS = int(os.getenv("METADATA_VOCABULARY_REFRESH_SECONDS", "300"))
+# 조건만 있는 목록 질문("이번 주 장학 공지")은 LLM 없이 Cypher 조회 결과로 바로 답합니다.
+LISTING_ANSWER_ENABLED = os.getenv("LISTING_ANSWER_ENABLED", "true").lower() == "true"
+LISTING_MAX_RESULTS = int(os.getenv("LISTING_MAX_RESULTS", "10"))
+
+# --- 컨텍스트 구성 설정 ---
+# 검색 결과에서 중복/유사 중복 문서를 제거하고, 토큰 예산 안에 관련도 순으로 담아 프롬프트에 넣습니다.
+CONTEXT_PACKING_ENABLED = os.getenv("CONTEXT_PACKING_ENABLED", "true").lower() == "true"
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "3000"))
+# 벡터 유사도 점수(0~1)가 이 값보다 낮은 문서는 제외합니다. 0이면 점수로 거르지 않습니다.
+CONTEXT_MIN_SCORE = float(os.getenv("CONTEXT_MIN_SCORE", "0.0"))
+# 문자 3-gram 자카드 유사도가 이 값 이상이면 앞선(더 관련도 높은) 문서와 중복으로 봅니다.
+CONTEXT_NEAR_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_NEAR_DUPLICATE_THRESHOLD", "0.85"))
+
+# --- 임베딩 캐시 설정 ---
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", os.path.join(CACHE_DIR, "embeddings.sqlite3"))
+EMBEDDING_CACHE_MEMORY_SIZE = int(os.getenv("EMBEDDING_CACHE_MEMORY_SIZE", "2048"))
+
 LANGCHAIN_TRACING_V2 = os.getenv("LANGCHAIN_TRACING_V2", "false").lower() == "true"
-LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
\ No newline at end of file
+LANGCHAIN_API_KEY = os.getenv("LANGCHAIN_API_KEY")
+
+# --- 답변 캐시 설정 ---
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+# 답변 캐시는 워커마다 따로 있으므로, 무효화 요청을 이 SQLite 파일에 기록해 모든 워커가 조회 전에 반영합니다.
+ANSWER_CACHE_INVALIDATION_DB_PATH = os.getenv(
+    "ANSWER_CACHE_INVALIDATION_DB_PATH", os.path.join(CACHE_DIR, "answer_cache_invalidations.sqlite3")
+)
+# 각 워커가 위 기록을 읽는 최소 간격(초). 다른 워커가 받은 무효화는 최대 이만큼 늦게 반영됩니다.
+ANSWER_CACHE_INVALIDATION_POLL_SECONDS = float(os.getenv("ANSWER_CACHE_INVALIDATION_POLL_SECONDS", "1.0"))
+# /cache/invalidate 호출에 필요한 공유 비밀값(X-Cache-Invalidation-Token 헤더). DAG에도 같은 값을 설정합니다.
+# 비어 있으면 같은 호스트(localhost)에서 온 요청만 받습니다.
+CACHE_INVALIDATION_TOKEN = os.getenv("CACHE_INVALIDATION_TOKEN", "")
+# 정규화된 질문이 같은 동시 요청을 하나의 체인 실행으로 합칩니다.
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", "true").lower() == "true"
+
+# --- 배치 질문 설정 ---
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "500"))
+# 배치 요청의 답변 생성(LLM 호출) 동시 실행 수
+BATCH_GENERATION_CONCURRENCY = int(os.getenv("BATCH_GENERATION_CONCURRENCY", "8"))
+
+
+# --- OpenAI 요청 한도 설정 ---
+# API 서버의 모든 OpenAI 요청(채팅, 임베딩, 평가)이 공유하는 분당 요청/토큰 한도. 0이면 적용하지 않습니다.
+# 한도는 워커(프로세스)마다 따로 적용되므로 각 워커는 OPENAI_LIMIT_WORKERS로 나눈 몫만 씁니다.
+# 공지 수집 DAG(Airflow)의 임베딩 요청은 이 한도를 거치지 않으므로, DAG가 쓸 몫만큼 계정 한도보다 낮게 설정합니다.
+OPENAI_RPM_LIMIT = float(os.getenv("OPENAI_RPM_LIMIT", "500"))
+OPENAI_TPM_LIMIT = float(os.getenv("OPENAI_TPM_LIMIT", "150000"))
+# 위 한도를 나눠 쓰는 워커 수. main.py --prod가 실제 워커 수로 설정하며, uvicorn을 직접 여러 워커로 실행할 때는 직접 지정합니다.
+OPENAI_LIMIT_WORKERS = max(int(os.getenv("OPENAI_LIMIT_WORKERS", "1")), 1)
+# 평가/테스트셋 생성 같은 background 요청이 쓸 수 있는 한도의 비율 (나머지는 채팅 요청 몫으로 남겨 둡니다)
+OPENAI_BACKGROUND_SHARE = float(os.getenv("OPENAI_BACKGROUND_SHARE", "0.5"))
+# 429 응답을 받았을 때 지터를 더한 지수 백오프로 다시 보내는 횟수와 기본 대기 시간(초)
+# 429 재시도는 이 transport에서만 하며, 이 한도를 거치는 OpenAI 클라이언트는 SDK 재시도(max_retries)를 끕니다.
+OPENAI_RATE_LIMIT_MAX_RETRIES = int(os.getenv("OPENAI_RATE_LIMIT_MAX_RETRIES", "4"))
+OPENAI_RATE_LIMIT_BASE_DELAY = float(os.getenv("OPENAI_RATE_LIMIT_BASE_DELAY", "1.0"))
+# 한도가 풀리기를 기다리는 최대 시간(초). 넘으면 타임아웃으로 처리합니다.
+OPENAI_LIMITER_MAX_WAIT_SECONDS = float(os.getenv("OPENAI_LIMITER_MAX_WAIT_SECONDS", "30"))
+
+# --- 입장 제어 설정 ---
+# /chat 요청의 동시 처리 수와 대기열 크기. 대기열이 가득 차거나 대기 시간을 넘기면 503으로 바로 응답합니다.
+CHAT_MAX_CONCURRENT = int(os.getenv("CHAT_MAX_CONCURRENT", "32"))
+CHAT_MAX_QUEUE = int(os.getenv("CHAT_MAX_QUEUE", "64"))
+CHAT_QUEUE_TIMEOUT_SECONDS = float(os.getenv("CHAT_QUEUE_TIMEOUT_SECONDS", "10"))
+
+
+# --- 평가 설정 ---
+EVAL_CONCURRENCY = int(os.getenv("EVAL_CONCURRENCY", "5"))
+EVAL_MAX_RETRIES = int(os.getenv("EVAL_MAX_RETRIES", "5"))
+EVAL_RETRY_BASE_DELAY = float(os.getenv("EVAL_RETRY_BASE_DELAY", "2.0"))
+# ragas 지표 채점에 사용하는 모델. 평가 요청도 공유 한도(background)를 거치도록 명시적으로 지정합니다.
+EVAL_JUDGE_MODEL = os.getenv("EVAL_JUDGE_MODEL", "gpt-4o-mini")
+# 평가 작업 상태를 여러 워커가 공유하는 SQLite 파일
+EVALUATION_JOB_DB_PATH = os.getenv(
+    "EVALUATION_JOB_DB_PATH", os.path.join(os.getcwd(), "evaluation_results", "jobs.sqlite3")
+)
+# 실행 중인 작업의 heartbeat가 이 시간(초) 이상 끊기면 실패로 처리합니다.
+EVALUATION_JOB_STALE_SECONDS = float(os.getenv("EVALUATION_JOB_STALE_SECONDS", "300"))
+
+
+# --- 모니터링 설정 ---
+# 처리 시간이 이 값(초) 이상인 요청은 단계별 추적 정보를 로그로 남깁니다.
+SLOW_REQUEST_THRESHOLD_SECONDS = float(os.getenv("SLOW_REQUEST_THRESHOLD_SECONDS", "5.0"))
+
+# --- 서버 시작 설정 ---
+# 시작 시 검색 단계를 한 번 실행하여 커넥션 풀과 캐시를 데운 뒤 /ready가 준비 완료를 반환합니다.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"
+WARMUP_QUESTION = os.getenv("WARMUP_QUESTION", "장학금 신청 기간")
+READINESS_CHECK_TIMEOUT_SECONDS = float(os.getenv("READINESS_CHECK_TIMEOUT_SECONDS", "2.0"))
+# --prod 모드의 uvicorn 워커 수 (0이면 CPU 코어 수)
+API_WORKERS = int(os.getenv("API_WORKERS", "0"))
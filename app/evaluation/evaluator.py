@@ -1,11 +1,14 @@
 import asyncio
+import hashlib
+import json
 import logging
 import os
+import random
 from datetime import datetime
+import openai
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 from datasets import Dataset
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 
 from ragas import evaluate
 from ragas.metrics import (
@@ -13,27 +16,44 @@ from ragas.metrics import (
     context_recall, answer_correctness
 )
 
-from app.rag.chain import main_rag_chain
+from app.config import settings
+from app.limits.outbound import create_http_clients
+from app.rag.chain import get_main_rag_chain
 from app.evaluation.metrics import METRIC_DISPLAY_NAMES, METRIC_DESCRIPTIONS
 
 logger = logging.getLogger(__name__)
 
-try:
-    plt.rcParams['font.family'] = 'Malgun Gothic'
-except:
+
+def _load_plotting():
+    """
+    차트를 그릴 때만 matplotlib/seaborn을 불러오고 한글 폰트를 설정합니다.
+    import 비용이 커서 API 서버 시작 시점에는 불러오지 않습니다.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     try:
-        plt.rcParams['font.family'] = 'NanumGothic'
+        plt.rcParams['font.family'] = 'Malgun Gothic'
     except:
-        logger.warning("한글 폰트(맑은 고딕, 나눔고딕)를 찾을 수 없습니다. 그래프의 한글이 깨질 수 있습니다.")
-        plt.rcParams['font.family'] = 'monospace'
+        try:
+            plt.rcParams['font.family'] = 'NanumGothic'
+        except:
+            logger.warning("한글 폰트(맑은 고딕, 나눔고딕)를 찾을 수 없습니다. 그래프의 한글이 깨질 수 있습니다.")
+            plt.rcParams['font.family'] = 'monospace'
 
-plt.rcParams['axes.unicode_minus'] = False
+    plt.rcParams['axes.unicode_minus'] = False
+    return plt, sns
 
 
 class RagasEvaluator:
     """Ragas를 사용하여 RAG 시스템을 평가합니다."""
 
-    def __init__(self):
+    # 재시도할 일시적 오류 (rate limit, 타임아웃, 연결 오류)
+    RETRYABLE_ERRORS = (openai.RateLimitError, openai.APITimeoutError, openai.APIConnectionError)
+
+    def __init__(self, concurrency: int = settings.EVAL_CONCURRENCY, max_retries: int = settings.EVAL_MAX_RETRIES):
+        self.concurrency = concurrency
+        self.max_retries = max_retries
         self.metrics = [
             faithfulness,
             answer_relevancy,
@@ -42,34 +62,104 @@ class RagasEvaluator:
             answer_correctness,
         ]
         self.results_dir = os.path.join(os.getcwd(), "evaluation_results")
-        os.makedirs(self.results_dir, exist_ok=True)
+        self.checkpoint_dir = os.path.join(self.results_dir, "checkpoints")
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
         logger.info("RagasEvaluator가 초기화되었습니다.")
 
+    def _checkpoint_path(self, entries: list) -> str:
+        """같은 테스트셋이면 같은 체크포인트 파일을 사용하도록 질문/정답 내용으로 파일명을 만듭니다."""
+        key = hashlib.sha256(
+            json.dumps([[entry["question"], entry["ground_truth"]] for entry in entries], ensure_ascii=False).encode("utf-8")
+        ).hexdigest()[:16]
+        return os.path.join(self.checkpoint_dir, f"responses_{key}.jsonl")
+
+    @staticmethod
+    def _load_checkpoint(path: str) -> dict:
+        collected = {}
+        if not os.path.exists(path):
+            return collected
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 중단 시점에 쓰다 만 줄은 무시
+                collected[record["index"]] = record["result"]
+        return collected
+
+    async def _invoke_with_retry(self, question: str) -> dict:
+        """rate limit 등 일시적 오류는 지수 백오프(+지터)로 재시도합니다."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await get_main_rag_chain().ainvoke({"input": question})
+            except self.RETRYABLE_ERRORS as e:
+                if attempt == self.max_retries:
+                    raise
+                delay = settings.EVAL_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, settings.EVAL_RETRY_BASE_DELAY)
+                logger.warning(f"일시적 오류로 {delay:.1f}초 후 재시도합니다 ({attempt + 1}/{self.max_retries}): {e}")
+                await asyncio.sleep(delay)
+
     async def _collect_responses(self, dataset: Dataset) -> Dataset:
-        results = []
-        logger.info(f"{len(dataset)}개의 질문에 대한 답변을 수집합니다...")
-        for entry in dataset:
-            response = await main_rag_chain.ainvoke({"input": entry["question"]})
-            results.append({
+        """
+        최대 concurrency개의 질문을 동시에 처리하여 답변을 수집합니다.
+        수집된 답변은 체크포인트 파일에 바로 기록되므로, 중단된 평가를 다시 실행하면 남은 질문만 처리합니다.
+        """
+        entries = list(dataset)
+        checkpoint_path = self._checkpoint_path(entries)
+        collected = self._load_checkpoint(checkpoint_path)
+        pending = [index for index in range(len(entries)) if index not in collected]
+        logger.info(f"{len(entries)}개의 질문 중 {len(pending)}개의 답변을 수집합니다 "
+                    f"(체크포인트 {len(collected)}개, 동시 실행 {self.concurrency}).")
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        write_lock = asyncio.Lock()
+
+        async def collect(index: int):
+            entry = entries[index]
+            async with semaphore:
+                response = await self._invoke_with_retry(entry["question"])
+            result = {
                 "question": entry["question"],
                 "answer": response.get("answer", ""),
                 "contexts": [doc.page_content for doc in response.get("context", [])],
                 "ground_truth": entry["ground_truth"]
-            })
-        return Dataset.from_list(results)
+            }
+            async with write_lock:
+                with open(checkpoint_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"index": index, "result": result}, ensure_ascii=False) + "\n")
+            collected[index] = result
+
+        outcomes = await asyncio.gather(*(collect(index) for index in pending), return_exceptions=True)
+        errors = [outcome for outcome in outcomes if isinstance(outcome, Exception)]
+        if errors:
+            logger.error(f"{len(errors)}개의 질문 처리에 실패했습니다. 다시 실행하면 체크포인트부터 이어서 수집합니다.")
+            raise errors[0]
+
+        return Dataset.from_list([collected[index] for index in range(len(entries))])
 
     async def run(self, test_dataset: Dataset) -> dict:
         logger.info("RAG 시스템 응답 수집을 시작합니다.")
         response_dataset = await self._collect_responses(test_dataset)
 
         logger.info("Ragas 평가를 시작합니다.")
-        score = evaluate(response_dataset, metrics=self.metrics)
+        # 채점 모델의 요청도 공유 OpenAI 요청 한도를 background 우선순위로 거치도록 클라이언트를 직접 넘깁니다.
+        http_client, http_async_client = create_http_clients("background")
+        judge_llm = ChatOpenAI(model=settings.EVAL_JUDGE_MODEL, openai_api_key=settings.OPENAI_API_KEY, max_retries=0,
+                               http_client=http_client, http_async_client=http_async_client)
+        judge_embeddings = OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, openai_api_key=settings.OPENAI_API_KEY,
+                                            max_retries=0, http_client=http_client, http_async_client=http_async_client)
+        score = evaluate(response_dataset, metrics=self.metrics, llm=judge_llm, embeddings=judge_embeddings)
 
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         df_result = score.to_pandas()
         self._save_results(df_result, timestamp)
         self._visualize_results(df_result, timestamp)
 
+        # 평가가 끝난 테스트셋의 체크포인트는 삭제하여, 다음 실행에서는 새로 답변을 수집합니다.
+        checkpoint_path = self._checkpoint_path(list(test_dataset))
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
         logger.info("평가가 완료되었습니다.")
         return score
 
@@ -79,6 +169,7 @@ class RagasEvaluator:
         logger.info(f"평가 결과가 '{filepath}'에 저장되었습니다.")
 
     def _visualize_results(self, df_result: pd.DataFrame, timestamp: str):
+        plt, sns = _load_plotting()
         scores = df_result.mean()
         metric_names = [METRIC_DISPLAY_NAMES.get(metric, metric) for metric in scores.index]
 
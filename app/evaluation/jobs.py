@@ -0,0 +1,121 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Optional
+
+
+class EvaluationJobStore:
+    """
+    평가 작업의 상태와 결과를 SQLite에 저장하여 여러 uvicorn 워커가 공유하는 저장소.
+    동시에 하나의 평가만 실행되도록, 실행 중인 작업이 있으면 새 작업을 만들지 않습니다.
+    실행 중인 워커는 주기적으로 heartbeat를 갱신하며, heartbeat가 오래 끊긴 작업(워커 종료 등)은 실패로 처리합니다.
+    """
+
+    def __init__(self, path: str, stale_seconds: float = 300):
+        self.path = path
+        self.stale_seconds = stale_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as db:
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("""
+                CREATE TABLE IF NOT EXISTS evaluation_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    testset_id TEXT,
+                    result TEXT,
+                    error TEXT,
+                    worker TEXT,
+                    created_at REAL NOT NULL,
+                    finished_at REAL,
+                    heartbeat_at REAL
+                )
+            """)
+
+    @contextmanager
+    def _connect(self):
+        # 워커 프로세스/스레드마다 짧게 연결하고, 트랜잭션은 직접 관리합니다.
+        db = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        db.row_factory = sqlite3.Row
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        if row is None:
+            return None
+        job = dict(row)
+        job["params"] = json.loads(job["params"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def try_create(self, params: dict) -> tuple:
+        """
+        실행 중인 작업이 없으면 새 작업을 running 상태로 만듭니다.
+
+        :return: (새 작업 또는 None, 이미 실행 중인 작업 또는 None)
+        """
+        now = time.time()
+        with self._connect() as db:
+            # BEGIN IMMEDIATE로 쓰기 잠금을 먼저 잡아, 여러 워커가 동시에 요청해도 한 작업만 만들어집니다.
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                db.execute(
+                    "UPDATE evaluation_jobs SET status = 'failed', error = ?, finished_at = ? "
+                    "WHERE status = 'running' AND heartbeat_at < ?",
+                    ("평가를 실행하던 워커의 응답이 끊겼습니다.", now, now - self.stale_seconds)
+                )
+                running = db.execute("SELECT * FROM evaluation_jobs WHERE status = 'running'").fetchone()
+                if running is not None:
+                    db.execute("COMMIT")
+                    return None, self._to_dict(running)
+
+                job_id = uuid.uuid4().hex[:12]
+                db.execute(
+                    "INSERT INTO evaluation_jobs (id, status, params, worker, created_at, heartbeat_at) "
+                    "VALUES (?, 'running', ?, ?, ?, ?)",
+                    (job_id, json.dumps(params, ensure_ascii=False), str(os.getpid()), now, now)
+                )
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return self.get(job_id), None
+
+    def _update(self, job_id: str, **fields):
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._connect() as db:
+            db.execute(f"UPDATE evaluation_jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def heartbeat(self, job_id: str):
+        self._update(job_id, heartbeat_at=time.time())
+
+    def set_testset(self, job_id: str, testset_id: str):
+        self._update(job_id, testset_id=testset_id)
+
+    def complete(self, job_id: str, result: dict):
+        self._update(job_id, status="completed", result=json.dumps(result, ensure_ascii=False),
+                     finished_at=time.time())
+
+    def fail(self, job_id: str, error: str):
+        self._update(job_id, status="failed", error=error, finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._connect() as db:
+            return self._to_dict(db.execute("SELECT * FROM evaluation_jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def latest(self) -> Optional[dict]:
+        with self._connect() as db:
+            return self._to_dict(
+                db.execute("SELECT * FROM evaluation_jobs ORDER BY created_at DESC LIMIT 1").fetchone()
+            )
+
+    def list(self, limit: int = 20) -> List[dict]:
+        with self._connect() as db:
+            rows = db.execute("SELECT * FROM evaluation_jobs ORDER BY created_at DESC LIMIT ?", (limit,)).fetchall()
+        return [self._to_dict(row) for row in rows]
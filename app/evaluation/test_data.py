@@ -1,7 +1,8 @@
 import logging
+import random
 import pandas as pd
 from datasets import Dataset
-from typing import List
+from typing import List, Optional
 
 from langchain.docstore.document import Document
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
@@ -9,8 +10,8 @@ from ragas.testset.generator import TestsetGenerator
 from ragas.testset.evolutions import simple, reasoning, multi_context
 
 from app.config import settings
-from app.graph.driver import neo4j_driver
-from app.rag.embedding import embeddings
+from app.graph.driver import get_neo4j_driver
+from app.limits.outbound import create_http_clients
 
 logger = logging.getLogger(__name__)
 
@@ -18,38 +19,68 @@ logger = logging.getLogger(__name__)
 class TestDataGenerator:
 
     def __init__(self):
-        self.generator_llm = ChatOpenAI(model="gpt-4o", openai_api_key=settings.OPENAI_API_KEY)
-        self.critic_llm = ChatOpenAI(model="gpt-4", openai_api_key=settings.OPENAI_API_KEY)
+        # ragas는 내부 스레드에서 요청을 보내므로, 우선순위를 컨텍스트가 아닌 클라이언트에 직접 지정합니다.
+        http_client, http_async_client = create_http_clients("background")
+        self.generator_llm = ChatOpenAI(model="gpt-4o", openai_api_key=settings.OPENAI_API_KEY, max_retries=0,
+                                        http_client=http_client, http_async_client=http_async_client)
+        self.critic_llm = ChatOpenAI(model="gpt-4", openai_api_key=settings.OPENAI_API_KEY, max_retries=0,
+                                     http_client=http_client, http_async_client=http_async_client)
         self.testset_generator = TestsetGenerator.from_langchain(
             self.generator_llm,
             self.critic_llm,
-            embeddings=embeddings  # <-- embeddings 인자 추가
+            embeddings=OpenAIEmbeddings(model=settings.EMBEDDING_MODEL, openai_api_key=settings.OPENAI_API_KEY,
+                                        max_retries=0, http_client=http_client, http_async_client=http_async_client)
         )
         logger.info("TestDataGenerator가 초기화되었습니다.")
 
-    def _load_documents_from_neo4j(self, sample_count: int = 50) -> List[Document]:
-        """Neo4j에서 샘플 문서를 로드합니다."""
-        documents = []
-        with neo4j_driver.session() as session:
-            # 랜덤하게 문서를 샘플링하여 다양성을 확보
-            result = session.run(
-                "MATCH (a:Announcement) RETURN a.full_text AS text, a.url AS url, rand() as r ORDER BY r LIMIT $count",
-                {"count": sample_count}
+    def _load_documents_from_neo4j(self, sample_count: int = 50, seed: Optional[str] = None,
+                                   since: Optional[int] = None) -> List[Document]:
+        """
+        Neo4j에서 샘플 문서를 로드합니다.
+        ORDER BY rand()로 전체 본문을 정렬하지 않고, url 목록만 읽어 seed로 재현 가능하게 샘플링한 뒤
+        선택된 공지의 본문만 조회합니다.
+
+        :param seed: 샘플링 시드. 같은 시드와 같은 코퍼스면 같은 문서를 선택합니다.
+        :param since: createdAt(epochMillis)이 이 값보다 큰, 새로 수집된 공지만 대상으로 합니다.
+        """
+        if since is None:
+            url_records, _, _ = get_neo4j_driver().execute_query("MATCH (a:Announcement) RETURN a.url AS url")
+        else:
+            url_records, _, _ = get_neo4j_driver().execute_query(
+                "MATCH (a:Announcement) WHERE a.createdAt > datetime({epochMillis: $since}) RETURN a.url AS url",
+                {"since": since}
             )
-            for record in result:
-                documents.append(Document(page_content=record["text"], metadata={"source": record["url"]}))
+        urls = sorted(record["url"] for record in url_records)
+        sampled = random.Random(seed).sample(urls, min(sample_count, len(urls)))
+
+        records, _, _ = get_neo4j_driver().execute_query(
+            "MATCH (a:Announcement) WHERE a.url IN $urls AND a.full_text IS NOT NULL "
+            "RETURN a.full_text AS text, a.url AS url",
+            {"urls": sampled}
+        )
+        documents = [Document(page_content=record["text"], metadata={"source": record["url"]}) for record in records]
         logger.info(f"Neo4j에서 {len(documents)}개의 문서를 샘플링했습니다.")
         return documents
 
-    def generate(self, doc_sample_count: int = 50, test_size: int = 10) -> Dataset:
+    def corpus_snapshot(self) -> dict:
+        """현재 코퍼스 상태(공지 수, 가장 최근 수집 시각)를 반환합니다. 테스트셋 버전 키로 사용됩니다."""
+        records, _, _ = get_neo4j_driver().execute_query(
+            "MATCH (a:Announcement) RETURN count(a) AS count, max(a.createdAt).epochMillis AS latest"
+        )
+        return {"count": records[0]["count"], "latest": records[0]["latest"] or 0}
+
+    def generate(self, doc_sample_count: int = 50, test_size: int = 10, seed: Optional[str] = None,
+                 since: Optional[int] = None) -> Dataset:
         """
         문서를 기반으로 질문/정답 데이터셋을 생성합니다.
 
         :param doc_sample_count: DB에서 샘플링할 문서의 수
         :param test_size: 생성할 질문/정답 쌍의 수
+        :param seed: 문서 샘플링 시드
+        :param since: 지정하면 이 시각(epochMillis) 이후 수집된 공지에서만 생성합니다.
         :return: Hugging Face Dataset 객체
         """
-        documents = self._load_documents_from_neo4j(sample_count=doc_sample_count)
+        documents = self._load_documents_from_neo4j(sample_count=doc_sample_count, seed=seed, since=since)
         if not documents:
             raise ValueError("Neo4j에서 문서를 로드할 수 없습니다. DB에 데이터가 있는지 확인하세요.")
 
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import math
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import pandas as pd
+from datasets import Dataset
+
+from app.evaluation.test_data import TestDataGenerator
+
+logger = logging.getLogger(__name__)
+
+
+class TestSetStore:
+    """
+    생성된 테스트셋을 CSV + 매니페스트(JSON)로 저장하고 버전을 관리합니다.
+    테스트셋 id는 코퍼스 스냅샷(공지 수, 최근 수집 시각)과 생성 파라미터로 만들어지므로,
+    코퍼스가 바뀌지 않았다면 같은 테스트셋을 재사용하여 평가 결과를 실행 간에 비교할 수 있습니다.
+    코퍼스에 새 공지가 추가되면 새 공지에서만 질문을 추가 생성하여 이전 버전을 확장한 새 버전을 만듭니다.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.path.join(os.getcwd(), "evaluation_results", "testsets")
+        os.makedirs(self.directory, exist_ok=True)
+        self._generator: Optional[TestDataGenerator] = None
+
+    @property
+    def generator(self) -> TestDataGenerator:
+        # 생성기는 LLM 클라이언트를 만들기 때문에 실제로 필요할 때 한 번만 만듭니다.
+        if self._generator is None:
+            self._generator = TestDataGenerator()
+        return self._generator
+
+    def _manifest_path(self, testset_id: str) -> str:
+        return os.path.join(self.directory, f"{testset_id}.json")
+
+    def _csv_path(self, testset_id: str) -> str:
+        return os.path.join(self.directory, f"{testset_id}.csv")
+
+    @staticmethod
+    def _make_id(params: dict, snapshot: dict, parent_id: Optional[str]) -> str:
+        key = json.dumps({"params": params, "snapshot": snapshot, "parent": parent_id}, sort_keys=True)
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()[:12]
+
+    def exists(self, testset_id: str) -> bool:
+        return os.path.exists(self._manifest_path(testset_id))
+
+    def list(self) -> List[dict]:
+        """저장된 테스트셋 매니페스트 목록을 최신순으로 반환합니다."""
+        manifests = []
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".json"):
+                with open(os.path.join(self.directory, filename), encoding="utf-8") as f:
+                    manifests.append(json.load(f))
+        return sorted(manifests, key=lambda manifest: manifest["created_at"], reverse=True)
+
+    def load(self, testset_id: str) -> Dataset:
+        if not self.exists(testset_id):
+            raise KeyError(f"테스트셋 '{testset_id}'을(를) 찾을 수 없습니다.")
+        return self.generator.load_from_csv(self._csv_path(testset_id))
+
+    def _latest(self, params: dict) -> Optional[dict]:
+        for manifest in self.list():
+            if manifest["params"] == params:
+                return manifest
+        return None
+
+    def _save(self, dataset: Dataset, params: dict, snapshot: dict, parent_id: Optional[str]) -> dict:
+        testset_id = self._make_id(params, snapshot, parent_id)
+        self.generator.save_to_csv(dataset, self._csv_path(testset_id))
+        manifest = {
+            "id": testset_id,
+            "parent_id": parent_id,
+            "created_at": datetime.now().isoformat(),
+            "params": params,
+            "snapshot": snapshot,
+            "size": len(dataset),
+        }
+        with open(self._manifest_path(testset_id), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        logger.info(f"테스트셋 '{testset_id}'({len(dataset)}개 질문)을 저장했습니다.")
+        return manifest
+
+    def get_or_create(self, doc_sample_count: int = 20, test_size: int = 3,
+                      testset_id: Optional[str] = None) -> tuple:
+        """
+        평가에 사용할 테스트셋을 반환합니다.
+
+        - testset_id를 지정하면 저장된 테스트셋을 그대로 불러옵니다.
+        - 같은 파라미터의 테스트셋이 없으면 새로 생성합니다.
+        - 있으면 그 이후 새로 수집된 공지에서만 질문을 추가 생성하고, 새 공지가 없으면 그대로 재사용합니다.
+
+        :return: (Dataset, 테스트셋 id)
+        """
+        if testset_id is not None:
+            return self.load(testset_id), testset_id
+
+        params = {"doc_sample_count": doc_sample_count, "test_size": test_size}
+        snapshot = self.generator.corpus_snapshot()
+        latest = self._latest(params)
+
+        if latest is None:
+            logger.info("같은 파라미터의 테스트셋이 없어 새로 생성합니다.")
+            dataset = self.generator.generate(doc_sample_count=doc_sample_count, test_size=test_size,
+                                              seed=json.dumps(params, sort_keys=True))
+            return dataset, self._save(dataset, params, snapshot, None)["id"]
+
+        base = self.load(latest["id"])
+        since = latest["snapshot"]["latest"]
+        if snapshot["latest"] <= since:
+            logger.info(f"코퍼스가 변경되지 않아 테스트셋 '{latest['id']}'을(를) 재사용합니다.")
+            return base, latest["id"]
+
+        # 새로 수집된 공지 수에 비례하여 추가 질문 수를 정합니다.
+        new_count = max(snapshot["count"] - latest["snapshot"]["count"], 1)
+        extra_size = min(test_size, max(1, math.ceil(test_size * new_count / doc_sample_count)))
+        logger.info(f"새로 수집된 공지로 {extra_size}개의 질문을 추가 생성합니다.")
+        try:
+            extra = self.generator.generate(doc_sample_count=doc_sample_count, test_size=extra_size,
+                                            seed=latest["id"], since=since)
+        except ValueError:
+            # 새 공지가 모두 본문 없이 수집된 경우 등, 추가할 문서가 없으면 기존 테스트셋을 재사용합니다.
+            logger.info(f"추가할 문서가 없어 테스트셋 '{latest['id']}'을(를) 재사용합니다.")
+            return base, latest["id"]
+
+        dataset = Dataset.from_pandas(pd.concat([base.to_pandas(), extra.to_pandas()], ignore_index=True))
+        return dataset, self._save(dataset, params, snapshot, latest["id"])["id"]
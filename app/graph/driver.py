@@ -1,42 +1,183 @@
-from neo4j import GraphDatabase
-from langchain_community.vectorstores import Neo4jVector
+import logging
+
+from neo4j import AsyncGraphDatabase, GraphDatabase
 from app.config import settings  # config 폴더의 settings 모듈을 import
 from app.rag.embedding import embeddings
 
-# Neo4j 드라이버 인스턴스
-try:
-    neo4j_driver = GraphDatabase.driver(
-        settings.NEO4J_URI,
-        auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD)
-    )
-    print("Neo4j 드라이버가 성공적으로 생성되었습니다.")
-except Exception as e:
-    print(f"Neo4j 드라이버 생성 실패: {e}")
-    neo4j_driver = None
+logger = logging.getLogger(__name__)
+
+# Neo4j 드라이버 인스턴스. import 시점이 아니라 처음 사용할 때(또는 FastAPI lifespan에서) 생성합니다.
+neo4j_driver = None
+
+
+def get_neo4j_driver():
+    """동기 Neo4j 드라이버를 반환합니다. 처음 호출될 때 생성합니다."""
+    global neo4j_driver
+    if neo4j_driver is None:
+        try:
+            neo4j_driver = GraphDatabase.driver(
+                settings.NEO4J_URI,
+                auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD)
+            )
+            logger.info("Neo4j 드라이버가 성공적으로 생성되었습니다.")
+        except Exception as e:
+            logger.error(f"Neo4j 드라이버 생성 실패: {e}")
+            raise ConnectionError("Neo4j 드라이버가 초기화되지 않았습니다.") from e
+    return neo4j_driver
+
+
+def close_neo4j_driver():
+    global neo4j_driver
+    if neo4j_driver is not None:
+        neo4j_driver.close()
+        neo4j_driver = None
+
+
+# 비동기 드라이버는 이벤트 루프에 묶이므로 FastAPI lifespan에서 생성/종료합니다.
+async_neo4j_driver = None
+
+
+def init_async_neo4j_driver():
+    """API 전체가 공유하는 비동기 Neo4j 드라이버(커넥션 풀)를 생성합니다."""
+    global async_neo4j_driver
+    if async_neo4j_driver is None:
+        async_neo4j_driver = AsyncGraphDatabase.driver(
+            settings.NEO4J_URI,
+            auth=(settings.NEO4J_USERNAME, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_CONNECTION_ACQUISITION_TIMEOUT
+        )
+    return async_neo4j_driver
+
+
+def get_async_neo4j_driver():
+    """비동기 드라이버를 반환합니다. lifespan 밖(스크립트, 평가 등)에서는 처음 호출될 때 생성합니다."""
+    if async_neo4j_driver is None:
+        return init_async_neo4j_driver()
+    return async_neo4j_driver
+
+
+async def close_async_neo4j_driver():
+    global async_neo4j_driver
+    if async_neo4j_driver is not None:
+        await async_neo4j_driver.close()
+        async_neo4j_driver = None
+
+
+# 문서(Announcement) 단위 검색: 공지 하나가 하나의 검색 결과
+DOCUMENT_RETRIEVAL_QUERY = """
+RETURN node.full_text AS text, score, {source: node.url, title: node.title} AS metadata
+"""
+
+# 청크(Chunk) 단위 검색: 검색된 청크를 부모 공지별로 묶어, 공지당 하나의 결과로 반환
+CHUNK_RETRIEVAL_QUERY = """
+MATCH (node)-[:PART_OF]->(a:Announcement)
+WITH a, node, score ORDER BY node.index
+WITH a, max(score) AS score, collect(node.text) AS texts
+RETURN '제목: ' + a.title + reduce(s = '', t IN texts | s + '\\n\\n' + t) AS text,
+       score, {{source: a.url, title: a.title}} AS metadata
+ORDER BY score DESC
+LIMIT {limit}
+"""
 
 
 def get_retriever(search_k: int = 5):
     """
-    RAG에 사용할 Neo4jVector Retriever를 생성하는 함수
+    RAG에 사용할 Retriever를 생성하는 함수
+    settings.RETRIEVER_GRANULARITY가 'chunk'이면 청크 인덱스를 검색하고 결과를 부모 공지별로 묶습니다.
+    settings.RETRIEVER_BACKEND가 'neo4j_async'이면 공유 비동기 드라이버로 벡터 검색을 직접 실행하고,
+    'hybrid'이면 전문 검색과 벡터 검색을 RRF로 결합하고, 'mirror'이면 로컬 메모리 매핑 벡터 미러를 검색하며,
+    'langchain'이면 Neo4jVector 스토어를 사용합니다.
+    settings.METADATA_FILTER_ENABLED이면 질문의 날짜/부서/게시판 조건을 사전 필터로 쓰는 Retriever로 감쌉니다.
+    검색할 벡터 인덱스와 임베딩 속성은 Neo4j의 활성 인덱스 포인터(VectorIndexPointer)를 따릅니다.
     """
-    if not neo4j_driver:
-        raise ConnectionError("Neo4j 드라이버가 초기화되지 않았습니다.")
+    retriever = _get_base_retriever(search_k)
+    if not settings.METADATA_FILTER_ENABLED:
+        return retriever
+
+    from app.graph.retriever import MetadataFilteredRetriever, metadata_vocabulary
+    from app.graph.vector_index import active_vector_index
+
+    return MetadataFilteredRetriever(
+        base_retriever=retriever,
+        embeddings=embeddings,
+        vocabulary=metadata_vocabulary,
+        vector_index=active_vector_index,
+        granularity=settings.RETRIEVER_GRANULARITY,
+        search_k=search_k,
+        fanout=settings.CHUNK_SEARCH_FANOUT if settings.RETRIEVER_GRANULARITY == "chunk" else 1,
+        max_candidates=settings.METADATA_FILTER_MAX_CANDIDATES
+    )
+
+
+def _get_base_retriever(search_k: int):
+    from app.graph.vector_index import FittedEmbeddings, active_vector_index
+
+    profile = active_vector_index.get()
+    index_name = profile.index_name(settings.RETRIEVER_GRANULARITY)
+    if settings.RETRIEVER_GRANULARITY == "chunk":
+        text_node_property = "text"
+        retrieval_query = CHUNK_RETRIEVAL_QUERY.format(limit=search_k)
+        vector_k = search_k * settings.CHUNK_SEARCH_FANOUT
+    else:
+        text_node_property = "full_text"
+        retrieval_query = DOCUMENT_RETRIEVAL_QUERY
+        vector_k = search_k
+
+    if settings.RETRIEVER_BACKEND == "mirror":
+        from app.graph.vector_mirror import MirrorVectorRetriever, get_vector_mirror
+
+        logger.info("로컬 벡터 미러 Retriever가 성공적으로 생성되었습니다.")
+        return MirrorVectorRetriever(
+            embeddings=embeddings,
+            mirror=get_vector_mirror(),
+            granularity=settings.RETRIEVER_GRANULARITY,
+            search_k=search_k,
+            fanout=vector_k // search_k
+        )
+
+    if settings.RETRIEVER_BACKEND in ("neo4j_async", "hybrid"):
+        from app.graph.retriever import HybridRetriever, Neo4jAsyncVectorRetriever
+
+        vector_retriever = Neo4jAsyncVectorRetriever(
+            embeddings=embeddings,
+            index_name=index_name,
+            vector_index=active_vector_index,
+            granularity=settings.RETRIEVER_GRANULARITY,
+            search_k=search_k,
+            fanout=vector_k // search_k
+        )
+        if settings.RETRIEVER_BACKEND == "hybrid":
+            logger.info("Neo4j 하이브리드(전문 + 벡터) Retriever가 성공적으로 생성되었습니다.")
+            return HybridRetriever(
+                vector_retriever=vector_retriever,
+                search_k=search_k,
+                rrf_k=settings.HYBRID_RRF_K,
+                lexical_fast_path=settings.HYBRID_LEXICAL_FAST_PATH,
+                lexical_min_score=settings.HYBRID_LEXICAL_MIN_SCORE,
+                lexical_min_ratio=settings.HYBRID_LEXICAL_MIN_RATIO
+            )
+        logger.info("Neo4j 비동기 Retriever가 성공적으로 생성되었습니다.")
+        return vector_retriever
+
+    # langchain_community는 import 비용이 크므로 이 백엔드를 사용할 때만 불러옵니다.
+    from langchain_community.vectorstores import Neo4jVector
 
     try:
+        # Neo4jVector는 질문 임베딩을 그대로 검색하므로, 생성 시점의 활성 인덱스 차원으로 줄여서 넘깁니다.
+        # (포인터가 전환되면 API를 재시작해야 새 인덱스를 사용합니다)
         neo4j_vector_store = Neo4jVector.from_existing_index(
-            embedding=embeddings,
+            embedding=FittedEmbeddings(embeddings, profile),
             url=settings.NEO4J_URI,
             username=settings.NEO4J_USERNAME,
             password=settings.NEO4J_PASSWORD,
-            index_name="announcement_embeddings",
-            text_node_property="full_text",
-            embedding_node_property="embedding",
-            retrieval_query="""
-            RETURN node.full_text AS text, score, {source: node.url, title: node.title} AS metadata
-            """
+            index_name=index_name,
+            text_node_property=text_node_property,
+            embedding_node_property=profile.embedding_property,
+            retrieval_query=retrieval_query
         )
-        print("Neo4j Retriever가 성공적으로 생성되었습니다.")
-        return neo4j_vector_store.as_retriever(search_kwargs={'k': search_k})
+        logger.info("Neo4j Retriever가 성공적으로 생성되었습니다.")
+        return neo4j_vector_store.as_retriever(search_kwargs={'k': vector_k})
     except Exception as e:
-        print(f"Neo4j Retriever 생성 실패: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Neo4j Retriever 생성 실패: {e}")
+        raise
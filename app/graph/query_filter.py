@@ -0,0 +1,179 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+SEOUL = ZoneInfo("Asia/Seoul")
+
+# 날짜 조건은 질문이 '공지/게시' 자체를 묻는 경우에만 적용합니다.
+# ("이번 주 금요일까지 내는 서류"처럼 본문 속 날짜를 묻는 질문을 게시일로 거르지 않기 위함)
+POSTING_CUE = re.compile(r"공지|게시|올라|등록된|소식|새 글|새글")
+OPEN_ONLY_PATTERN = re.compile(r"마감\s*(전|안\s*된|되지\s*않은)|신청\s*가능한|접수\s*중|모집\s*중|진행\s*중")
+CLOSING_SOON_PATTERN = re.compile(r"마감\s*(임박|직전)|곧\s*마감")
+# 게시판/부서 이름의 앞부분(예: '장학안내' -> '장학')만 쓴 경우에는 뒤에 이 단어가 와야 조건으로 인정합니다.
+NAME_CUE = r"\s*(공지|게시판|게시물|안내|소식)"
+NAME_SUFFIX_PATTERN = re.compile(r"(학과|학부|전공|과|팀|처|실|센터|단|원|본부|위원회|안내|공지|소식|게시판)$")
+
+PARTICLE_PATTERN = re.compile(r"(에서|으로|이나|에는|은|는|이|가|을|를|의|에|도|만|좀|들|요)$")
+# 목록 질문에서 조건 외에 나올 수 있는 단어들. 이 단어만 남으면 '순수 목록 질문'으로 봅니다.
+LISTING_WORDS = {
+    "공지", "공지사항", "게시물", "게시글", "글", "소식", "안내", "목록", "리스트", "전부", "모두", "전체", "다",
+    "알려줘", "알려주세요", "알려", "줘", "주세요", "보여줘", "보여주세요", "뭐", "무엇", "어떤", "것", "거",
+    "있어", "있나", "있나요", "있니", "있는지", "있습니까", "올라온", "올라왔어", "올라왔나", "게시된", "등록된",
+    "나온", "새로", "새", "새로운", "최신", "관련", "최근", "정리해줘", "찾아줘", "한", "된", "인",
+}
+
+
+class QueryFilter:
+    """질문에서 인식한 게시일, 마감일, 작성 부서, 게시판 조건과 순수 목록 질문 여부."""
+
+    def __init__(self):
+        self.date_from: Optional[date] = None
+        self.date_to: Optional[date] = None
+        self.deadline_from: Optional[date] = None
+        self.deadline_to: Optional[date] = None
+        self.department: Optional[str] = None
+        self.board: Optional[str] = None
+        self.is_listing = False
+        self.descriptions: List[str] = []
+
+    def is_empty(self) -> bool:
+        return not any([self.date_from, self.date_to, self.deadline_from, self.deadline_to,
+                        self.department, self.board])
+
+    def describe(self) -> str:
+        return ", ".join(self.descriptions)
+
+    def match_clause(self, alias: str = "a") -> Tuple[str, dict]:
+        """
+        조건을 만족하는 공지를 찾는 MATCH ... WHERE 절과 파라미터를 만듭니다.
+        부서/게시판은 관계 패턴으로, 날짜는 posted_at/deadline 인덱스 범위 조건으로 표현합니다.
+        """
+        patterns = [f"({alias}:Announcement)"]
+        conditions, parameters = [], {}
+        if self.department:
+            patterns.append(f"({alias})-[:POSTED_BY]->(:Department {{name: $department}})")
+            parameters["department"] = self.department
+        if self.board:
+            patterns.append(f"({alias})-[:POSTED_IN]->(:Board {{name: $board}})")
+            parameters["board"] = self.board
+        for name, field, operator in (("date_from", "posted_at", ">="), ("date_to", "posted_at", "<="),
+                                      ("deadline_from", "deadline", ">="), ("deadline_to", "deadline", "<=")):
+            value = getattr(self, name)
+            if value is not None:
+                conditions.append(f"{alias}.{field} {operator} date(${name})")
+                parameters[name] = value.isoformat()
+        clause = "MATCH " + ", ".join(patterns)
+        if conditions:
+            clause += "\nWHERE " + " AND ".join(conditions)
+        return clause, parameters
+
+
+def today_in_seoul() -> date:
+    return datetime.now(SEOUL).date()
+
+
+def _month_range(year: int, month: int) -> Tuple[date, date]:
+    start = date(year, month, 1)
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return start, next_month - timedelta(days=1)
+
+
+def _parse_date_range(question: str, today: date) -> Tuple[Optional[Tuple[date, date]], Optional[str], str]:
+    """게시일 범위 표현을 찾아 ((시작, 끝), 설명, 일치한 문자열)을 반환합니다."""
+    monday = today - timedelta(days=today.weekday())
+    rules = [
+        (r"오늘", lambda m: (today, today), "오늘"),
+        (r"어제", lambda m: (today - timedelta(days=1), today - timedelta(days=1)), "어제"),
+        (r"이번\s*주|금주", lambda m: (monday, today), "이번 주"),
+        (r"(지난|저번)\s*주", lambda m: (monday - timedelta(days=7), monday - timedelta(days=1)), "지난주"),
+        (r"이번\s*달|이달", lambda m: (today.replace(day=1), today), "이번 달"),
+        (r"(지난|저번)\s*달",
+         lambda m: _month_range(*((today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12))),
+         "지난달"),
+        (r"최근\s*(\d{1,3})\s*일", lambda m: (today - timedelta(days=int(m.group(1))), today), None),
+        (r"최근\s*(\d{1,2})\s*주", lambda m: (today - timedelta(weeks=int(m.group(1))), today), None),
+        (r"(20\d{2})\s*년\s*(\d{1,2})\s*월(?!\s*\d{1,2}\s*일)",
+         lambda m: _month_range(int(m.group(1)), int(m.group(2))), None),
+        (r"(?<!\d)(\d{1,2})\s*월(?!\s*\d{1,2}\s*일)",
+         lambda m: _month_range(today.year if int(m.group(1)) <= today.month else today.year - 1,
+                                int(m.group(1))),
+         None),
+        (r"올해|금년", lambda m: (date(today.year, 1, 1), today), "올해"),
+        (r"최근|요즘", lambda m: (today - timedelta(days=30), today), "최근 30일"),
+    ]
+    for pattern, to_range, description in rules:
+        match = re.search(pattern, question)
+        if match is None:
+            continue
+        try:
+            start, end = to_range(match)
+        except ValueError:
+            continue
+        return (start, end), description or match.group(0), match.group(0)
+    return None, None, ""
+
+
+def _match_name(question: str, names: Iterable[str]) -> Tuple[Optional[str], str]:
+    """질문에 나온 부서/게시판 이름을 찾습니다. 긴 이름부터 비교하여 '컴퓨터공학과'가 '공학과'보다 먼저 맞게 합니다."""
+    for name in sorted(names, key=len, reverse=True):
+        if name and name in question:
+            return name, name
+    for name in sorted(names, key=len, reverse=True):
+        stem = NAME_SUFFIX_PATTERN.sub("", name or "")
+        if len(stem) < 2:
+            continue
+        match = re.search(re.escape(stem) + NAME_CUE, question)
+        if match:
+            return name, stem
+    return None, ""
+
+
+def _is_listing(residual: str) -> bool:
+    for token in re.findall(r"[가-힣A-Za-z0-9]+", residual):
+        token = PARTICLE_PATTERN.sub("", token)
+        if token and token not in LISTING_WORDS:
+            return False
+    return True
+
+
+def parse_query_filter(question: str, departments: Iterable[str] = (), boards: Iterable[str] = (),
+                       today: Optional[date] = None) -> QueryFilter:
+    """
+    질문에서 게시일("이번 주", "지난달", "최근 7일", "9월"), 마감 조건("마감 전", "마감 임박"),
+    작성 부서와 게시판 이름을 인식합니다. 조건 외에 목록을 요청하는 단어만 남으면 순수 목록 질문으로 표시합니다.
+    """
+    today = today or today_in_seoul()
+    query_filter = QueryFilter()
+    residual = question
+
+    if POSTING_CUE.search(question):
+        date_range, description, matched = _parse_date_range(question, today)
+        if date_range is not None:
+            query_filter.date_from, query_filter.date_to = date_range
+            query_filter.descriptions.append(f"{description} 게시")
+            residual = residual.replace(matched, " ", 1)
+
+    closing_soon = CLOSING_SOON_PATTERN.search(residual)
+    open_only = OPEN_ONLY_PATTERN.search(residual)
+    if closing_soon:
+        query_filter.deadline_from, query_filter.deadline_to = today, today + timedelta(days=7)
+        query_filter.descriptions.append("7일 이내 마감")
+        residual = residual.replace(closing_soon.group(0), " ", 1)
+    elif open_only:
+        query_filter.deadline_from = today
+        query_filter.descriptions.append("마감 전")
+        residual = residual.replace(open_only.group(0), " ", 1)
+
+    query_filter.department, matched = _match_name(residual, departments)
+    if query_filter.department:
+        query_filter.descriptions.append(query_filter.department)
+        residual = residual.replace(matched, " ", 1)
+
+    query_filter.board, matched = _match_name(residual, boards)
+    if query_filter.board:
+        query_filter.descriptions.append(f"{query_filter.board} 게시판")
+        residual = residual.replace(matched, " ", 1)
+
+    query_filter.is_listing = not query_filter.is_empty() and _is_listing(residual)
+    return query_filter
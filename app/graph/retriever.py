@@ -0,0 +1,522 @@
+import asyncio
+import logging
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from neo4j import RoutingControl
+
+from app.config import settings
+from app.graph import driver as graph_driver
+from app.graph.query_filter import QueryFilter, parse_query_filter
+from app.monitoring.metrics import RETRIEVAL_PATHS
+from app.monitoring.tracing import annotate, span
+
+logger = logging.getLogger(__name__)
+
+# 벡터 인덱스 검색 결과를 행 단위(url, title, text, score)로 반환하는 쿼리.
+# 청크 검색 결과의 부모 공지별 묶음은 group_rows_to_documents에서 처리합니다.
+DOCUMENT_VECTOR_QUERY = """
+CALL db.index.vector.queryNodes($index, $k, $embedding) YIELD node, score
+RETURN node.url AS url, node.title AS title, node.full_text AS text, 0 AS chunk_index, score
+"""
+
+CHUNK_VECTOR_QUERY = """
+CALL db.index.vector.queryNodes($index, $k, $embedding) YIELD node, score
+MATCH (node)-[:PART_OF]->(a:Announcement)
+RETURN a.url AS url, a.title AS title, node.text AS text, node.index AS chunk_index, score
+"""
+
+# 여러 질문의 벡터 검색을 한 번의 쿼리로 실행하는 배치 쿼리. i는 입력 질문의 순서입니다.
+BATCH_DOCUMENT_VECTOR_QUERY = """
+UNWIND range(0, size($embeddings) - 1) AS i
+CALL db.index.vector.queryNodes($index, $k, $embeddings[i]) YIELD node, score
+RETURN i, node.url AS url, node.title AS title, node.full_text AS text, 0 AS chunk_index, score
+"""
+
+BATCH_CHUNK_VECTOR_QUERY = """
+UNWIND range(0, size($embeddings) - 1) AS i
+CALL db.index.vector.queryNodes($index, $k, $embeddings[i]) YIELD node, score
+MATCH (node)-[:PART_OF]->(a:Announcement)
+RETURN i, a.url AS url, a.title AS title, node.text AS text, node.index AS chunk_index, score
+"""
+
+FULLTEXT_QUERY = """
+CALL db.index.fulltext.queryNodes($index, $query, {limit: $k}) YIELD node, score
+RETURN node.url AS url, node.title AS title, node.full_text AS text, 0 AS chunk_index, score
+"""
+
+BATCH_FULLTEXT_QUERY = """
+UNWIND range(0, size($queries) - 1) AS i
+CALL db.index.fulltext.queryNodes($index, $queries[i], {limit: $k}) YIELD node, score
+RETURN i, node.url AS url, node.title AS title, node.full_text AS text, 0 AS chunk_index, score
+"""
+
+# 메타데이터 조건({match})으로 공지를 먼저 고른 뒤, 그 안에서만 벡터 유사도로 순위를 매기는 쿼리.
+# 조건이 넓으면 최근 게시된 공지 $max_candidates개로 후보를 제한합니다. {property}는 활성 인덱스의 임베딩 속성입니다.
+FILTERED_DOCUMENT_VECTOR_QUERY = """
+{match}
+WITH a WHERE a.{property} IS NOT NULL
+WITH a ORDER BY a.posted_at IS NULL, a.posted_at DESC LIMIT $max_candidates
+WITH a, vector.similarity.cosine(a.{property}, $embedding) AS score
+ORDER BY score DESC LIMIT $k
+RETURN a.url AS url, a.title AS title, a.full_text AS text, 0 AS chunk_index, score
+"""
+
+FILTERED_CHUNK_VECTOR_QUERY = """
+{match}
+WITH a ORDER BY a.posted_at IS NULL, a.posted_at DESC LIMIT $max_candidates
+MATCH (c:Chunk)-[:PART_OF]->(a)
+WHERE c.{property} IS NOT NULL
+WITH a, c, vector.similarity.cosine(c.{property}, $embedding) AS score
+ORDER BY score DESC LIMIT $k
+RETURN a.url AS url, a.title AS title, c.text AS text, c.index AS chunk_index, score
+"""
+
+# 목록 질문: 조건에 맞는 공지를 게시일(마감 조건이 있으면 마감일) 순으로 반환합니다.
+LISTING_QUERY = """
+{match}
+RETURN a.url AS url, a.title AS title, toString(a.posted_at) AS posted_at,
+       toString(a.deadline) AS deadline, a.department AS department
+ORDER BY {order}
+LIMIT $limit
+"""
+
+VOCABULARY_QUERY = """
+OPTIONAL MATCH (d:Department)
+WITH collect(DISTINCT d.name) AS departments
+OPTIONAL MATCH (b:Board)
+RETURN departments, collect(DISTINCT b.name) AS boards
+"""
+
+_LUCENE_SPECIAL_CHARS = re.compile(r'([+\-!(){}\[\]^"~*?:\\/&|])')
+
+
+def escape_lucene_query(text: str) -> str:
+    """Lucene 쿼리 문법의 특수문자를 이스케이프합니다."""
+    return _LUCENE_SPECIAL_CHARS.sub(r"\\\1", text).strip()
+
+
+async def _afetch_rows(query: str, parameters: dict) -> List[Dict[str, Any]]:
+    driver = graph_driver.get_async_neo4j_driver()
+    records, _, _ = await driver.execute_query(query, parameters, routing_=RoutingControl.READ)
+    return [record.data() for record in records]
+
+
+def _fetch_rows(query: str, parameters: dict) -> List[Dict[str, Any]]:
+    driver = graph_driver.get_neo4j_driver()
+    records, _, _ = driver.execute_query(query, parameters, routing_=RoutingControl.READ)
+    return [record.data() for record in records]
+
+
+def split_rows_by_index(rows: List[Dict[str, Any]], size: int) -> List[List[Dict[str, Any]]]:
+    """배치 쿼리 결과 행을 입력 순서(i)별 행 목록으로 나눕니다."""
+    grouped: List[List[Dict[str, Any]]] = [[] for _ in range(size)]
+    for row in rows:
+        grouped[row.pop("i")].append(row)
+    return grouped
+
+
+def group_rows_to_documents(rows: List[Dict[str, Any]], search_k: int, granularity: str) -> List[Document]:
+    """
+    검색 결과 행을 공지(url) 단위 Document 목록으로 변환합니다.
+    청크 검색이면 같은 공지의 청크를 순서대로 이어 붙이고, 점수는 가장 높은 청크의 점수를 사용합니다.
+    """
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        if row["text"] is None:
+            continue
+        entry = grouped.setdefault(row["url"], {"title": row["title"], "score": row["score"], "parts": []})
+        entry["score"] = max(entry["score"], row["score"])
+        entry["parts"].append((row["chunk_index"], row["text"]))
+
+    documents = []
+    for url, entry in sorted(grouped.items(), key=lambda item: item[1]["score"], reverse=True)[:search_k]:
+        texts = [text for _, text in sorted(entry["parts"], key=lambda part: part[0])]
+        if granularity == "chunk":
+            page_content = f"제목: {entry['title']}\n\n" + "\n\n".join(texts)
+        else:
+            page_content = texts[0]
+        documents.append(Document(
+            page_content=page_content,
+            metadata={"source": url, "title": entry["title"], "score": entry["score"]}
+        ))
+    return documents
+
+
+class Neo4jAsyncVectorRetriever(BaseRetriever):
+    """
+    Neo4j 비동기 드라이버로 벡터 인덱스를 직접 조회하는 Retriever.
+    질문 임베딩과 벡터 검색이 모두 이벤트 루프 위에서 실행되어 executor 스레드를 점유하지 않으며,
+    앱 lifespan에서 관리하는 공유 커넥션 풀을 사용합니다.
+    vector_index(활성 인덱스 포인터)가 있으면 index_name 대신 포인터가 가리키는 인덱스를 그 차원에 맞춘 임베딩으로 검색합니다.
+    """
+
+    embeddings: Any
+    index_name: str
+    vector_index: Any = None
+    granularity: str = "document"
+    search_k: int = 5
+    fanout: int = 1
+
+    @property
+    def vector_query(self) -> str:
+        return CHUNK_VECTOR_QUERY if self.granularity == "chunk" else DOCUMENT_VECTOR_QUERY
+
+    def _parameters(self, embedding: List[float], profile=None) -> dict:
+        if profile is None:
+            return {"index": self.index_name, "k": self.search_k * self.fanout, "embedding": embedding}
+        return {"index": profile.index_name(self.granularity), "k": self.search_k * self.fanout,
+                "embedding": profile.fit(embedding)}
+
+    async def _aprofile(self):
+        return await self.vector_index.aget() if self.vector_index is not None else None
+
+    def _profile(self):
+        return self.vector_index.get() if self.vector_index is not None else None
+
+    async def aembed_query(self, query: str) -> List[float]:
+        with span("embedding"):
+            return await self.embeddings.aembed_query(query)
+
+    def embed_query(self, query: str) -> List[float]:
+        with span("embedding"):
+            return self.embeddings.embed_query(query)
+
+    async def asearch_by_vector(self, embedding: List[float]) -> List[Document]:
+        with span("vector_query"):
+            rows = await _afetch_rows(self.vector_query, self._parameters(embedding, await self._aprofile()))
+        return group_rows_to_documents(rows, self.search_k, self.granularity)
+
+    def search_by_vector(self, embedding: List[float]) -> List[Document]:
+        with span("vector_query"):
+            rows = _fetch_rows(self.vector_query, self._parameters(embedding, self._profile()))
+        return group_rows_to_documents(rows, self.search_k, self.granularity)
+
+    async def abatch_search(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Document]]:
+        """여러 질문의 벡터 검색을 UNWIND 쿼리 한 번으로 실행하고, 질문 순서대로 결과를 반환합니다."""
+        if not embeddings:
+            return []
+        query = BATCH_CHUNK_VECTOR_QUERY if self.granularity == "chunk" else BATCH_DOCUMENT_VECTOR_QUERY
+        profile = await self._aprofile()
+        parameters = {"index": self.index_name, "k": self.search_k * self.fanout, "embeddings": embeddings}
+        if profile is not None:
+            parameters["index"] = profile.index_name(self.granularity)
+            parameters["embeddings"] = [profile.fit(embedding) for embedding in embeddings]
+        with span("vector_query"):
+            rows = await _afetch_rows(query, parameters)
+        return [group_rows_to_documents(group, self.search_k, self.granularity)
+                for group in split_rows_by_index(rows, len(embeddings))]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = await self.aembed_query(query)
+        return await self.asearch_by_vector(embedding)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = self.embed_query(query)
+        return self.search_by_vector(embedding)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    전문(full-text, BM25) 검색과 벡터 검색 결과를 Reciprocal Rank Fusion(RRF)으로 결합하는 Retriever.
+    학과명, 과목 코드처럼 키워드가 분명한 질문은 전문 검색 결과가 충분히 확실하면
+    질문 임베딩(OpenAI 호출)과 벡터 검색을 생략하고 전문 검색 결과만 반환합니다.
+    """
+
+    vector_retriever: Neo4jAsyncVectorRetriever
+    fulltext_index: str = "announcement_fulltext"
+    search_k: int = 5
+    rrf_k: int = 60
+    lexical_fast_path: bool = True
+    lexical_min_score: float = 5.0
+    lexical_min_ratio: float = 1.5
+
+    def _lexical_parameters(self, query: str) -> dict:
+        return {"index": self.fulltext_index, "query": escape_lucene_query(query), "k": self.search_k}
+
+    async def _alexical_rows(self, query: str) -> List[Dict[str, Any]]:
+        parameters = self._lexical_parameters(query)
+        if not parameters["query"]:
+            return []
+        try:
+            with span("fulltext_query"):
+                return await _afetch_rows(FULLTEXT_QUERY, parameters)
+        except Exception as e:
+            # 전문 인덱스가 없거나 쿼리 파싱에 실패하면 벡터 검색만 사용합니다.
+            logger.warning(f"전문 검색 실패, 벡터 검색만 사용합니다: {e}")
+            return []
+
+    def _lexical_rows(self, query: str) -> List[Dict[str, Any]]:
+        parameters = self._lexical_parameters(query)
+        if not parameters["query"]:
+            return []
+        try:
+            with span("fulltext_query"):
+                return _fetch_rows(FULLTEXT_QUERY, parameters)
+        except Exception as e:
+            logger.warning(f"전문 검색 실패, 벡터 검색만 사용합니다: {e}")
+            return []
+
+    def _is_confident(self, lexical_rows: List[Dict[str, Any]]) -> bool:
+        """전문 검색 1위 점수가 기준 이상이고 2위와의 점수 차가 충분하면 확실한 것으로 판단합니다."""
+        if not self.lexical_fast_path or not lexical_rows:
+            return False
+        top = lexical_rows[0]["score"]
+        if top < self.lexical_min_score:
+            return False
+        return len(lexical_rows) == 1 or top >= lexical_rows[1]["score"] * self.lexical_min_ratio
+
+    def _lexical_documents(self, lexical_rows: List[Dict[str, Any]]) -> List[Document]:
+        documents = group_rows_to_documents(lexical_rows, self.search_k, "document")
+        for document in documents:
+            document.metadata["lexical_score"] = document.metadata.pop("score")
+        return documents
+
+    def _fuse(self, lexical_rows: List[Dict[str, Any]], vector_documents: List[Document]) -> List[Document]:
+        fused: Dict[str, Document] = {}
+        rrf_scores: Dict[str, float] = {}
+
+        # 벡터 결과를 먼저 넣어, 같은 공지라면 (청크 단위로) 더 짧은 벡터 결과 본문을 사용합니다.
+        for rank, document in enumerate(vector_documents, start=1):
+            url = document.metadata["source"]
+            fused[url] = document
+            rrf_scores[url] = rrf_scores.get(url, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        for rank, document in enumerate(self._lexical_documents(lexical_rows), start=1):
+            url = document.metadata["source"]
+            if url in fused:
+                fused[url].metadata["lexical_score"] = document.metadata["lexical_score"]
+            else:
+                fused[url] = document
+            rrf_scores[url] = rrf_scores.get(url, 0.0) + 1.0 / (self.rrf_k + rank)
+
+        ranked = sorted(fused, key=lambda url: rrf_scores[url], reverse=True)[:self.search_k]
+        for url in ranked:
+            fused[url].metadata["rrf_score"] = rrf_scores[url]
+        return [fused[url] for url in ranked]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        lexical_rows = await self._alexical_rows(query)
+        if self._is_confident(lexical_rows):
+            logger.info(f"전문 검색 결과가 확실하여 벡터 검색을 생략합니다: '{query}'")
+            RETRIEVAL_PATHS.labels(path="lexical_fast_path").inc()
+            return self._lexical_documents(lexical_rows)
+
+        embedding = await self.vector_retriever.aembed_query(query)
+        vector_documents = await self.vector_retriever.asearch_by_vector(embedding)
+        RETRIEVAL_PATHS.labels(path="fused").inc()
+        return self._fuse(lexical_rows, vector_documents)
+
+    async def abatch_search(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Document]]:
+        """
+        여러 질문의 전문 검색을 UNWIND 쿼리 한 번으로 실행하고, 전문 검색 결과가 확실하지 않은 질문만 모아
+        벡터 검색도 한 번의 배치 쿼리로 실행한 뒤 질문별로 RRF 결합합니다.
+        """
+        if not queries:
+            return []
+        escaped = [escape_lucene_query(query) for query in queries]
+        lexical_rows: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        # 빈 쿼리는 Lucene 파싱 오류가 나므로 검색 대상에서 제외합니다.
+        targets = [i for i, query in enumerate(escaped) if query]
+        if targets:
+            try:
+                with span("fulltext_query"):
+                    rows = await _afetch_rows(BATCH_FULLTEXT_QUERY, {
+                        "index": self.fulltext_index, "queries": [escaped[i] for i in targets], "k": self.search_k
+                    })
+                for position, group in enumerate(split_rows_by_index(rows, len(targets))):
+                    lexical_rows[targets[position]] = group
+            except Exception as e:
+                logger.warning(f"전문 검색 실패, 벡터 검색만 사용합니다: {e}")
+
+        results: List[List[Document]] = [[] for _ in queries]
+        vector_targets = []
+        for i, rows in enumerate(lexical_rows):
+            if self._is_confident(rows):
+                RETRIEVAL_PATHS.labels(path="lexical_fast_path").inc()
+                results[i] = self._lexical_documents(rows)
+            else:
+                vector_targets.append(i)
+
+        if vector_targets:
+            vector_documents = await self.vector_retriever.abatch_search(
+                [queries[i] for i in vector_targets], [embeddings[i] for i in vector_targets]
+            )
+            for i, documents in zip(vector_targets, vector_documents):
+                RETRIEVAL_PATHS.labels(path="fused").inc()
+                results[i] = self._fuse(lexical_rows[i], documents)
+        return results
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        lexical_rows = self._lexical_rows(query)
+        if self._is_confident(lexical_rows):
+            RETRIEVAL_PATHS.labels(path="lexical_fast_path").inc()
+            return self._lexical_documents(lexical_rows)
+
+        embedding = self.vector_retriever.embed_query(query)
+        vector_documents = self.vector_retriever.search_by_vector(embedding)
+        RETRIEVAL_PATHS.labels(path="fused").inc()
+        return self._fuse(lexical_rows, vector_documents)
+
+
+class MetadataVocabulary:
+    """
+    질문에서 부서/게시판 조건을 인식할 때 쓰는 이름 목록.
+    Neo4j의 Department, Board 노드에서 읽어 refresh_seconds 동안 재사용합니다.
+    """
+
+    def __init__(self, refresh_seconds: float = 300):
+        self.refresh_seconds = refresh_seconds
+        self.departments: List[str] = []
+        self.boards: List[str] = []
+        self._loaded_at: Optional[float] = None
+
+    def _expired(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _update(self, rows: List[Dict[str, Any]]):
+        if rows:
+            self.departments = [name for name in rows[0]["departments"] if name]
+            self.boards = [name for name in rows[0]["boards"] if name]
+
+    async def aparse(self, question: str) -> QueryFilter:
+        if self._expired():
+            # 실패해도 refresh_seconds 동안은 다시 시도하지 않고, 날짜 조건만으로 인식합니다.
+            self._loaded_at = time.monotonic()
+            try:
+                self._update(await _afetch_rows(VOCABULARY_QUERY, {}))
+            except Exception as e:
+                logger.warning(f"부서/게시판 목록을 불러오지 못했습니다: {e}")
+        return parse_query_filter(question, self.departments, self.boards)
+
+    def parse(self, question: str) -> QueryFilter:
+        if self._expired():
+            self._loaded_at = time.monotonic()
+            try:
+                self._update(_fetch_rows(VOCABULARY_QUERY, {}))
+            except Exception as e:
+                logger.warning(f"부서/게시판 목록을 불러오지 못했습니다: {e}")
+        return parse_query_filter(question, self.departments, self.boards)
+
+
+metadata_vocabulary = MetadataVocabulary(settings.METADATA_VOCABULARY_REFRESH_SECONDS)
+
+
+async def afetch_listing(query_filter: QueryFilter, limit: int) -> List[Dict[str, Any]]:
+    """목록 질문의 조건에 맞는 공지를 인덱스(게시일, 마감일, 부서/게시판 관계)로 조회합니다."""
+    match, parameters = query_filter.match_clause()
+    if query_filter.deadline_from or query_filter.deadline_to:
+        order = "a.deadline ASC"
+    else:
+        order = "a.posted_at IS NULL, a.posted_at DESC"
+    with span("listing_query"):
+        return await _afetch_rows(LISTING_QUERY.format(match=match, order=order), {**parameters, "limit": limit})
+
+
+class MetadataFilteredRetriever(BaseRetriever):
+    """
+    질문에서 게시일, 마감일, 작성 부서, 게시판 조건을 인식하면 조건에 맞는 공지만 Cypher로 먼저 고른 뒤,
+    그 안에서 vector.similarity.cosine으로 순위를 매기는 Retriever.
+    조건이 없거나 조건에 맞는 공지가 없으면 감싼 base_retriever로 검색합니다.
+    """
+
+    base_retriever: BaseRetriever
+    embeddings: Any
+    vocabulary: Any
+    vector_index: Any = None
+    granularity: str = "document"
+    search_k: int = 5
+    fanout: int = 1
+    max_candidates: int = 2000
+
+    def _filtered_query(self, query_filter: QueryFilter, embedding: List[float], profile=None):
+        match, parameters = query_filter.match_clause()
+        template = FILTERED_CHUNK_VECTOR_QUERY if self.granularity == "chunk" else FILTERED_DOCUMENT_VECTOR_QUERY
+        if profile is not None:
+            embedding = profile.fit(embedding)
+        return template.format(match=match, property=profile.embedding_property if profile else "embedding"), {
+            **parameters, "embedding": embedding,
+            "k": self.search_k * self.fanout, "max_candidates": self.max_candidates,
+        }
+
+    async def asearch_filtered(self, query_filter: QueryFilter, embedding: List[float]) -> List[Document]:
+        profile = await self.vector_index.aget() if self.vector_index is not None else None
+        query, parameters = self._filtered_query(query_filter, embedding, profile)
+        with span("filtered_vector_query"):
+            rows = await _afetch_rows(query, parameters)
+        return group_rows_to_documents(rows, self.search_k, self.granularity)
+
+    def search_filtered(self, query_filter: QueryFilter, embedding: List[float]) -> List[Document]:
+        profile = self.vector_index.get() if self.vector_index is not None else None
+        query, parameters = self._filtered_query(query_filter, embedding, profile)
+        with span("filtered_vector_query"):
+            rows = _fetch_rows(query, parameters)
+        return group_rows_to_documents(rows, self.search_k, self.granularity)
+
+    @staticmethod
+    def _use_filtered(query_filter: QueryFilter, documents: List[Document]) -> bool:
+        if not documents:
+            return False
+        RETRIEVAL_PATHS.labels(path="metadata_filter").inc()
+        annotate(metadata_filter=query_filter.describe())
+        return True
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_filter = await self.vocabulary.aparse(query)
+        if not query_filter.is_empty():
+            with span("embedding"):
+                embedding = await self.embeddings.aembed_query(query)
+            documents = await self.asearch_filtered(query_filter, embedding)
+            if self._use_filtered(query_filter, documents):
+                return documents
+        # 공개 API로 호출해 감싼 retriever도 콜백(추적, 검색 지표)과 래퍼를 거치게 하고, 하위 실행으로 기록합니다.
+        return await self.base_retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        query_filter = self.vocabulary.parse(query)
+        if not query_filter.is_empty():
+            with span("embedding"):
+                embedding = self.embeddings.embed_query(query)
+            documents = self.search_filtered(query_filter, embedding)
+            if self._use_filtered(query_filter, documents):
+                return documents
+        return self.base_retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+    async def abatch_search(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Document]]:
+        """조건이 있는 질문은 질문별 필터 검색을, 나머지는 감싼 retriever의 배치 검색을 실행합니다."""
+        filters = [await self.vocabulary.aparse(query) for query in queries]
+        results: List[Optional[List[Document]]] = [None] * len(queries)
+
+        filtered = [i for i, query_filter in enumerate(filters) if not query_filter.is_empty()]
+        found = await asyncio.gather(*(self.asearch_filtered(filters[i], embeddings[i]) for i in filtered))
+        for i, documents in zip(filtered, found):
+            if self._use_filtered(filters[i], documents):
+                results[i] = documents
+
+        rest = [i for i, documents in enumerate(results) if documents is None]
+        if rest:
+            if hasattr(self.base_retriever, "abatch_search"):
+                rest_documents = await self.base_retriever.abatch_search(
+                    [queries[i] for i in rest], [embeddings[i] for i in rest]
+                )
+            else:
+                rest_documents = await self.base_retriever.abatch([queries[i] for i in rest])
+            for i, documents in zip(rest, rest_documents):
+                results[i] = documents
+        return results
@@ -0,0 +1,114 @@
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
+from neo4j import RoutingControl
+
+from app.config import settings
+from app.graph import driver as graph_driver
+from app.rag.vectors import shorten_embedding
+
+logger = logging.getLogger(__name__)
+
+# 인덱스 마이그레이션 DAG(vector_index_migration)가 검증을 마친 새 인덱스로 전환할 때 한 트랜잭션에서 갱신하는 포인터
+ACTIVE_INDEX_QUERY = """
+MATCH (p:VectorIndexPointer {id: 'active'})
+RETURN p.dimensions AS dimensions, p.embedding_property AS embedding_property,
+       p.announcement_index AS announcement_index, p.chunk_index AS chunk_index
+"""
+
+
+class VectorProfile:
+    """임베딩 차원과, 그 차원의 벡터를 저장한 노드 속성 및 공지/청크 벡터 인덱스 이름."""
+
+    def __init__(self, dimensions: int, embedding_property: str, announcement_index: str, chunk_index: str):
+        self.dimensions = dimensions
+        self.embedding_property = embedding_property
+        self.announcement_index = announcement_index
+        self.chunk_index = chunk_index
+
+    def index_name(self, granularity: str) -> str:
+        return self.chunk_index if granularity == "chunk" else self.announcement_index
+
+    def fit(self, embedding: List[float]) -> List[float]:
+        """질문 임베딩을 인덱스 차원에 맞춥니다."""
+        return shorten_embedding(embedding, self.dimensions)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, VectorProfile) and vars(self) == vars(other)
+
+    def __repr__(self) -> str:
+        return f"VectorProfile({self.dimensions}, {self.embedding_property}, {self.announcement_index})"
+
+
+class FittedEmbeddings(Embeddings):
+    """임베딩을 프로필 차원으로 줄여 반환하는 래퍼. 질문 임베딩을 그대로 검색하는 Neo4jVector(langchain 백엔드)에 사용합니다."""
+
+    def __init__(self, underlying: Embeddings, profile: VectorProfile):
+        self.underlying = underlying
+        self.profile = profile
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.profile.fit(vector) for vector in self.underlying.embed_documents(texts)]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.profile.fit(self.underlying.embed_query(text))
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.profile.fit(vector) for vector in await self.underlying.aembed_documents(texts)]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return self.profile.fit(await self.underlying.aembed_query(text))
+
+
+# 포인터가 없으면(마이그레이션 전) 기존 1536차원 embedding 속성과 인덱스를 사용합니다.
+DEFAULT_PROFILE = VectorProfile(1536, "embedding", "announcement_embeddings", "chunk_embeddings")
+
+
+class ActiveVectorIndex:
+    """
+    검색에 사용할 벡터 인덱스(활성 프로필). Neo4j의 VectorIndexPointer 노드에서 읽어 refresh_seconds 동안 재사용하므로,
+    마이그레이션 DAG가 포인터를 전환하면 API를 재시작하지 않아도 다음 갱신부터 새 인덱스를 검색합니다.
+    """
+
+    def __init__(self, refresh_seconds: float = 60):
+        self.refresh_seconds = refresh_seconds
+        self.profile = DEFAULT_PROFILE
+        self._loaded_at: Optional[float] = None
+
+    def _expired(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at > self.refresh_seconds
+
+    def _update(self, rows: List[Dict[str, Any]]):
+        profile = VectorProfile(**rows[0]) if rows else DEFAULT_PROFILE
+        if profile != self.profile:
+            logger.info(f"활성 벡터 인덱스가 바뀌었습니다: {self.profile} -> {profile}")
+            self.profile = profile
+
+    async def aget(self) -> VectorProfile:
+        if self._expired():
+            # 실패해도 refresh_seconds 동안은 다시 시도하지 않고, 마지막으로 읽은 프로필을 사용합니다.
+            self._loaded_at = time.monotonic()
+            try:
+                driver = graph_driver.get_async_neo4j_driver()
+                records, _, _ = await driver.execute_query(ACTIVE_INDEX_QUERY, routing_=RoutingControl.READ)
+                self._update([record.data() for record in records])
+            except Exception as e:
+                logger.warning(f"활성 벡터 인덱스 포인터를 읽지 못했습니다: {e}")
+        return self.profile
+
+    def get(self) -> VectorProfile:
+        if self._expired():
+            self._loaded_at = time.monotonic()
+            try:
+                records, _, _ = graph_driver.get_neo4j_driver().execute_query(
+                    ACTIVE_INDEX_QUERY, routing_=RoutingControl.READ
+                )
+                self._update([record.data() for record in records])
+            except Exception as e:
+                logger.warning(f"활성 벡터 인덱스 포인터를 읽지 못했습니다: {e}")
+        return self.profile
+
+
+active_vector_index = ActiveVectorIndex(settings.VECTOR_INDEX_REFRESH_SECONDS)
@@ -0,0 +1,263 @@
+import fcntl
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.config import settings
+from app.graph import driver as graph_driver
+from app.graph.retriever import group_rows_to_documents
+from app.graph.vector_index import DEFAULT_PROFILE, active_vector_index
+from app.monitoring.tracing import span
+from app.rag.vectors import shorten_embedding
+
+logger = logging.getLogger(__name__)
+
+# createdAt 이후 변경된 공지(와 그 청크)의 임베딩을 가져오는 쿼리. {property}는 활성 인덱스의 임베딩 속성입니다.
+DOCUMENT_SYNC_QUERY = """
+MATCH (a:Announcement)
+WHERE a.createdAt > datetime({{epochMillis: $since}})
+RETURN a.url AS url, a.title AS title, a.full_text AS text, 0 AS chunk_index,
+       a.{property} AS embedding, a.createdAt.epochMillis AS created
+"""
+
+CHUNK_SYNC_QUERY = """
+MATCH (a:Announcement)
+WHERE a.createdAt > datetime({{epochMillis: $since}})
+OPTIONAL MATCH (c:Chunk)-[:PART_OF]->(a)
+RETURN a.url AS url, a.title AS title, c.text AS text, c.index AS chunk_index,
+       c.{property} AS embedding, a.createdAt.epochMillis AS created
+"""
+
+
+# Neo4j에서 삭제된 공지를 미러에서도 지우기 위해 동기화마다 현재 공지 url 목록과 대조합니다.
+URL_SET_QUERY = "MATCH (a:Announcement) RETURN a.url AS url"
+
+
+class VectorIndexMirror:
+    """
+    Neo4j에 저장된 임베딩을 로컬 float32 행렬 파일로 복제하여, 메모리 매핑(np.memmap)으로 검색하는 인메모리 인덱스.
+    같은 디렉터리를 사용하는 모든 uvicorn 워커가 하나의 파일을 공유하며(OS 페이지 캐시),
+    동기화는 createdAt 기준으로 변경된 공지만 가져오고 Neo4j에서 삭제된 공지는 빼서 새 파일을 만든 뒤 원자적으로 교체합니다.
+    이전 세대의 행렬 파일은 한 번 더 동기화할 때까지 남겨 두어, 교체 직전의 메타를 읽은 워커도 매핑할 수 있게 합니다.
+    활성 벡터 인덱스(임베딩 속성과 차원)가 바뀌면 다음 동기화에서 전체를 새 속성으로 다시 복제합니다.
+    """
+
+    def __init__(self, directory: str, granularity: str = "document", vector_index=None):
+        self.directory = directory
+        self.granularity = granularity
+        self.vector_index = vector_index
+        self.meta_path = os.path.join(directory, f"{granularity}_meta.json")
+        self.lock_path = os.path.join(directory, f"{granularity}.lock")
+        os.makedirs(directory, exist_ok=True)
+
+        self._reload_lock = threading.Lock()
+        self._loaded_version: Optional[int] = None
+        self._meta_mtime: Optional[float] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._rows: List[Dict[str, Any]] = []
+
+    def _read_meta(self) -> Optional[dict]:
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _ensure_loaded(self):
+        """다른 워커가 동기화하여 메타 파일이 바뀌었으면 새 행렬 파일을 다시 매핑합니다."""
+        try:
+            mtime = os.stat(self.meta_path).st_mtime
+        except FileNotFoundError:
+            return
+        if mtime == self._meta_mtime:
+            return
+
+        with self._reload_lock:
+            for attempt in range(2):
+                meta = self._read_meta()
+                if meta is None or meta["version"] == self._loaded_version:
+                    self._meta_mtime = mtime
+                    return
+                rows = meta["rows"]
+                try:
+                    matrix = np.memmap(os.path.join(self.directory, meta["vectors_file"]), dtype=np.float32,
+                                       mode="r", shape=(len(rows), meta["dimensions"])) if rows else None
+                    break
+                except FileNotFoundError:
+                    # 메타를 읽은 사이에 동기화가 두 번 일어나 파일이 지워졌으면, 새 메타를 한 번 더 읽습니다.
+                    if attempt:
+                        raise
+            self._matrix = matrix
+            self._rows = rows
+            self._loaded_version = meta["version"]
+            self._meta_mtime = mtime
+            logger.info(f"벡터 미러(v{meta['version']}, {len(rows)}행)를 불러왔습니다.")
+
+    def __len__(self) -> int:
+        self._ensure_loaded()
+        return len(self._rows)
+
+    def sync(self) -> int:
+        """
+        Neo4j에서 마지막 동기화 이후 변경된 공지를 가져오고 삭제된 공지를 빼서 미러를 갱신하고, 갱신된 공지 수를 반환합니다.
+        여러 워커가 동시에 호출해도 파일 잠금으로 한 워커만 동기화합니다.
+        """
+        with open(self.lock_path, "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+            try:
+                return self._sync_locked()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _sync_locked(self) -> int:
+        meta = self._read_meta()
+        profile = self.vector_index.get() if self.vector_index is not None else DEFAULT_PROFILE
+        # 기존 미러가 다른 임베딩 속성(차원)으로 만들어졌으면 기존 행을 버리고 처음부터 다시 복제합니다.
+        rebuild = meta is not None and meta.get("embedding_property", "embedding") != profile.embedding_property
+        if rebuild:
+            logger.info(f"활성 벡터 인덱스가 바뀌어 벡터 미러를 다시 만듭니다: {profile}")
+        since = meta["synced_until"] if meta and not rebuild else 0
+        query = CHUNK_SYNC_QUERY if self.granularity == "chunk" else DOCUMENT_SYNC_QUERY
+        driver = graph_driver.get_neo4j_driver()
+        records, _, _ = driver.execute_query(
+            query.format(property=profile.embedding_property), {"since": since}
+        )
+        incremental = bool(meta and meta["rows"] and not rebuild)
+        deleted_urls = set()
+        if incremental:
+            url_records, _, _ = driver.execute_query(URL_SET_QUERY)
+            deleted_urls = {row["url"] for row in meta["rows"]} - {record["url"] for record in url_records}
+        if not records and not deleted_urls:
+            return 0
+
+        changed_urls = {record["url"] for record in records}
+        new_rows = [record.data() for record in records if record["embedding"] is not None]
+
+        # 변경되거나 삭제된 공지의 기존 행은 버리고, 나머지 행은 기존 행렬에서 그대로 복사합니다.
+        kept_rows, kept_vectors = [], None
+        if incremental:
+            old_matrix = np.memmap(os.path.join(self.directory, meta["vectors_file"]), dtype=np.float32,
+                                   mode="r", shape=(len(meta["rows"]), meta["dimensions"]))
+            keep = [i for i, row in enumerate(meta["rows"]) if row["url"] not in changed_urls | deleted_urls]
+            kept_rows = [meta["rows"][i] for i in keep]
+            kept_vectors = np.asarray(old_matrix[keep])
+
+        vectors = [kept_vectors] if kept_vectors is not None and len(kept_vectors) else []
+        if new_rows:
+            new_vectors = np.asarray([row.pop("embedding") for row in new_rows], dtype=np.float32)
+            norms = np.linalg.norm(new_vectors, axis=1, keepdims=True)
+            vectors.append(new_vectors / np.where(norms == 0, 1, norms))
+        matrix = np.vstack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+        rows = [
+            {"url": row["url"], "title": row["title"], "text": row["text"], "chunk_index": row["chunk_index"]}
+            for row in kept_rows + new_rows
+        ]
+        version = (meta["version"] if meta else 0) + 1
+        vectors_file = f"{self.granularity}_vectors_{version}.f32"
+        matrix.tofile(os.path.join(self.directory, vectors_file))
+
+        new_meta = {
+            "version": version,
+            "vectors_file": vectors_file,
+            "previous_vectors_file": meta["vectors_file"] if meta else None,
+            "dimensions": int(matrix.shape[1]) if matrix.size else 0,
+            "embedding_property": profile.embedding_property,
+            "synced_until": max([since] + [record["created"] for record in records]),
+            "rows": rows,
+        }
+        tmp_path = f"{self.meta_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(new_meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+
+        # 두 세대 전의 행렬 파일을 지웁니다. 직전 세대는 방금 전 메타를 읽은 워커가 매핑할 수 있도록 남겨 둡니다.
+        # (이미 매핑한 워커는 파일이 지워져도 다시 불러올 때까지 그대로 읽을 수 있습니다)
+        stale_file = meta.get("previous_vectors_file") if meta else None
+        if stale_file and stale_file not in (vectors_file, new_meta["previous_vectors_file"]):
+            try:
+                os.remove(os.path.join(self.directory, stale_file))
+            except FileNotFoundError:
+                pass
+
+        logger.info(f"벡터 미러 동기화 완료: 변경된 공지 {len(changed_urls)}건, 삭제된 공지 {len(deleted_urls)}건, "
+                    f"전체 {len(rows)}행 (v{version})")
+        return len(changed_urls | deleted_urls)
+
+    def search(self, embedding: List[float], top_n: int) -> List[Dict[str, Any]]:
+        """코사인 유사도 상위 top_n개 행을 반환합니다. 점수는 Neo4j 벡터 인덱스와 같은 (1 + cos) / 2 척도입니다."""
+        self._ensure_loaded()
+        matrix = self._matrix
+        if matrix is None or not len(self._rows):
+            return []
+
+        # 질문 임베딩이 미러 차원보다 길면(인덱스 전환 직후 등) 앞부분만 남겨 정규화합니다.
+        if len(embedding) != matrix.shape[1]:
+            embedding = shorten_embedding(embedding, matrix.shape[1])
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        scores = matrix @ query
+        top_n = min(top_n, len(scores))
+        if top_n <= 0:
+            return []
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top])]
+        return [{**self._rows[i], "score": float((1.0 + scores[i]) / 2.0)} for i in top]
+
+
+class MirrorVectorRetriever(BaseRetriever):
+    """VectorIndexMirror를 사용하여 Neo4j 왕복 없이 프로세스 안에서 벡터 검색을 수행하는 Retriever."""
+
+    embeddings: Any
+    mirror: Any
+    granularity: str = "document"
+    search_k: int = 5
+    fanout: int = 1
+
+    def _documents(self, embedding: List[float]) -> List[Document]:
+        with span("vector_query"):
+            rows = self.mirror.search(embedding, self.search_k * self.fanout)
+        return group_rows_to_documents(rows, self.search_k, self.granularity)
+
+    async def abatch_search(self, queries: List[str], embeddings: List[List[float]]) -> List[List[Document]]:
+        """미리 계산한 질문 임베딩들로 검색합니다. 로컬 행렬 검색이라 질문별로 바로 실행합니다."""
+        return [self._documents(embedding) for embedding in embeddings]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with span("embedding"):
+            embedding = await self.embeddings.aembed_query(query)
+        return self._documents(embedding)
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        with span("embedding"):
+            embedding = self.embeddings.embed_query(query)
+        return self._documents(embedding)
+
+
+_vector_mirror: Optional[VectorIndexMirror] = None
+
+
+def get_vector_mirror() -> VectorIndexMirror:
+    """설정된 디렉터리와 검색 단위로 프로세스당 하나의 미러를 반환합니다."""
+    global _vector_mirror
+    if _vector_mirror is None:
+        _vector_mirror = VectorIndexMirror(settings.VECTOR_MIRROR_DIR, settings.RETRIEVER_GRANULARITY,
+                                           vector_index=active_vector_index)
+    return _vector_mirror
@@ -0,0 +1,102 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+from app.config import settings
+from app.monitoring.metrics import ADMISSION_ACTIVE, ADMISSION_REJECTED, ADMISSION_WAITING
+
+
+class Overloaded(Exception):
+    """처리 중인 요청과 대기열이 모두 찬 경우. API는 Retry-After 헤더와 함께 503으로 응답합니다."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionTicket:
+    """입장한 요청 하나. release는 여러 번 호출해도 슬롯을 한 번만 반납합니다."""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """
+    /chat 앞단의 입장 제어. 동시에 max_concurrent개까지 처리하고, 나머지는 max_queue개까지 대기열에서 기다립니다.
+    대기열이 가득 찼거나 queue_timeout 안에 차례가 오지 않으면 바로 Overloaded를 발생시켜,
+    요청이 끝없이 쌓여 모든 요청의 지연 시간이 늘어나는 대신 일부 요청을 빠르게 거절합니다.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    def _reject(self, reason: str):
+        self.rejected[reason] += 1
+        ADMISSION_REJECTED.labels(reason=reason).inc()
+        raise Overloaded(reason, retry_after=max(1, round(self.queue_timeout)))
+
+    async def acquire(self) -> AdmissionTicket:
+        # 빈 슬롯이 있으면 기다리지 않고 바로 입장합니다. (locked가 아니면 acquire는 양보 없이 끝납니다)
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()
+        else:
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            self.waiting += 1
+            ADMISSION_WAITING.set(self.waiting)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._reject("timeout")
+            finally:
+                self.waiting -= 1
+                ADMISSION_WAITING.set(self.waiting)
+
+        self.active += 1
+        self.admitted += 1
+        ADMISSION_ACTIVE.set(self.active)
+        return AdmissionTicket(self)
+
+    def _release(self):
+        self.active -= 1
+        ADMISSION_ACTIVE.set(self.active)
+        self._semaphore.release()
+
+    @asynccontextmanager
+    async def admit(self):
+        ticket = await self.acquire()
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+
+chat_admission = AdmissionController(
+    max_concurrent=settings.CHAT_MAX_CONCURRENT,
+    max_queue=settings.CHAT_MAX_QUEUE,
+    queue_timeout=settings.CHAT_QUEUE_TIMEOUT_SECONDS
+)
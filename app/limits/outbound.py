@@ -0,0 +1,285 @@
+import asyncio
+import json
+import logging
+import math
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Tuple
+
+import httpx
+
+from app.config import settings
+from app.monitoring.metrics import OUTBOUND_RATE_LIMITED, OUTBOUND_WAIT
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "background")
+# 요청 본문으로 토큰 수를 추정할 때 쓰는 토큰당 글자 수 (한국어 기준으로 보수적으로 잡은 값)
+APPROX_CHARS_PER_TOKEN = 1.5
+# max_tokens가 없는 채팅 요청의 답변 토큰 추정치
+DEFAULT_COMPLETION_TOKENS = 512
+
+_priority: ContextVar[Optional[str]] = ContextVar("outbound_priority", default=None)
+
+
+@contextmanager
+def outbound_priority(priority: str):
+    """블록 안에서 보내는 OpenAI 요청의 우선순위를 지정합니다. (예: 평가 작업은 'background')"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class OutboundRateLimitTimeout(httpx.TimeoutException):
+    """OpenAI 요청 한도(RPM/TPM)가 풀리기를 max_wait초 넘게 기다려야 해서 요청을 보내지 않았을 때 발생합니다."""
+
+
+class OutboundRateLimiter:
+    """
+    프로세스 안의 모든 OpenAI 요청이 공유하는 분당 요청 수(RPM)/토큰 수(TPM) 토큰 버킷.
+    background 요청은 버킷의 background_share 비율까지만 쓸 수 있고 interactive 요청이 기다리는 동안에는 양보하므로,
+    평가 작업이 돌고 있어도 채팅 요청이 먼저 처리됩니다. 429 응답을 받으면 pause로 모든 요청을 잠시 멈춥니다.
+    버킷은 프로세스마다 따로 있으므로 여러 워커로 실행하면 workers로 한도를 나눠 각 워커가 자기 몫만 씁니다.
+    (워커 사이에 남는 몫을 빌려 쓰지는 않으며, 다른 프로세스(공지 수집 DAG 등)의 요청은 반영하지 못합니다)
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float, background_share: float = 0.5,
+                 workers: int = 1):
+        self.background_share = background_share
+        requests_per_minute /= workers
+        tokens_per_minute /= workers
+        # [용량, 현재 잔량, 초당 충전량]. 용량이 0이면 해당 한도를 적용하지 않습니다.
+        self._buckets = {
+            "requests": [requests_per_minute, requests_per_minute, requests_per_minute / 60.0],
+            "tokens": [tokens_per_minute, tokens_per_minute, tokens_per_minute / 60.0],
+        }
+        self._lock = threading.Lock()
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = {priority: 0 for priority in PRIORITIES}
+        self.acquired = {priority: 0 for priority in PRIORITIES}
+        self.rate_limited = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        for bucket in self._buckets.values():
+            bucket[1] = min(bucket[0], bucket[1] + elapsed * bucket[2])
+
+    def _try_acquire(self, priority: str, tokens: int) -> float:
+        """버킷에서 요청 1개와 tokens만큼을 꺼냅니다. 꺼냈으면 0, 아니면 다시 시도할 때까지 기다릴 시간(초)."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if priority != "interactive" and self._waiting["interactive"]:
+                return 0.05
+
+            reserve_ratio = 0.0 if priority == "interactive" else 1.0 - self.background_share
+            needs = {"requests": 1, "tokens": tokens}
+            wait = 0.0
+            for name, (capacity, level, rate) in self._buckets.items():
+                if not capacity:
+                    continue
+                # 한 요청이 버킷 용량보다 크면 가득 찬 버킷 하나로 보냅니다.
+                need = min(needs[name], capacity * (1.0 - reserve_ratio))
+                shortfall = need + capacity * reserve_ratio - level
+                if shortfall > 0:
+                    wait = max(wait, shortfall / rate)
+            if wait > 0:
+                return max(wait, 0.01)
+
+            for name, bucket in self._buckets.items():
+                if bucket[0]:
+                    bucket[1] -= min(needs[name], bucket[0] * (1.0 - reserve_ratio))
+            self.acquired[priority] += 1
+            return 0.0
+
+    async def acquire(self, priority: str, tokens: int, max_wait: float):
+        start = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(priority, tokens)
+                if wait == 0:
+                    break
+                if time.monotonic() - start + wait > max_wait:
+                    raise OutboundRateLimitTimeout(f"OpenAI 요청 한도 대기 시간({max_wait}초)을 초과했습니다.")
+                await asyncio.sleep(min(wait, 0.5))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+        OUTBOUND_WAIT.labels(priority=priority).observe(time.monotonic() - start)
+
+    def acquire_sync(self, priority: str, tokens: int, max_wait: float):
+        start = time.monotonic()
+        with self._lock:
+            self._waiting[priority] += 1
+        try:
+            while True:
+                wait = self._try_acquire(priority, tokens)
+                if wait == 0:
+                    break
+                if time.monotonic() - start + wait > max_wait:
+                    raise OutboundRateLimitTimeout(f"OpenAI 요청 한도 대기 시간({max_wait}초)을 초과했습니다.")
+                time.sleep(min(wait, 0.5))
+        finally:
+            with self._lock:
+                self._waiting[priority] -= 1
+        OUTBOUND_WAIT.labels(priority=priority).observe(time.monotonic() - start)
+
+    def pause(self, seconds: float):
+        """429 응답을 받았을 때 모든 요청을 seconds 동안 멈춥니다."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self.rate_limited += 1
+        OUTBOUND_RATE_LIMITED.inc()
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._refill(time.monotonic())
+            return {
+                "requests_available": round(self._buckets["requests"][1], 1),
+                "tokens_available": round(self._buckets["tokens"][1]),
+                "waiting": dict(self._waiting),
+                "acquired": dict(self.acquired),
+                "rate_limited": self.rate_limited,
+            }
+
+
+def estimate_request_tokens(request: httpx.Request) -> int:
+    """요청 본문(JSON)의 메시지/입력 길이와 max_tokens로 TPM 한도에 잡힐 토큰 수를 추정합니다."""
+    try:
+        body = json.loads(request.content or b"{}")
+    except (ValueError, httpx.RequestNotRead):
+        return DEFAULT_COMPLETION_TOKENS
+    if not isinstance(body, dict):
+        return DEFAULT_COMPLETION_TOKENS
+
+    chars = 0
+    for message in body.get("messages") or []:
+        content = message.get("content")
+        if isinstance(content, str):
+            chars += len(content)
+        elif isinstance(content, list):
+            chars += sum(len(part.get("text", "")) for part in content if isinstance(part, dict))
+
+    inputs = body.get("input")
+    token_count = 0
+    if isinstance(inputs, str):
+        chars += len(inputs)
+    elif isinstance(inputs, list):
+        for item in inputs:
+            if isinstance(item, str):
+                chars += len(item)
+            elif isinstance(item, list):
+                token_count += len(item)
+            elif isinstance(item, int):
+                token_count += 1
+
+    tokens = token_count + math.ceil(chars / APPROX_CHARS_PER_TOKEN)
+    if "messages" in body:
+        tokens += body.get("max_completion_tokens") or body.get("max_tokens") or DEFAULT_COMPLETION_TOKENS
+    return max(tokens, 1)
+
+
+def _max_wait(request: httpx.Request) -> float:
+    # OpenAI 클라이언트에 설정된 타임아웃보다 오래 한도를 기다리지 않습니다.
+    pool_timeout = (request.extensions.get("timeout") or {}).get("pool")
+    if pool_timeout is None:
+        return settings.OPENAI_LIMITER_MAX_WAIT_SECONDS
+    return min(pool_timeout, settings.OPENAI_LIMITER_MAX_WAIT_SECONDS)
+
+
+def _retry_delay(response: httpx.Response, attempt: int) -> float:
+    """Retry-After 헤더가 있으면 따르고, 없으면 지수 백오프에 지터를 더한 시간만큼 기다립니다."""
+    base = settings.OPENAI_RATE_LIMIT_BASE_DELAY
+    delay = base * (2 ** attempt)
+    try:
+        if "retry-after-ms" in response.headers:
+            delay = float(response.headers["retry-after-ms"]) / 1000
+        elif "retry-after" in response.headers:
+            delay = float(response.headers["retry-after"])
+    except ValueError:
+        pass
+    return delay + random.uniform(0, base)
+
+
+class RateLimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """OpenAI 비동기 요청마다 공유 한도를 기다리고, 429 응답은 지터를 더한 백오프 후 다시 보내는 transport."""
+
+    def __init__(self, limiter: OutboundRateLimiter, priority: str, max_retries: int):
+        self.limiter = limiter
+        self.priority = priority
+        self.max_retries = max_retries
+        self._transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        priority = _priority.get() or self.priority
+        tokens = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(priority, tokens, _max_wait(request))
+            response = await self._transport.handle_async_request(request)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            await response.aclose()
+            delay = _retry_delay(response, attempt)
+            logger.warning(f"OpenAI 요청 한도 초과(429), {delay:.1f}초 후 재시도합니다 ({attempt + 1}/{self.max_retries})")
+            self.limiter.pause(delay)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """RateLimitedAsyncTransport의 동기 버전. 스레드에서 실행되는 동기 OpenAI 호출에 사용합니다."""
+
+    def __init__(self, limiter: OutboundRateLimiter, priority: str, max_retries: int):
+        self.limiter = limiter
+        self.priority = priority
+        self.max_retries = max_retries
+        self._transport = httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        priority = _priority.get() or self.priority
+        tokens = estimate_request_tokens(request)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire_sync(priority, tokens, _max_wait(request))
+            response = self._transport.handle_request(request)
+            if response.status_code != 429 or attempt == self.max_retries:
+                return response
+            response.close()
+            delay = _retry_delay(response, attempt)
+            logger.warning(f"OpenAI 요청 한도 초과(429), {delay:.1f}초 후 재시도합니다 ({attempt + 1}/{self.max_retries})")
+            self.limiter.pause(delay)
+
+    def close(self):
+        self._transport.close()
+
+
+outbound_limiter = OutboundRateLimiter(
+    requests_per_minute=settings.OPENAI_RPM_LIMIT,
+    tokens_per_minute=settings.OPENAI_TPM_LIMIT,
+    background_share=settings.OPENAI_BACKGROUND_SHARE,
+    workers=settings.OPENAI_LIMIT_WORKERS
+)
+
+
+def create_http_clients(priority: str = "interactive") -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """
+    공유 한도를 적용하는 (동기, 비동기) httpx 클라이언트를 만듭니다.
+    ChatOpenAI/OpenAIEmbeddings의 http_client, http_async_client로 넘겨 사용합니다.
+    429 응답은 transport가 이미 다시 보내므로, 재시도가 겹치지 않도록 클라이언트는 max_retries=0으로 만듭니다.
+    """
+    max_retries = settings.OPENAI_RATE_LIMIT_MAX_RETRIES
+    return (
+        httpx.Client(transport=RateLimitedTransport(outbound_limiter, priority, max_retries)),
+        httpx.AsyncClient(transport=RateLimitedAsyncTransport(outbound_limiter, priority, max_retries)),
+    )
@@ -0,0 +1,98 @@
+import os
+from typing import Dict, Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import disable_created_metrics, multiprocess
+
+# 지연 시간(초) 히스토그램의 기본 버킷
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# 카운터마다 붙는 *_created 시계열은 사용하지 않으므로 노출하지 않습니다.
+disable_created_metrics()
+
+
+def _collecting_registry():
+    # 여러 워커로 실행하면(PROMETHEUS_MULTIPROC_DIR 설정) 모든 워커가 기록한 값을 합쳐서 읽습니다.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+
+def render_metrics() -> tuple:
+    """
+    Prometheus 텍스트 형식의 메트릭과 Content-Type을 반환합니다.
+    어느 워커가 스크레이프 요청을 받아도 모든 워커를 합친 같은 값이 나옵니다.
+    """
+    return generate_latest(_collecting_registry()), CONTENT_TYPE_LATEST
+
+
+def metric_totals(sample_name: str, label_name: Optional[str] = None) -> Dict[str, float]:
+    """샘플 이름이 sample_name인 값을 label_name 레이블 값별로(레이블이 없으면 '' 하나로) 모든 워커에 걸쳐 합칩니다."""
+    totals: Dict[str, float] = {}
+    for metric in _collecting_registry().collect():
+        for sample in metric.samples:
+            if sample.name == sample_name:
+                key = sample.labels.get(label_name, "") if label_name else ""
+                totals[key] = totals.get(key, 0.0) + sample.value
+    return totals
+
+
+def mark_worker_dead(pid: int):
+    """종료하는 워커의 livesum 게이지 값을 집계에서 제외합니다."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(pid)
+
+
+HTTP_REQUESTS = Counter(
+    "chatbot_http_requests_total", "처리된 HTTP 요청 수", ("method", "route", "status"))
+HTTP_REQUEST_DURATION = Histogram(
+    "chatbot_http_request_duration_seconds", "HTTP 요청 처리 시간(응답 본문 전송 완료까지)", ("method", "route"),
+    buckets=DEFAULT_BUCKETS)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "chatbot_http_requests_in_flight", "처리 중인 HTTP 요청 수", multiprocess_mode="livesum")
+
+RAG_STAGE_DURATION = Histogram(
+    "chatbot_rag_stage_duration_seconds",
+    "RAG 단계별 소요 시간 (embedding, vector_query, fulltext_query, retrieval, format_documents, prompt, "
+    "llm, llm_first_token, cache_lookup, context_packing, filtered_vector_query, listing_query)",
+    ("stage",), buckets=DEFAULT_BUCKETS)
+LLM_TOKENS = Counter(
+    "chatbot_llm_tokens_total", "LLM 프롬프트/생성 토큰 수", ("type",))
+RETRIEVED_DOCUMENTS = Histogram(
+    "chatbot_retrieved_documents", "요청당 검색된 문서 수", buckets=(0, 1, 2, 3, 5, 8, 13, 21))
+RETRIEVAL_PATHS = Counter(
+    "chatbot_hybrid_retrieval_total", "검색 경로별 요청 수 (lexical_fast_path, fused, metadata_filter)", ("path",))
+SINGLE_FLIGHT_EXECUTIONS = Counter(
+    "chatbot_single_flight_executions_total", "동일 질문 합치기 후 실제로 실행된 체인 수", ("mode",))
+COALESCED_REQUESTS = Counter(
+    "chatbot_coalesced_requests_total", "진행 중인 같은 질문의 실행에 합쳐진 요청 수", ("mode",))
+CONTEXT_TOKENS = Counter(
+    "chatbot_context_tokens_total", "컨텍스트 구성 전(retrieved)/후(packed) 문서 토큰 수", ("stage",))
+CONTEXT_DOCUMENTS_DROPPED = Counter(
+    "chatbot_context_documents_dropped_total",
+    "컨텍스트 구성에서 제외된 문서 수 (duplicate, near_duplicate, low_score, budget)", ("reason",))
+LLM_TIER_ROUTED = Counter(
+    "chatbot_llm_tier_routed_total", "라우터가 답변 생성 모델 티어(fast, strong)로 보낸 요청 수", ("tier",))
+LLM_TIER_REQUESTS = Counter(
+    "chatbot_llm_tier_requests_total", "티어별 모델 호출 결과 수 (success, error, timeout)", ("tier", "outcome"))
+LLM_TIER_DURATION = Histogram(
+    "chatbot_llm_tier_duration_seconds", "티어별 모델 호출 시간", ("tier",), buckets=DEFAULT_BUCKETS)
+OUTBOUND_WAIT = Histogram(
+    "chatbot_openai_limiter_wait_seconds", "OpenAI 요청 한도(RPM/TPM)를 기다린 시간 (interactive, background)",
+    ("priority",), buckets=DEFAULT_BUCKETS)
+OUTBOUND_RATE_LIMITED = Counter(
+    "chatbot_openai_rate_limited_total", "OpenAI에서 받은 429(요청 한도 초과) 응답 수")
+ADMISSION_REJECTED = Counter(
+    "chatbot_admission_rejected_total", "입장 제어로 503 응답한 채팅 요청 수 (queue_full, timeout)", ("reason",))
+ADMISSION_ACTIVE = Gauge(
+    "chatbot_admission_active", "입장 제어를 통과해 처리 중인 채팅 요청 수", multiprocess_mode="livesum")
+ADMISSION_WAITING = Gauge(
+    "chatbot_admission_waiting", "입장 제어 대기열에서 기다리는 채팅 요청 수", multiprocess_mode="livesum")
+ANSWER_CACHE_LOOKUPS = Counter(
+    "chatbot_answer_cache_lookups_total", "답변 캐시 조회 결과별 횟수 (exact_hit, semantic_hit, miss)", ("result",))
+ANSWER_CACHE_ENTRIES = Gauge(
+    "chatbot_answer_cache_entries", "답변 캐시 항목 수 (워커 합계)", multiprocess_mode="livesum")
+EMBEDDING_CACHE_LOOKUPS = Counter(
+    "chatbot_embedding_cache_lookups_total", "임베딩 캐시 조회 결과별 횟수 (memory_hit, disk_hit, miss)", ("result",))
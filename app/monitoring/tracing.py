@@ -0,0 +1,208 @@
+import json
+import logging
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackHandler
+
+from app.config import settings
+from app.monitoring.metrics import (
+    HTTP_REQUESTS, HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT, LLM_TOKENS, RAG_STAGE_DURATION,
+    RETRIEVED_DOCUMENTS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTrace:
+    """요청 하나의 단계별 소요 시간(span), 토큰 수, 부가 정보를 모으는 추적 객체."""
+
+    def __init__(self, method: str, path: str):
+        self.request_id = uuid.uuid4().hex[:16]
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.spans: List[Dict[str, Any]] = []
+        self.tokens = {"prompt": 0, "completion": 0}
+        self.attributes: Dict[str, Any] = {}
+
+    def add_span(self, stage: str, start: float, duration: float):
+        self.spans.append({
+            "stage": stage,
+            "start_ms": round((start - self.started) * 1000, 1),
+            "duration_ms": round(duration * 1000, 1),
+        })
+
+    def to_dict(self, status: int, duration: float) -> dict:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "duration_ms": round(duration * 1000, 1),
+            "spans": self.spans,
+            "tokens": self.tokens,
+            **self.attributes,
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("current_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+def annotate(**attributes: Any):
+    """현재 요청의 추적 로그에 부가 정보(예: 캐시 적중 여부)를 추가합니다."""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.attributes.update(attributes)
+
+
+def record_stage(stage: str, start: float, duration: float):
+    RAG_STAGE_DURATION.labels(stage=stage).observe(duration)
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.add_span(stage, start, duration)
+
+
+@contextmanager
+def span(stage: str):
+    """블록 실행 시간을 RAG 단계 히스토그램과 현재 요청의 추적 로그에 기록합니다."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, start, time.perf_counter() - start)
+
+
+class MetricsCallbackHandler(AsyncCallbackHandler):
+    """
+    체인 실행 콜백으로 검색, 문서 포맷팅, 프롬프트 구성, LLM 생성(첫 토큰 포함) 시간과 토큰 수를 기록합니다.
+    토큰 수는 응답의 usage_metadata(스트리밍은 stream_usage=True 필요) 또는 llm_output의 token_usage에서 읽습니다.
+    """
+
+    def __init__(self):
+        self._starts: Dict[Any, tuple] = {}
+        self._first_token_seen = set()
+
+    def _start(self, stage: str, run_id):
+        self._starts[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id):
+        entry = self._starts.pop(run_id, None)
+        if entry is not None:
+            stage, start = entry
+            record_stage(stage, start, time.perf_counter() - start)
+
+    async def on_retriever_start(self, serialized, query, *, run_id, parent_run_id=None, **kwargs):
+        # 다른 retriever가 감싼 retriever(메타데이터 필터 → 기본 검색)는 바깥 retriever의 검색 시간에 포함되므로 따로 기록하지 않습니다.
+        parent = self._starts.get(parent_run_id)
+        if parent is not None and parent[0] == "retrieval":
+            return
+        self._start("retrieval", run_id)
+
+    async def on_retriever_end(self, documents, *, run_id, **kwargs):
+        if run_id in self._starts:
+            RETRIEVED_DOCUMENTS.observe(len(documents))
+        self._end(run_id)
+
+    async def on_retriever_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    async def on_chain_start(self, serialized, inputs, *, run_id, **kwargs):
+        # create_stuff_documents_chain 내부의 문서 포맷팅 단계와 프롬프트 템플릿만 측정합니다.
+        if kwargs.get("name") == "format_inputs":
+            self._start("format_documents", run_id)
+        elif kwargs.get("run_type") == "prompt":
+            self._start("prompt", run_id)
+
+    async def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    async def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start("llm", run_id)
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        entry = self._starts.get(run_id)
+        if entry is not None and run_id not in self._first_token_seen:
+            self._first_token_seen.add(run_id)
+            record_stage("llm_first_token", entry[1], time.perf_counter() - entry[1])
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._first_token_seen.discard(run_id)
+        self._end(run_id)
+
+        prompt_tokens, completion_tokens = 0, 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+                if usage:
+                    prompt_tokens += usage.get("input_tokens", 0)
+                    completion_tokens += usage.get("output_tokens", 0)
+        if not prompt_tokens and not completion_tokens:
+            token_usage = (response.llm_output or {}).get("token_usage") or {}
+            prompt_tokens = token_usage.get("prompt_tokens", 0)
+            completion_tokens = token_usage.get("completion_tokens", 0)
+
+        LLM_TOKENS.labels(type="prompt").inc(prompt_tokens)
+        LLM_TOKENS.labels(type="completion").inc(completion_tokens)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.tokens["prompt"] += prompt_tokens
+            trace.tokens["completion"] += completion_tokens
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._first_token_seen.discard(run_id)
+        self._end(run_id)
+
+
+metrics_callback = MetricsCallbackHandler()
+
+
+class MetricsMiddleware:
+    """
+    요청 수, 처리 시간, 처리 중 요청 수를 기록하는 ASGI 미들웨어.
+    스트리밍 응답도 본문 전송이 끝날 때까지를 처리 시간으로 측정하며,
+    SLOW_REQUEST_THRESHOLD_SECONDS를 넘긴 요청은 단계별 추적 정보를 구조화된 로그(JSON)로 남깁니다.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace(scope["method"], scope["path"])
+        token = _current_trace.set(trace)
+        status = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - trace.started
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # 경로 파라미터가 있는 라우트가 없으므로 매칭된 요청은 경로를 그대로 쓰고,
+            # 매칭되지 않은 요청(404 등)은 레이블 수가 늘어나지 않도록 하나로 묶습니다.
+            route = scope["path"] if scope.get("route") is not None else "unmatched"
+            HTTP_REQUESTS.labels(method=scope["method"], route=route, status=str(status)).inc()
+            HTTP_REQUEST_DURATION.labels(method=scope["method"], route=route).observe(duration)
+            if duration >= settings.SLOW_REQUEST_THRESHOLD_SECONDS:
+                logger.warning(f"느린 요청: {json.dumps(trace.to_dict(status, duration), ensure_ascii=False)}")
+            _current_trace.reset(token)
@@ -0,0 +1,282 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from app.monitoring.metrics import ANSWER_CACHE_ENTRIES, ANSWER_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_question(question: str) -> str:
+    """공백/대소문자/끝 문장부호 차이를 무시하도록 질문을 정규화합니다."""
+    text = re.sub(r"\s+", " ", question).strip().lower()
+    return text.rstrip("?!.~ ")
+
+
+def extract_numbers(question: str) -> Tuple[str, ...]:
+    """
+    질문에 들어 있는 숫자(학기, 연도, 날짜, 차수 등)를 순서와 앞자리 0에 관계없이 비교할 수 있는 형태로 추출합니다.
+    "1학기 등록금 납부 기간"과 "2학기 등록금 납부 기간"처럼 숫자만 다른 질문은 임베딩이 매우 비슷하므로,
+    시맨틱 캐시는 숫자가 같은 항목만 적중으로 봅니다.
+    """
+    return tuple(sorted(str(int(number)) for number in re.findall(r"\d+", question)))
+
+
+class InvalidationLog:
+    """
+    답변 캐시 무효화 요청을 여러 uvicorn 워커가 공유하는 SQLite 로그.
+    무효화 요청은 워커 하나에만 도착하므로 그 워커가 url 목록을 기록하고,
+    각 워커의 캐시는 조회할 때 (최대 poll_seconds마다 한 번) 마지막으로 반영한 id 이후의 기록을 읽어 자기 메모리의 항목을 지웁니다.
+    조회는 이벤트 루프에서 실행되므로, 다른 워커가 잠근 파일은 timeout초까지만 기다리고 다음 조회로 넘깁니다.
+    """
+
+    def __init__(self, path: str, retention_seconds: float = 3600, timeout: float = 0.5):
+        self.path = path
+        # 캐시 TTL보다 오래된 기록은 적용할 항목이 남아 있을 수 없으므로 지웁니다.
+        self.retention_seconds = retention_seconds
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS answer_cache_invalidations (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                urls TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+
+    def append(self, urls: List[str]) -> int:
+        now = time.time()
+        cursor = self._db.execute(
+            "INSERT INTO answer_cache_invalidations (urls, created_at) VALUES (?, ?)",
+            (json.dumps(list(urls), ensure_ascii=False), now)
+        )
+        self._db.execute("DELETE FROM answer_cache_invalidations WHERE created_at < ?",
+                         (now - self.retention_seconds,))
+        return cursor.lastrowid
+
+    def latest_id(self) -> int:
+        row = self._db.execute("SELECT MAX(id) FROM answer_cache_invalidations").fetchone()
+        return row[0] or 0
+
+    def since(self, last_id: int) -> List[Tuple[int, List[str]]]:
+        rows = self._db.execute(
+            "SELECT id, urls FROM answer_cache_invalidations WHERE id > ? ORDER BY id", (last_id,)
+        ).fetchall()
+        return [(row_id, json.loads(urls)) for row_id, urls in rows]
+
+
+class _CacheEntry:
+    __slots__ = ("key", "numbers", "embedding", "payload", "source_urls", "expires_at")
+
+    def __init__(self, key: str, embedding: Optional[np.ndarray], payload: dict,
+                 source_urls: List[str], expires_at: float):
+        self.key = key
+        self.numbers = extract_numbers(key)
+        self.embedding = embedding
+        self.payload = payload
+        self.source_urls = source_urls
+        self.expires_at = expires_at
+
+
+class SemanticAnswerCache:
+    """
+    /chat 응답을 캐싱하는 시맨틱 캐시.
+    정규화된 질문의 정확 일치를 먼저 확인하고, 없으면 질문 임베딩의 코사인 유사도로 조회합니다.
+    시맨틱 조회는 질문의 숫자(학기, 연도, 날짜 등)가 같은 항목 중에서만 찾습니다.
+    TTL과 최대 개수(LRU) 제한을 두며, 출처 공지(url)가 재수집되면 해당 항목을 무효화할 수 있습니다.
+    invalidation_log를 주면 다른 워커가 받은 무효화 요청도 조회 전에 반영하며, 공유 기록은 invalidation_poll_seconds마다
+    한 번만 읽으므로 다른 워커의 무효화는 그만큼 늦게 반영될 수 있습니다.
+    """
+
+    def __init__(self, embeddings, ttl_seconds: int = 3600, max_entries: int = 1000,
+                 similarity_threshold: float = 0.95, invalidation_log: Optional[InvalidationLog] = None,
+                 invalidation_poll_seconds: float = 1.0):
+        self.embeddings = embeddings
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.invalidation_log = invalidation_log
+        # 시작 전의 무효화 기록은 비어 있는 이 캐시와 관계가 없으므로 건너뜁니다.
+        self._applied_invalidation_id = invalidation_log.latest_id() if invalidation_log is not None else 0
+        self.invalidation_poll_seconds = invalidation_poll_seconds
+        self._next_invalidation_poll = 0.0
+
+        self._entries: "OrderedDict[str, _CacheEntry]" = OrderedDict()
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[str] = []
+        # 질문의 숫자 조합별 _matrix 행 번호
+        self._number_groups: Dict[Tuple[str, ...], np.ndarray] = {}
+
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _mark_dirty(self):
+        self._matrix = None
+        self._matrix_keys = []
+        self._number_groups = {}
+        ANSWER_CACHE_ENTRIES.set(len(self._entries))
+
+    def _remove(self, key: str):
+        if self._entries.pop(key, None) is not None:
+            self._mark_dirty()
+
+    def _evict_expired(self, now: float):
+        expired = [key for key, entry in self._entries.items() if entry.expires_at <= now]
+        for key in expired:
+            self._remove(key)
+
+    def _similarity_search(self, query_vector: np.ndarray,
+                           numbers: Tuple[str, ...]) -> Tuple[Optional[str], float]:
+        if self._matrix is None:
+            self._matrix_keys = [key for key, entry in self._entries.items() if entry.embedding is not None]
+            if not self._matrix_keys:
+                return None, 0.0
+            self._matrix = np.vstack([self._entries[key].embedding for key in self._matrix_keys])
+            groups: Dict[Tuple[str, ...], List[int]] = {}
+            for row, key in enumerate(self._matrix_keys):
+                groups.setdefault(self._entries[key].numbers, []).append(row)
+            self._number_groups = {group: np.asarray(rows) for group, rows in groups.items()}
+
+        rows = self._number_groups.get(numbers)
+        if rows is None:
+            return None, 0.0
+        scores = self._matrix[rows] @ query_vector
+        best = int(np.argmax(scores))
+        return self._matrix_keys[rows[best]], float(scores[best])
+
+    @staticmethod
+    def _to_unit_vector(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _apply_shared_invalidations(self, force: bool = False):
+        if self.invalidation_log is None:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_invalidation_poll:
+            return
+        self._next_invalidation_poll = now + self.invalidation_poll_seconds
+        try:
+            records = self.invalidation_log.since(self._applied_invalidation_id)
+        except sqlite3.Error as e:
+            logger.warning(f"답변 캐시 무효화 기록을 읽지 못했습니다: {e}")
+            return
+        for record_id, urls in records:
+            self._invalidate_local(urls)
+            self._applied_invalidation_id = record_id
+
+    def _exact_lookup(self, question: str) -> Optional[dict]:
+        self._apply_shared_invalidations()
+        self._evict_expired(time.monotonic())
+        key = normalize_question(question)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.exact_hits += 1
+        ANSWER_CACHE_LOOKUPS.labels(result="exact_hit").inc()
+        return entry.payload
+
+    def _semantic_lookup(self, question: str, embedding: List[float]) -> Optional[dict]:
+        best_key, score = self._similarity_search(self._to_unit_vector(embedding), extract_numbers(question))
+        if best_key is not None and score >= self.similarity_threshold:
+            self._entries.move_to_end(best_key)
+            self.semantic_hits += 1
+            ANSWER_CACHE_LOOKUPS.labels(result="semantic_hit").inc()
+            logger.info(f"시맨틱 캐시 적중 (유사도 {score:.3f}): '{question}' -> '{best_key}'")
+            return self._entries[best_key].payload
+
+        self.misses += 1
+        ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+        return None
+
+    async def alookup(self, question: str) -> Tuple[Optional[dict], Optional[List[float]]]:
+        """
+        캐시를 조회합니다.
+
+        :return: (캐시된 응답 또는 None, 조회에 사용한 질문 임베딩 또는 None)
+                 임베딩은 이후 put() 호출 시 재사용할 수 있습니다.
+        """
+        payload = self._exact_lookup(question)
+        if payload is not None:
+            return payload, None
+
+        try:
+            embedding = await self.embeddings.aembed_query(question)
+        except Exception as e:
+            logger.warning(f"캐시 조회용 질문 임베딩 실패: {e}")
+            self.misses += 1
+            ANSWER_CACHE_LOOKUPS.labels(result="miss").inc()
+            return None, None
+
+        return self._semantic_lookup(question, embedding), embedding
+
+    def lookup_by_embedding(self, question: str, embedding: List[float]) -> Optional[dict]:
+        """이미 계산한 질문 임베딩으로 캐시를 조회합니다. 배치 처리에서 임베딩을 한 번에 계산할 때 사용합니다."""
+        payload = self._exact_lookup(question)
+        if payload is not None:
+            return payload
+        return self._semantic_lookup(question, embedding)
+
+    def put(self, question: str, embedding: Optional[List[float]], payload: dict):
+        """응답을 캐시에 저장합니다. payload의 sources[*].url 이 무효화 기준이 됩니다."""
+        key = normalize_question(question)
+        source_urls = [source["url"] for source in payload.get("sources", []) if source.get("url")]
+        vector = self._to_unit_vector(embedding) if embedding is not None else None
+
+        self._remove(key)
+        self._entries[key] = _CacheEntry(key, vector, payload, source_urls,
+                                         time.monotonic() + self.ttl_seconds)
+        self._mark_dirty()
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        ANSWER_CACHE_ENTRIES.set(len(self._entries))
+
+    def invalidate_sources(self, urls: Iterable[str]) -> int:
+        """
+        주어진 공지 url을 출처로 가진 모든 캐시 항목을 삭제하고 이 워커에서 삭제된 개수를 반환합니다.
+        공유 무효화 기록이 있으면 기록해 두어 다른 워커도 다음 조회 때 같은 항목을 지웁니다.
+        """
+        urls = list(urls)
+        if self.invalidation_log is not None:
+            self.invalidation_log.append(urls)
+            before = len(self._entries)
+            self._apply_shared_invalidations(force=True)
+            return before - len(self._entries)
+        return self._invalidate_local(urls)
+
+    def _invalidate_local(self, urls: Iterable[str]) -> int:
+        targets = set(urls)
+        stale = [key for key, entry in self._entries.items() if targets.intersection(entry.source_urls)]
+        for key in stale:
+            self._remove(key)
+        if stale:
+            logger.info(f"재수집된 공지 {len(targets)}건으로 캐시 항목 {len(stale)}개를 무효화했습니다.")
+        return len(stale)
+
+    def clear(self):
+        self._entries.clear()
+        self._mark_dirty()
+
+    def stats(self) -> dict:
+        return {
+            "applied_invalidation_id": self._applied_invalidation_id,
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
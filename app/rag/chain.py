@@ -1,24 +1,97 @@
-from langchain_openai import ChatOpenAI
+from operator import itemgetter
+
+from langchain_core.runnables import RunnableLambda
 from langchain.chains import create_retrieval_chain
 from langchain.chains.combine_documents import create_stuff_documents_chain
 
 from app.config import settings
 from app.graph.driver import get_retriever
+from app.rag.context import context_packer
 from app.rag.prompt import vector_rag_prompt
+from app.rag.router import build_llm, build_model_router
+
+# LLM_ROUTING_ENABLED일 때 공유 체인이 사용하는 모델 라우터 (통계 조회용)
+model_router = None
+
+
+def get_question_answer_chain():
+    """
+    검색된 문서(context)와 질문(input)으로 답변을 생성하는 체인을 생성하는 함수
+    settings.LLM_ROUTING_ENABLED이면 질문과 검색 결과에 따라 fast/strong 티어 모델을 고르는 라우터를 사용합니다.
+    """
+    global model_router
+    if not settings.LLM_ROUTING_ENABLED:
+        llm = build_llm(settings.LLM_MODEL, "strong", settings.LLM_STRONG_TIMEOUT_SECONDS, settings.OPENAI_API_KEY)
+        return create_stuff_documents_chain(llm, vector_rag_prompt)
+
+    model_router = build_model_router(
+        vector_rag_prompt,
+        fast_model=settings.LLM_FAST_MODEL,
+        strong_model=settings.LLM_MODEL,
+        fast_timeout=settings.LLM_FAST_TIMEOUT_SECONDS,
+        strong_timeout=settings.LLM_STRONG_TIMEOUT_SECONDS,
+        api_key=settings.OPENAI_API_KEY,
+        fast_max_question_chars=settings.ROUTER_FAST_MAX_QUESTION_CHARS,
+        min_confidence=settings.ROUTER_MIN_CONFIDENCE,
+        score_margin=settings.ROUTER_SCORE_MARGIN
+    )
+    return model_router.as_runnable()
 
 
-def get_vector_rag_chain():
+def get_vector_rag_chain(retriever=None, question_answer_chain=None):
     """
     Vector 검색 기반의 RAG 체인을 생성하는 함수
     """
-    llm = ChatOpenAI(model=settings.LLM_MODEL, temperature=0.1, openai_api_key=settings.OPENAI_API_KEY)
-    retriever = get_retriever()
+    retriever = retriever or get_retriever()
+    question_answer_chain = question_answer_chain or get_question_answer_chain()
+
+    # 컨텍스트 구성은 검색 단계에 붙여, 응답의 context(출처 목록)도 LLM이 실제로 본 문서와 같게 합니다.
+    if context_packer is not None:
+        retriever = RunnableLambda(itemgetter("input")) | retriever | context_packer.as_runnable()
 
-    question_answer_chain = create_stuff_documents_chain(llm, vector_rag_prompt)
     rag_chain = create_retrieval_chain(retriever, question_answer_chain)
 
     return rag_chain
 
 
-# 서버 시작 시 체인을 미리 로드
-main_rag_chain = get_vector_rag_chain()
\ No newline at end of file
+# 체인은 import 시점이 아니라 FastAPI lifespan(또는 처음 사용할 때)에서 생성합니다.
+_main_rag_chain = None
+_main_retriever = None
+_main_qa_chain = None
+
+
+def get_main_rag_chain():
+    """API와 평가가 공유하는 RAG 체인을 반환합니다. 처음 호출될 때 생성합니다."""
+    global _main_rag_chain, _main_retriever, _main_qa_chain
+    if _main_rag_chain is None:
+        _main_retriever = get_retriever()
+        _main_qa_chain = get_question_answer_chain()
+        _main_rag_chain = get_vector_rag_chain(_main_retriever, _main_qa_chain)
+    return _main_rag_chain
+
+
+def get_main_components():
+    """
+    공유 RAG 체인을 구성하는 (retriever, 답변 생성 체인)을 반환합니다.
+    배치 처리처럼 검색과 생성을 따로 실행할 때 사용하며, set_main_rag_chain으로 교체된 경우에는 (None, None)입니다.
+    """
+    get_main_rag_chain()
+    return _main_retriever, _main_qa_chain
+
+
+def set_main_rag_chain(chain):
+    """공유 RAG 체인을 교체합니다. 벤치마크처럼 외부 서비스 없이 실행할 때 사용합니다."""
+    global _main_rag_chain, _main_retriever, _main_qa_chain
+    _main_rag_chain = chain
+    _main_retriever = None
+    _main_qa_chain = None
+
+
+async def awarmup_main_rag_chain(question: str):
+    """
+    검색 단계만 한 번 실행하여 Neo4j 커넥션 풀, 임베딩 클라이언트, 인덱스 페이지 캐시를 미리 데웁니다.
+    LLM은 호출하지 않습니다.
+    """
+    retriever, _ = get_main_components()
+    if retriever is not None:
+        await retriever.ainvoke(question)
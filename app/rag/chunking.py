@@ -0,0 +1,31 @@
+from typing import List
+
+# 이 모듈은 공지 수집 DAG(Airflow, Python 3.9)에서도 import하므로 표준 라이브러리만 사용합니다.
+
+
+def split_into_chunks(text: str, chunk_size: int = 1000, overlap: int = 150) -> List[str]:
+    """
+    텍스트를 줄 단위로 모아 chunk_size 이하의 청크로 나눕니다.
+    인접 청크는 overlap 만큼 앞 청크의 끝부분을 공유하여 경계에서 문맥이 끊기지 않게 합니다.
+    """
+    lines = []
+    for line in text.splitlines():
+        line = line.strip()
+        while len(line) > chunk_size:
+            lines.append(line[:chunk_size])
+            line = line[chunk_size - overlap:]
+        if line:
+            lines.append(line)
+
+    chunks = []
+    current = ""
+    for line in lines:
+        if current and len(current) + len(line) + 1 > chunk_size:
+            chunks.append(current)
+            current = current[-overlap:] if overlap else ""
+            if len(current) + len(line) + 1 > chunk_size:
+                current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
@@ -0,0 +1,184 @@
+import hashlib
+import logging
+import math
+import re
+from typing import List, Optional, Set
+
+import tiktoken
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+from app.config import settings
+from app.monitoring.metrics import CONTEXT_DOCUMENTS_DROPPED, CONTEXT_TOKENS
+from app.monitoring.tracing import annotate, span
+
+logger = logging.getLogger(__name__)
+
+# 토큰 예산의 남은 양이 이보다 적으면 마지막 문서를 잘라 넣지 않고 버립니다.
+MIN_PARTIAL_TOKENS = 100
+# 토크나이저를 쓸 수 없을 때 사용하는 토큰당 글자 수 추정치 (한국어 공지 본문 기준으로 보수적으로 잡은 값)
+APPROX_CHARS_PER_TOKEN = 1.5
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    """공백을 정리한 문자 n-gram 집합. 조사가 붙는 한국어는 단어보다 문자 단위 비교가 안정적입니다."""
+    text = re.sub(r"\s+", " ", text).strip()
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _jaccard(a: Set[str], b: Set[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _load_encoding(model: str) -> Optional[tiktoken.Encoding]:
+    try:
+        try:
+            encoding = tiktoken.encoding_for_model(model)
+        except KeyError:
+            encoding = tiktoken.get_encoding("o200k_base")
+        return encoding
+    except Exception as e:
+        # 토크나이저 파일을 내려받지 못하는 환경(오프라인 등)에서는 글자 수로 토큰 수를 추정합니다.
+        logger.warning(f"토크나이저를 불러오지 못해 글자 수로 토큰 수를 추정합니다: {e}")
+        return None
+
+
+class ContextPacker:
+    """
+    검색된 문서를 프롬프트에 넣기 전에 정리하는 컨텍스트 구성 단계.
+    1) 벡터 유사도 점수가 min_score보다 낮은 문서를 제외하고,
+    2) 같은 공지(url)나 같은 본문, 문자 3-gram 자카드 유사도가 높은 유사 중복 문서를 제거한 뒤,
+    3) 검색 순위(관련도) 순으로 max_tokens 예산 안에 담습니다. 예산을 넘는 문서는 문단 단위로 잘라 넣습니다.
+    제거·절약된 토큰 수는 메트릭과 요청 추적 로그에 기록합니다.
+    토크나이저는 load_encoding()으로 시작 시 미리 불러오며, 불러오기 전이나 use_tokenizer=False이면 글자 수로 토큰 수를 추정합니다.
+    """
+
+    def __init__(self, model: str, max_tokens: int = 3000, min_score: float = 0.0,
+                 near_duplicate_threshold: float = 0.85, use_tokenizer: bool = True):
+        self.model = model
+        self.max_tokens = max_tokens
+        self.min_score = min_score
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.use_tokenizer = use_tokenizer
+        self._encoding = None
+
+        self.documents_in = 0
+        self.documents_out = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+
+    def load_encoding(self):
+        """
+        토크나이저를 불러옵니다. 처음에는 BPE 파일을 내려받을 수 있으므로 이벤트 루프 밖(asyncio.to_thread)에서 호출합니다.
+        요청 처리 중에는 불러오지 않으므로, 불러오기 전의 요청은 글자 수 추정으로 처리됩니다.
+        """
+        if self.use_tokenizer and self._encoding is None:
+            self._encoding = _load_encoding(self.model)
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    def count_tokens(self, text: str) -> int:
+        if self.encoding is None:
+            return math.ceil(len(text) / APPROX_CHARS_PER_TOKEN)
+        return len(self.encoding.encode(text))
+
+    def _cut(self, text: str, tokens: int) -> str:
+        if self.encoding is None:
+            return text[:int(tokens * APPROX_CHARS_PER_TOKEN)]
+        return self.encoding.decode(self.encoding.encode(text)[:tokens])
+
+    def _truncate(self, document: Document, budget: int) -> Document:
+        """문서를 앞 문단부터 budget 토큰까지 남기고, 예산을 넘는 문단은 남은 토큰만큼 잘라 붙입니다."""
+        kept, used = [], 0
+        for paragraph in document.page_content.split("\n\n"):
+            tokens = self.count_tokens(paragraph + "\n\n")
+            if used + tokens > budget:
+                kept.append(self._cut(paragraph, budget - used))
+                break
+            kept.append(paragraph)
+            used += tokens
+        return Document(page_content="\n\n".join(kept), metadata={**document.metadata, "truncated": True})
+
+    def pack(self, documents: List[Document]) -> List[Document]:
+        with span("context_packing"):
+            return self._pack(documents)
+
+    def _pack(self, documents: List[Document]) -> List[Document]:
+        packed: List[Document] = []
+        seen_sources, seen_hashes = set(), set()
+        kept_shingles: List[Set[str]] = []
+        tokens_in, tokens_out = 0, 0
+
+        for document in documents:
+            tokens = self.count_tokens(document.page_content)
+            tokens_in += tokens
+
+            score = document.metadata.get("score")
+            if self.min_score and score is not None and score < self.min_score:
+                CONTEXT_DOCUMENTS_DROPPED.labels(reason="low_score").inc()
+                continue
+
+            source = document.metadata.get("source")
+            digest = hashlib.sha1(document.page_content.encode("utf-8")).hexdigest()
+            if (source is not None and source in seen_sources) or digest in seen_hashes:
+                CONTEXT_DOCUMENTS_DROPPED.labels(reason="duplicate").inc()
+                continue
+
+            shingles = _shingles(document.page_content)
+            if any(_jaccard(shingles, other) >= self.near_duplicate_threshold for other in kept_shingles):
+                CONTEXT_DOCUMENTS_DROPPED.labels(reason="near_duplicate").inc()
+                continue
+
+            remaining = self.max_tokens - tokens_out
+            if tokens > remaining:
+                if remaining < MIN_PARTIAL_TOKENS:
+                    CONTEXT_DOCUMENTS_DROPPED.labels(reason="budget").inc()
+                    continue
+                document = self._truncate(document, remaining)
+                tokens = self.count_tokens(document.page_content)
+
+            seen_sources.add(source)
+            seen_hashes.add(digest)
+            kept_shingles.append(shingles)
+            packed.append(document)
+            tokens_out += tokens
+
+        self.documents_in += len(documents)
+        self.documents_out += len(packed)
+        self.tokens_in += tokens_in
+        self.tokens_out += tokens_out
+        CONTEXT_TOKENS.labels(stage="retrieved").inc(tokens_in)
+        CONTEXT_TOKENS.labels(stage="packed").inc(tokens_out)
+        annotate(context_tokens=tokens_out, context_tokens_saved=tokens_in - tokens_out)
+        return packed
+
+    async def apack(self, documents: List[Document]) -> List[Document]:
+        # 토큰 계산은 짧으므로 executor 스레드로 넘기지 않고 이벤트 루프에서 바로 실행합니다.
+        return self.pack(documents)
+
+    def as_runnable(self):
+        """검색 결과(List[Document])를 받아 정리된 문서 목록을 반환하는 Runnable."""
+        return RunnableLambda(self.pack, afunc=self.apack, name="pack_context")
+
+    def stats(self) -> dict:
+        return {
+            "documents_in": self.documents_in,
+            "documents_out": self.documents_out,
+            "tokens_in": self.tokens_in,
+            "tokens_out": self.tokens_out,
+            "tokens_saved": self.tokens_in - self.tokens_out,
+        }
+
+
+context_packer = ContextPacker(
+    model=settings.LLM_MODEL,
+    max_tokens=settings.CONTEXT_MAX_TOKENS,
+    min_score=settings.CONTEXT_MIN_SCORE,
+    near_duplicate_threshold=settings.CONTEXT_NEAR_DUPLICATE_THRESHOLD
+) if settings.CONTEXT_PACKING_ENABLED else None
@@ -1,7 +1,197 @@
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from langchain_core.embeddings import Embeddings
 from langchain_openai import OpenAIEmbeddings
 from app.config import settings  # config 폴더의 settings 모듈을 import
+from app.limits.outbound import create_http_clients
+from app.monitoring.metrics import EMBEDDING_CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    임베딩 결과를 메모리(LRU)와 디스크(SQLite)에 캐싱하는 Embeddings 래퍼.
+    캐시 키는 모델 이름(과 차원)과 정규화된 텍스트로 만들며, 이미 임베딩한 텍스트는 네트워크 호출 없이 반환합니다.
+    디스크 캐시는 부가 기능이므로, 여러 워커가 같은 파일에 쓰다가 잠금 등으로 실패해도 경고만 남기고 메모리 캐시로 계속합니다.
+    비동기 메서드는 디스크 조회/저장을 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+    """
+
+    def __init__(self, underlying: Embeddings, model_name: str, cache_path: Optional[str] = None,
+                 memory_size: int = 2048, dimensions: Optional[int] = None, db_timeout: float = 1.0):
+        self.underlying = underlying
+        # 차원을 바꾸면 다른 벡터가 나오므로 키에 포함합니다. (기본 차원은 기존 캐시 키를 그대로 사용)
+        self.model_name = f"{model_name}:{dimensions}" if dimensions else model_name
+        self.memory_size = memory_size
+
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        if cache_path:
+            try:
+                os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+                # 다른 워커가 쓰는 중이면 db_timeout초까지만 기다립니다.
+                self._db = sqlite3.connect(cache_path, timeout=db_timeout, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                logger.warning(f"임베딩 디스크 캐시를 열 수 없어 메모리 캐시만 사용합니다: {e}")
+                self._db = None
+
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        normalized = re.sub(r"\s+", " ", text).strip()
+        return hashlib.sha256(f"{self.model_name}\n{normalized}".encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, vector: List[float]):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_size:
+            self._memory.popitem(last=False)
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                    EMBEDDING_CACHE_LOOKUPS.labels(result="memory_hit").inc()
+
+            remaining = [key for key in keys if key not in found]
+            rows = []
+            if remaining and self._db is not None:
+                placeholders = ",".join("?" * len(remaining))
+                try:
+                    rows = self._db.execute(
+                        f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", remaining
+                    ).fetchall()
+                except sqlite3.Error as e:
+                    logger.warning(f"임베딩 디스크 캐시 조회 실패, 메모리 캐시만 사용합니다: {e}")
+            for key, blob in rows:
+                vector = array("f")
+                vector.frombytes(blob)
+                found[key] = vector.tolist()
+                self._remember(key, found[key])
+                self.disk_hits += 1
+                EMBEDDING_CACHE_LOOKUPS.labels(result="disk_hit").inc()
+
+            missed = len(set(keys) - found.keys())
+            self.misses += missed
+            if missed:
+                EMBEDDING_CACHE_LOOKUPS.labels(result="miss").inc(missed)
+        return found
 
-embeddings = OpenAIEmbeddings(
+    def _store(self, items: Dict[str, List[float]]):
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                try:
+                    self._db.executemany(
+                        "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                        [(key, array("f", vector).tobytes()) for key, vector in items.items()]
+                    )
+                    self._db.commit()
+                except sqlite3.Error as e:
+                    if self._db.in_transaction:
+                        self._db.rollback()
+                    logger.warning(f"임베딩 디스크 캐시 저장 실패, 메모리에만 보관합니다: {e}")
+
+    def _split(self, texts: List[str]):
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    async def _asplit(self, texts: List[str]):
+        if self._db is None:
+            return self._split(texts)
+        return await asyncio.to_thread(self._split, texts)
+
+    async def _astore(self, items: Dict[str, List[float]]):
+        if self._db is None:
+            self._store(items)
+        else:
+            await asyncio.to_thread(self._store, items)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._split(texts)
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            self._store(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        keys, found, missing = self._split([text])
+        if missing:
+            vector = self.underlying.embed_query(text)
+            self._store({keys[0]: vector})
+            return vector
+        return found[keys[0]]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = await self._asplit(texts)
+        if missing:
+            vectors = await self.underlying.aembed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), vectors))
+            await self._astore(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        keys, found, missing = await self._asplit([text])
+        if missing:
+            vector = await self.underlying.aembed_query(text)
+            await self._astore({keys[0]: vector})
+            return vector
+        return found[keys[0]]
+
+    def stats(self) -> dict:
+        return {
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+_http_client, _http_async_client = create_http_clients("interactive")
+# 질문 임베딩은 항상 모델의 전체 차원으로 받고, 검색할 때 활성 벡터 인덱스의 차원으로 줄입니다. (VectorProfile.fit)
+# 인덱스 마이그레이션 중에도 어느 인덱스든 검색할 수 있고, 임베딩 캐시 항목도 차원과 관계없이 재사용됩니다.
+openai_embeddings = OpenAIEmbeddings(
     model=settings.EMBEDDING_MODEL,
-    openai_api_key=settings.OPENAI_API_KEY
-)
\ No newline at end of file
+    openai_api_key=settings.OPENAI_API_KEY,
+    max_retries=0,
+    http_client=_http_client,
+    http_async_client=_http_async_client
+)
+
+if settings.EMBEDDING_CACHE_ENABLED:
+    embeddings = CachedEmbeddings(
+        openai_embeddings,
+        model_name=settings.EMBEDDING_MODEL,
+        cache_path=settings.EMBEDDING_CACHE_PATH,
+        memory_size=settings.EMBEDDING_CACHE_MEMORY_SIZE
+    )
+else:
+    embeddings = openai_embeddings
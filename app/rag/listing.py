@@ -0,0 +1,43 @@
+from typing import Any, Dict, List, Optional
+
+from app.config import settings
+from app.graph.retriever import afetch_listing, metadata_vocabulary
+
+
+def _format_item(index: int, row: Dict[str, Any]) -> str:
+    details = []
+    if row.get("posted_at"):
+        details.append(f"게시 {row['posted_at']}")
+    if row.get("deadline"):
+        details.append(f"마감 {row['deadline']}")
+    if row.get("department"):
+        details.append(row["department"])
+    suffix = f" ({', '.join(details)})" if details else ""
+    return f"{index}. {row['title']}{suffix}"
+
+
+def format_listing_answer(description: str, rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{description} 조건에 맞는 공지사항 {len(rows)}건입니다."]
+    lines.extend(_format_item(index, row) for index, row in enumerate(rows, start=1))
+    return "\n".join(lines)
+
+
+async def answer_listing_question(question: str) -> Optional[dict]:
+    """
+    "이번 주 장학 공지"처럼 조건만으로 이루어진 목록 질문이면 LLM 없이 Cypher 조회 결과로 답변을 만듭니다.
+    목록 질문이 아니거나 조건에 맞는 공지가 없으면(메타데이터가 아직 수집되지 않은 경우 포함) None을 반환하여
+    RAG 체인으로 답하게 합니다.
+
+    :return: {"answer": 답변, "sources": [{"title", "url"}]} 또는 None
+    """
+    query_filter = await metadata_vocabulary.aparse(question)
+    if not query_filter.is_listing:
+        return None
+
+    rows = await afetch_listing(query_filter, settings.LISTING_MAX_RESULTS)
+    if not rows:
+        return None
+    return {
+        "answer": format_listing_answer(query_filter.describe(), rows),
+        "sources": [{"title": row["title"], "url": row["url"]} for row in rows],
+    }
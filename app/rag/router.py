@@ -0,0 +1,180 @@
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+import httpx
+import openai
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from langchain_openai import ChatOpenAI
+
+from app.limits.outbound import create_http_clients
+from app.monitoring.metrics import LLM_TIER_DURATION, LLM_TIER_REQUESTS, LLM_TIER_ROUTED
+from app.monitoring.tracing import annotate
+
+TIERS = ("fast", "strong")
+TIMEOUT_ERRORS = (openai.APITimeoutError, httpx.TimeoutException, asyncio.TimeoutError, TimeoutError)
+# 여러 공지를 함께 봐야 하는 질문의 표현
+MULTI_DOCUMENT_CUE = re.compile(r"비교|차이|각각|정리|요약|모든|전부|목록")
+
+
+class TierStatsCallbackHandler(BaseCallbackHandler):
+    """
+    모델 호출마다 metadata의 llm_tier를 읽어 티어별 요청 수, 성공/오류/타임아웃 수, 지연 시간을 집계합니다.
+    모델 객체에 직접 붙이므로 체인 밖에서 호출되어도 집계됩니다.
+    """
+
+    run_inline = True
+
+    def __init__(self, latency_window: int = 1000):
+        self._lock = threading.Lock()
+        self._starts: Dict[Any, tuple] = {}
+        self.counts = {tier: {"requests": 0, "success": 0, "error": 0, "timeout": 0} for tier in TIERS}
+        self.latencies = {tier: deque(maxlen=latency_window) for tier in TIERS}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        tier = (metadata or {}).get("llm_tier")
+        if tier not in self.counts:
+            return
+        with self._lock:
+            self._starts[run_id] = (tier, time.perf_counter())
+            self.counts[tier]["requests"] += 1
+
+    def _finish(self, run_id, outcome: str):
+        with self._lock:
+            entry = self._starts.pop(run_id, None)
+            if entry is None:
+                return
+            tier, start = entry
+            duration = time.perf_counter() - start
+            self.counts[tier][outcome] += 1
+            if outcome == "success":
+                self.latencies[tier].append(duration)
+        LLM_TIER_REQUESTS.labels(tier=tier, outcome=outcome).inc()
+        LLM_TIER_DURATION.labels(tier=tier).observe(duration)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        self._finish(run_id, "success")
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._finish(run_id, "timeout" if isinstance(error, TIMEOUT_ERRORS) else "error")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total_success = sum(counts["success"] for counts in self.counts.values())
+            result = {}
+            for tier in TIERS:
+                latencies = sorted(self.latencies[tier])
+                result[tier] = {
+                    **self.counts[tier],
+                    # 성공한 답변 중 이 티어가 처리한 비율
+                    "hit_rate": round(self.counts[tier]["success"] / total_success, 3) if total_success else 0.0,
+                    "latency_ms": {
+                        "p50": round(_percentile(latencies, 50) * 1000, 1),
+                        "p95": round(_percentile(latencies, 95) * 1000, 1),
+                    },
+                }
+            return result
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(round(percent / 100 * (len(values) - 1))))]
+
+
+tier_stats = TierStatsCallbackHandler()
+
+
+def build_llm(model: str, tier: str, timeout: float, api_key: str) -> ChatOpenAI:
+    """
+    티어 이름을 metadata로 달고, 요청 타임아웃을 제한한 ChatOpenAI를 만듭니다.
+    요청은 공유 OpenAI 요청 한도(interactive 우선순위)를 거쳐 전송되며, 429 재시도는 그 transport에서만 합니다.
+    타임아웃이나 다른 오류는 SDK에서 다시 시도하지 않고 다른 티어로 넘깁니다.
+    """
+    http_client, http_async_client = create_http_clients("interactive")
+    # stream_usage: 스트리밍 응답에서도 토큰 사용량(usage_metadata)을 받아 메트릭으로 기록합니다.
+    return ChatOpenAI(model=model, temperature=0.1, openai_api_key=api_key, stream_usage=True,
+                      timeout=timeout, max_retries=0,
+                      http_client=http_client, http_async_client=http_async_client,
+                      metadata={"llm_tier": tier}, callbacks=[tier_stats])
+
+
+class ModelRouter:
+    """
+    검색 결과를 보고 답변 생성 모델 티어를 고르는 라우터.
+    짧은 질문이고 한 공지로 답할 수 있어 보이면(상위 문서 점수가 충분히 높고 2위와 차이가 나면) fast 티어로,
+    여러 공지를 봐야 하거나 검색 결과가 확실하지 않으면 strong 티어로 보냅니다.
+    각 티어 체인은 오류나 타임아웃이 나면 다른 티어로 다시 시도합니다(with_fallbacks).
+    """
+
+    def __init__(self, chains: Dict[str, Any], fast_max_question_chars: int = 60,
+                 min_confidence: float = 0.8, score_margin: float = 0.05):
+        self.chains = chains
+        self.fast_max_question_chars = fast_max_question_chars
+        self.min_confidence = min_confidence
+        self.score_margin = score_margin
+        self.routed = {tier: 0 for tier in TIERS}
+
+    def _is_single_document(self, documents: List[Document]) -> bool:
+        top = documents[0].metadata
+        # 하이브리드 검색의 전문 검색 fast path 결과는 이미 한 공지로 확실하다고 판단된 결과입니다.
+        if "score" not in top:
+            return "lexical_score" in top and "rrf_score" not in top
+        if top["score"] < self.min_confidence:
+            return False
+        if len(documents) == 1:
+            return True
+        second = documents[1].metadata.get("score")
+        return second is None or top["score"] - second >= self.score_margin
+
+    def choose_tier(self, inputs: Dict[str, Any]) -> str:
+        question = inputs.get("input", "")
+        documents: Optional[List[Document]] = inputs.get("context") or []
+        if len(question) > self.fast_max_question_chars or MULTI_DOCUMENT_CUE.search(question):
+            return "strong"
+        # 검색 결과가 없으면 "찾을 수 없습니다" 답변이므로 fast 티어로 충분합니다.
+        if not documents or self._is_single_document(documents):
+            return "fast"
+        return "strong"
+
+    def _route(self, inputs: Dict[str, Any]):
+        tier = self.choose_tier(inputs)
+        self.routed[tier] += 1
+        LLM_TIER_ROUTED.labels(tier=tier).inc()
+        annotate(llm_tier=tier)
+        return self.chains[tier]
+
+    async def _aroute(self, inputs: Dict[str, Any]):
+        return self._route(inputs)
+
+    def as_runnable(self):
+        """
+        {"input", "context"}를 받아 고른 티어의 답변 체인을 실행하는 Runnable.
+        RunnableLambda가 반환한 Runnable은 같은 입력으로 실행(스트리밍 포함)됩니다.
+        """
+        return RunnableLambda(self._route, afunc=self._aroute, name="route_model")
+
+    def stats(self) -> dict:
+        total = sum(self.routed.values())
+        return {
+            "routed": dict(self.routed),
+            "fast_ratio": round(self.routed["fast"] / total, 3) if total else 0.0,
+            "tiers": tier_stats.stats(),
+        }
+
+
+def build_model_router(prompt, fast_model: str, strong_model: str, fast_timeout: float, strong_timeout: float,
+                       api_key: str, **router_options) -> ModelRouter:
+    """티어별 답변 체인(다른 티어로의 fallback 포함)을 만들고 라우터로 묶습니다."""
+    fast = create_stuff_documents_chain(build_llm(fast_model, "fast", fast_timeout, api_key), prompt)
+    strong = create_stuff_documents_chain(
+        build_llm(strong_model, "strong", strong_timeout, api_key), prompt
+    )
+    chains = {"fast": fast.with_fallbacks([strong]), "strong": strong.with_fallbacks([fast])}
+    return ModelRouter(chains, **router_options)
@@ -0,0 +1,113 @@
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from app.monitoring.metrics import COALESCED_REQUESTS, SINGLE_FLIGHT_EXECUTIONS
+
+
+class _StreamFlight:
+    """
+    하나의 스트림 실행 결과를 여러 구독자에게 나눠 주는 브로드캐스터.
+    지금까지 생성된 항목을 모두 보관(replay buffer)하므로, 늦게 합류한 구독자도 처음부터 같은 항목을 받습니다.
+    """
+
+    def __init__(self):
+        self.items: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self._condition = asyncio.Condition()
+
+    async def run(self, source: AsyncIterator[Any]):
+        try:
+            async for item in source:
+                async with self._condition:
+                    self.items.append(item)
+                    self._condition.notify_all()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            async with self._condition:
+                self.done = True
+                self._condition.notify_all()
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            async with self._condition:
+                await self._condition.wait_for(lambda: position < len(self.items) or self.done)
+                items = self.items[position:]
+                done = self.done
+            position += len(items)
+            for item in items:
+                yield item
+            if done and position >= len(self.items):
+                if self.error is not None:
+                    raise self.error
+                return
+
+
+class SingleFlight:
+    """
+    같은 키(정규화된 질문)로 동시에 들어온 요청을 하나의 체인 실행으로 합치는 single-flight 그룹.
+    공유 실행은 별도 태스크로 돌기 때문에, 먼저 요청한 클라이언트가 연결을 끊어도 나머지 대기자는 결과를 받습니다.
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Task] = {}
+        self._streams: Dict[str, Tuple[_StreamFlight, asyncio.Task]] = {}
+        self.executions = {"invoke": 0, "stream": 0}
+        self.coalesced = {"invoke": 0, "stream": 0}
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        같은 키의 실행이 진행 중이면 그 결과를 기다리고, 없으면 func를 실행합니다.
+
+        :return: (결과, 이 요청이 실제로 실행한 요청(leader)인지 여부)
+        """
+        task = self._calls.get(key)
+        leader = task is None
+        if leader:
+            task = asyncio.ensure_future(func())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._calls.pop(key) if self._calls.get(key) is done else None)
+            self._count("invoke", executed=True)
+        else:
+            self._count("invoke", executed=False)
+        return await asyncio.shield(task), leader
+
+    def stream(self, key: str, func: Callable[[], AsyncIterator[Any]]) -> Tuple[AsyncIterator[Any], bool]:
+        """
+        같은 키의 스트림이 진행 중이면 그 스트림을 구독하고, 없으면 func로 새 스트림을 시작합니다.
+
+        :return: (항목 비동기 이터레이터, leader 여부)
+        """
+        entry = self._streams.get(key)
+        leader = entry is None
+        if leader:
+            flight = _StreamFlight()
+            task = asyncio.ensure_future(flight.run(func()))
+            self._streams[key] = (flight, task)
+            task.add_done_callback(
+                lambda done: self._streams.pop(key) if self._streams.get(key, (None, None))[1] is done else None
+            )
+            self._count("stream", executed=True)
+        else:
+            flight = entry[0]
+            self._count("stream", executed=False)
+        return flight.subscribe(), leader
+
+    def _count(self, mode: str, executed: bool):
+        if executed:
+            self.executions[mode] += 1
+            SINGLE_FLIGHT_EXECUTIONS.labels(mode=mode).inc()
+        else:
+            self.coalesced[mode] += 1
+            COALESCED_REQUESTS.labels(mode=mode).inc()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "executions": dict(self.executions),
+            "coalesced": dict(self.coalesced),
+        }
@@ -0,0 +1,19 @@
+import math
+from typing import List
+
+# 이 모듈은 공지 수집 DAG(Airflow, Python 3.9)에서도 import하므로 표준 라이브러리만 사용합니다.
+
+
+def shorten_embedding(embedding: List[float], dimensions: int) -> List[float]:
+    """
+    임베딩의 앞 dimensions개 성분만 남기고 다시 L2 정규화합니다.
+    text-embedding-3 모델의 dimensions 옵션과 같은 방식이므로, 전체 차원으로 한 번만 임베딩해
+    더 짧은 차원의 인덱스에 저장하거나 검색할 수 있습니다.
+    """
+    if len(embedding) == dimensions:
+        return embedding
+    if len(embedding) < dimensions:
+        raise ValueError(f"{len(embedding)}차원 임베딩을 {dimensions}차원으로 늘릴 수 없습니다.")
+    head = embedding[:dimensions]
+    norm = math.sqrt(sum(value * value for value in head))
+    return [value / norm for value in head] if norm else head
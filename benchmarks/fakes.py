@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import time
+from collections import defaultdict
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional
+
+import numpy as np
+from langchain_core.callbacks import AsyncCallbackHandler
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    OpenAI 호출 없이 응답 지연만 흉내 내는 채팅 모델.
+    첫 토큰까지 latency초가 걸리고, 이후 tokens_per_second 속도로 answer_tokens개의 토큰을 생성합니다.
+    """
+
+    latency: float = 0.3
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake-chat"
+
+    def _tokens(self) -> List[str]:
+        return [f"토큰{i} " for i in range(self.answer_tokens)]
+
+    def _total_seconds(self) -> float:
+        return self.latency + self.answer_tokens / self.tokens_per_second
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager=None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._total_seconds())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens())))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager=None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._total_seconds())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens())))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager=None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.latency)
+        for token in self._tokens():
+            time.sleep(1.0 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager=None, **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        await asyncio.sleep(self.latency)
+        for token in self._tokens():
+            await asyncio.sleep(1.0 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                await run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
+
+
+class FakeEmbeddings(Embeddings):
+    """텍스트의 해시로 시드를 정해 항상 같은 단위 벡터를 반환하는 임베딩. 호출마다 latency초의 지연을 둡니다."""
+
+    def __init__(self, dimensions: int = 1536, latency: float = 0.05):
+        self.dimensions = dimensions
+        self.latency = latency
+
+    def _vector(self, text: str) -> List[float]:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "big")
+        vector = np.random.default_rng(seed).standard_normal(self.dimensions)
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self.latency)
+        return self._vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self.latency)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self.latency)
+        return self._vector(text)
+
+
+class InMemoryVectorIndex:
+    """
+    VectorIndexMirror와 같은 search() 인터페이스를 가진 메모리 벡터 인덱스.
+    MirrorVectorRetriever에 넣어 Neo4j 없이 실제 검색 결과 묶음(group_rows_to_documents) 경로를 실행합니다.
+    """
+
+    def __init__(self, rows: List[Dict[str, Any]], vectors: List[List[float]]):
+        matrix = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        self.matrix = matrix / np.where(norms == 0, 1, norms)
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def search(self, embedding: List[float], top_n: int) -> List[Dict[str, Any]]:
+        query = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+        scores = self.matrix @ query
+        top_n = min(top_n, len(scores))
+        if top_n <= 0:
+            return []
+        top = np.argpartition(-scores, top_n - 1)[:top_n]
+        top = top[np.argsort(-scores[top])]
+        return [{**self.rows[i], "score": float((1.0 + scores[i]) / 2.0)} for i in top]
+
+
+def make_corpus(embeddings: FakeEmbeddings, announcements: int = 500, chunks_per_announcement: int = 3,
+                chunk_chars: int = 800) -> InMemoryVectorIndex:
+    """청크 단위 검색용 합성 공지 코퍼스로 인메모리 인덱스를 만듭니다."""
+    rows = []
+    for i in range(announcements):
+        for chunk_index in range(chunks_per_announcement):
+            body = f"벤치마크 공지 {i}의 {chunk_index}번째 청크입니다. "
+            rows.append({
+                "url": f"https://benchmark.local/announcements/{i}",
+                "title": f"벤치마크 공지 {i}",
+                "text": (body * (chunk_chars // len(body) + 1))[:chunk_chars],
+                "chunk_index": chunk_index,
+            })
+    vectors = [embeddings._vector(f"{row['url']}#{row['chunk_index']}") for row in rows]
+    return InMemoryVectorIndex(rows, vectors)
+
+
+class StageTimer(AsyncCallbackHandler):
+    """체인 실행 중 검색(retrieval), LLM 생성, 첫 토큰까지의 시간을 단계별로 기록하는 콜백."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+        self._starts: Dict[Any, float] = {}
+        self._first_token_seen = set()
+
+    def _finish(self, stage: str, run_id):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            self.samples[stage].append((time.perf_counter() - start) * 1000)
+
+    async def on_retriever_start(self, serialized, query, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    async def on_retriever_end(self, documents, *, run_id, **kwargs):
+        self._finish("retrieval", run_id)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._starts[run_id] = time.perf_counter()
+
+    async def on_llm_new_token(self, token, *, run_id, **kwargs):
+        if run_id not in self._first_token_seen and run_id in self._starts:
+            self._first_token_seen.add(run_id)
+            self.samples["llm_first_token"].append((time.perf_counter() - self._starts[run_id]) * 1000)
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._first_token_seen.discard(run_id)
+        self._finish("llm", run_id)
+
+    def reset(self):
+        self.samples.clear()
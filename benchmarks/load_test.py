@@ -0,0 +1,197 @@
+"""
+/api/v1/chat 부하 테스트 및 지연 시간 벤치마크.
+
+OpenAI와 Neo4j 없이 가짜 LLM(지연/토큰 속도 설정 가능), 결정적 가짜 임베딩, 인메모리 벡터 인덱스로
+FastAPI 앱을 실행하고, 동시 요청을 보내 p50/p95/p99 지연 시간, RPS, 단계별 소요 시간을 JSON으로 저장합니다.
+
+    python -m benchmarks.load_test --concurrency 32 --requests 500
+    python -m benchmarks.load_test --endpoint stream --compare benchmarks/results/이전결과.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+# app 모듈은 import 시점에 설정과 클라이언트를 만들기 때문에, 외부 서비스를 쓰지 않도록 먼저 환경 변수를 정합니다.
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+os.environ["RETRIEVER_BACKEND"] = "neo4j_async"
+os.environ["EMBEDDING_CACHE_ENABLED"] = "false"
+os.environ["ANSWER_CACHE_ENABLED"] = "false"
+os.environ["WARMUP_ON_STARTUP"] = "false"
+os.environ["LISTING_ANSWER_ENABLED"] = "false"
+
+import httpx
+import numpy as np
+from langchain.chains.combine_documents import create_stuff_documents_chain
+
+from app import api
+from app.graph.vector_mirror import MirrorVectorRetriever
+from app.rag.cache import SemanticAnswerCache
+from app.rag.chain import get_vector_rag_chain, set_main_rag_chain
+from app.rag.prompt import vector_rag_prompt
+from benchmarks.fakes import FakeChatModel, FakeEmbeddings, StageTimer, make_corpus
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ENDPOINTS = {"chat": "/api/v1/chat", "stream": "/api/v1/chat/stream"}
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    values = np.asarray(samples)
+    return {
+        "count": int(values.size),
+        "mean": round(float(values.mean()), 2),
+        "p50": round(float(np.percentile(values, 50)), 2),
+        "p95": round(float(np.percentile(values, 95)), 2),
+        "p99": round(float(np.percentile(values, 99)), 2),
+        "max": round(float(values.max()), 2),
+    }
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def install_fakes(args) -> StageTimer:
+    """공유 RAG 체인과 API의 답변 캐시를 가짜 구성 요소로 만든 것으로 교체합니다."""
+    embeddings = FakeEmbeddings(latency=args.embedding_latency)
+    index = make_corpus(embeddings, announcements=args.corpus_size)
+    llm = FakeChatModel(latency=args.llm_latency, tokens_per_second=args.tokens_per_second,
+                        answer_tokens=args.answer_tokens)
+    retriever = MirrorVectorRetriever(embeddings=embeddings, mirror=index, granularity="chunk",
+                                      search_k=args.search_k, fanout=args.fanout)
+    # 운영과 같은 구성(컨텍스트 구성 단계 포함)으로 체인을 만듭니다.
+    chain = get_vector_rag_chain(retriever, create_stuff_documents_chain(llm, vector_rag_prompt))
+
+    timer = StageTimer()
+    set_main_rag_chain(chain.with_config(callbacks=[timer]))
+    api.answer_cache = SemanticAnswerCache(embeddings) if args.answer_cache else None
+    return timer
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, question: str) -> bool:
+    """요청 하나를 보내고 성공 여부를 반환합니다. 스트리밍은 error 이벤트가 없어야 성공입니다."""
+    response = await client.post(ENDPOINTS[endpoint], json={"question": question})
+    if response.status_code != 200:
+        return False
+    return endpoint != "stream" or "event: error" not in response.text
+
+
+async def run_load(client: httpx.AsyncClient, endpoint: str, questions: List[str], concurrency: int):
+    latencies, errors = [], 0
+    counter = itertools.count()
+
+    async def worker():
+        nonlocal errors
+        while (i := next(counter)) < len(questions):
+            start = time.perf_counter()
+            try:
+                ok = await send(client, endpoint, questions[i])
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def make_questions(count: int, distinct: int, prefix: str = "벤치마크") -> List[str]:
+    # distinct가 count보다 작으면 같은 질문이 반복되어 답변 캐시 적중을 측정할 수 있습니다.
+    distinct = distinct or count
+    return [f"{prefix} 공지 {i % distinct}의 신청 기간은 언제인가요?" for i in range(count)]
+
+
+async def benchmark(args) -> dict:
+    timer = install_fakes(args)
+    transport = httpx.ASGITransport(app=api.app)
+    async with api.app.router.lifespan_context(api.app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            if args.warmup:
+                await run_load(client, args.endpoint, make_questions(args.warmup, 0, prefix="워밍업"),
+                               args.concurrency)
+                timer.reset()
+            latencies, errors, elapsed = await run_load(
+                client, args.endpoint, make_questions(args.requests, args.distinct_questions), args.concurrency
+            )
+
+    return {
+        "commit": current_commit(),
+        "timestamp": datetime.now().isoformat(),
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+        "summary": {
+            "requests": args.requests,
+            "errors": errors,
+            "duration_s": round(elapsed, 3),
+            "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": summarize(latencies),
+        },
+        "stages_ms": {stage: summarize(samples) for stage, samples in timer.samples.items()},
+        "answer_cache": api.answer_cache.stats() if api.answer_cache is not None else None,
+    }
+
+
+def compare(result: dict, baseline_path: str):
+    """이전 결과 파일과 주요 지표를 비교하여 출력합니다."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n비교 기준: {baseline_path} (commit {baseline.get('commit')})")
+    rows = [("rps", baseline["summary"]["rps"], result["summary"]["rps"])]
+    for key in ("p50", "p95", "p99"):
+        rows.append((f"latency {key}", baseline["summary"]["latency_ms"].get(key),
+                     result["summary"]["latency_ms"].get(key)))
+    for name, before, after in rows:
+        if before and after is not None:
+            print(f"  {name:<12} {before:>10} -> {after:>10} ({(after - before) / before * 100:+.1f}%)")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="챗봇 API 오프라인 부하 테스트")
+    parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="chat")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--distinct-questions", type=int, default=0, help="서로 다른 질문 수 (0이면 모두 다름)")
+    parser.add_argument("--answer-cache", action="store_true", help="시맨틱 답변 캐시 사용")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="첫 토큰까지 지연(초)")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--answer-tokens", type=int, default=60)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--corpus-size", type=int, default=500, help="합성 공지 수 (공지당 청크 3개)")
+    parser.add_argument("--search-k", type=int, default=5)
+    parser.add_argument("--fanout", type=int, default=4)
+    parser.add_argument("--output", help="결과 JSON 경로 (기본: benchmarks/results/<시각>.json)")
+    parser.add_argument("--compare", help="비교할 이전 결과 JSON 경로")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = asyncio.run(benchmark(args))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(json.dumps(result["summary"], ensure_ascii=False, indent=2))
+    print(f"결과를 '{output}'에 저장했습니다.")
+    if args.compare:
+        compare(result, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,22 @@
 import pendulum
 import requests
+import httpx
 from bs4 import BeautifulSoup
 import os
+import asyncio
+import random
+import re
+import time
+from datetime import date, timedelta
+from urllib.parse import parse_qs, urlparse
+import hashlib
 import logging
 import subprocess
+import tempfile
+import threading
+from concurrent.futures import CancelledError as FutureCancelledError, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError, as_completed
+from concurrent.futures.process import BrokenProcessPool
 
 from airflow.decorators import dag, task
 
@@ -16,6 +29,10 @@ from pypdf import PdfReader
 from openpyxl import load_workbook
 from docx import Document
 
+# 챗봇 API와 공유하는 표준 라이브러리 전용 모듈 (docker-compose가 app을 PYTHONPATH에 마운트)
+from app.rag.chunking import split_into_chunks
+from app.rag.vectors import shorten_embedding
+
 airflow_home = os.environ.get('AIRFLOW_HOME', '~/airflow')
 dotenv_path = os.path.join(os.path.expanduser(airflow_home), '.env')
 load_dotenv(dotenv_path=dotenv_path)
@@ -25,14 +42,257 @@ NEO4J_URI = os.getenv("NEO4J_URI")
 NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
 NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+CHATBOT_API_URL = os.getenv("CHATBOT_API_URL")  # 예: http://host.docker.internal:8000
+CACHE_INVALIDATION_TOKEN = os.getenv("CACHE_INVALIDATION_TOKEN", "")  # 챗봇 API와 같은 값
+
+# 수집할 게시판 목록: "bbsId:게시판 이름" 을 쉼표로 구분 (예: 학사공지, 장학안내 게시판 bbsId 추가)
+KNUT_BOARDS = os.getenv("KNUT_BOARDS", "BBSMSTR_000000000059:일반소식")
+KNUT_BASE_URL = "https://www.ut.ac.kr"
+# 게시판당 최대 페이지 수 (이력 백필 시 크게 설정), 동시 요청 수, 호스트당 초당 요청 수
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "5"))
+CRAWL_CONCURRENCY = int(os.getenv("CRAWL_CONCURRENCY", "4"))
+CRAWL_REQUESTS_PER_SECOND = float(os.getenv("CRAWL_REQUESTS_PER_SECOND", "2"))
+# 목록 페이지 요청이 일시적으로 실패(연결 오류, 타임아웃, 429/5xx)하면 지수 백오프로 다시 시도하는 횟수와 기본 대기 시간(초)
+CRAWL_PAGE_RETRIES = int(os.getenv("CRAWL_PAGE_RETRIES", "3"))
+CRAWL_RETRY_BASE_DELAY = float(os.getenv("CRAWL_RETRY_BASE_DELAY", "1.0"))
+
+# 적재 방식: 'batch' = 수집 결과를 모아 배치 임베딩/UNWIND 저장, 'per_item' = 공지별 개별 저장
+INGESTION_MODE = os.getenv("INGESTION_MODE", "batch")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+NEO4J_WRITE_BATCH_SIZE = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", "200"))
+
+# 청크 분할 설정 (문자 수 기준)
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "150"))
+
+# 첨부파일 동시 다운로드 수, 파싱 프로세스 수, 파일당 파싱 제한 시간(초)
+ATTACHMENT_DOWNLOAD_WORKERS = int(os.getenv("ATTACHMENT_DOWNLOAD_WORKERS", "4"))
+ATTACHMENT_PARSE_WORKERS = int(os.getenv("ATTACHMENT_PARSE_WORKERS", "2"))
+ATTACHMENT_PARSE_TIMEOUT = int(os.getenv("ATTACHMENT_PARSE_TIMEOUT", "120"))
+
+# 저장 스키마가 바뀌면 값을 올려, 내용이 같은 공지도 한 번 다시 처리되도록 합니다.
+INGESTION_SCHEMA_VERSION = "3"
+# 목록 페이지 탐색 범위(CRAWL_MAX_PAGES) 밖에 있는 예전 스키마의 공지를 실행마다 이 개수만큼 다시 처리합니다.
+SCHEMA_BACKFILL_BATCH_SIZE = int(os.getenv("SCHEMA_BACKFILL_BATCH_SIZE", "200"))
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+DEFAULT_EMBEDDING_DIMENSIONS = 1536
+# 저장할 임베딩 차원. text-embedding-3 모델의 dimensions 옵션으로 짧은 벡터를 받아 float32 벡터 속성으로 저장합니다.
+# 0이면 기본 차원(1536)입니다. 차원을 바꾸면 vector_index_migration DAG로 새 인덱스를 채우고 검증한 뒤 전환합니다.
+EMBEDDING_DIMENSIONS = int(os.getenv("EMBEDDING_DIMENSIONS", "0")) or DEFAULT_EMBEDDING_DIMENSIONS
+
+# 인덱스 마이그레이션: 백필 배치 크기, 재현율 비교에 쓸 질문(공지 제목) 수와 top-k,
+# 새 인덱스의 top-k가 기존 인덱스의 top-k와 평균적으로 이 비율 이상 겹쳐야 활성 인덱스를 전환합니다.
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "500"))
+MIGRATION_SAMPLE_SIZE = int(os.getenv("MIGRATION_SAMPLE_SIZE", "200"))
+MIGRATION_RECALL_K = int(os.getenv("MIGRATION_RECALL_K", "5"))
+MIGRATION_MIN_RECALL = float(os.getenv("MIGRATION_MIN_RECALL", "0.9"))
+# 전환 후 이전 인덱스와 임베딩 속성을 지울지 여부와, 지우기 전에 챗봇 API가 새 포인터를 읽도록 기다리는 시간(초)
+# 기본값은 지우지 않는 것이며, 지운 뒤에는 포인터를 되돌려도 이전 인덱스로 돌아갈 수 없습니다.
+# (대기 시간은 API의 VECTOR_INDEX_REFRESH_SECONDS보다 길게 잡습니다)
+MIGRATION_DROP_PREVIOUS = os.getenv("MIGRATION_DROP_PREVIOUS", "false").lower() == "true"
+MIGRATION_DROP_DELAY_SECONDS = float(os.getenv("MIGRATION_DROP_DELAY_SECONDS", "300"))
+# 챗봇 API의 청크 검색과 같은 값으로, 재현율 비교에서 청크 인덱스를 공지 수의 몇 배만큼 검색할지 정합니다.
+CHUNK_SEARCH_FANOUT = int(os.getenv("CHUNK_SEARCH_FANOUT", "4"))
 
-# 임베딩 모델 전역 초기화
-embeddings = OpenAIEmbeddings(model="text-embedding-3-small", openai_api_key=OPENAI_API_KEY)
+_embedding_models = {}
+
+
+def get_embeddings(dimensions: int) -> OpenAIEmbeddings:
+    """차원별 임베딩 모델을 태스크 프로세스당 하나씩 만들어 재사용합니다."""
+    if dimensions not in _embedding_models:
+        _embedding_models[dimensions] = OpenAIEmbeddings(
+            model=EMBEDDING_MODEL,
+            dimensions=None if dimensions == DEFAULT_EMBEDDING_DIMENSIONS else dimensions,
+            openai_api_key=OPENAI_API_KEY
+        )
+    return _embedding_models[dimensions]
+
+
+_neo4j_driver = None
 
 
 def get_neo4j_driver():
-    """Neo4j 드라이버 인스턴스를 반환합니다."""
-    return GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    """
+    Neo4j 드라이버 인스턴스를 반환합니다.
+    드라이버는 내부적으로 커넥션 풀을 관리하므로 태스크 프로세스당 하나만 만들어 재사용합니다.
+    """
+    global _neo4j_driver
+    if _neo4j_driver is None:
+        _neo4j_driver = GraphDatabase.driver(NEO4J_URI, auth=(NEO4J_USERNAME, NEO4J_PASSWORD))
+    return _neo4j_driver
+
+
+def vector_profile(dimensions: int) -> dict:
+    """
+    차원별 임베딩 속성과 벡터 인덱스 이름.
+    기본 차원은 기존 이름(embedding, announcement_embeddings, chunk_embeddings)을 그대로 사용합니다.
+    """
+    if dimensions == DEFAULT_EMBEDDING_DIMENSIONS:
+        return {"dimensions": dimensions, "embedding_property": "embedding",
+                "announcement_index": "announcement_embeddings", "chunk_index": "chunk_embeddings"}
+    return {"dimensions": dimensions, "embedding_property": f"embedding_{dimensions}",
+            "announcement_index": f"announcement_embeddings_{dimensions}",
+            "chunk_index": f"chunk_embeddings_{dimensions}"}
+
+
+def load_active_profile() -> dict:
+    """챗봇이 검색하는 활성 벡터 인덱스(VectorIndexPointer). 아직 전환한 적이 없으면 기본 차원 인덱스입니다."""
+    with get_neo4j_driver().session() as db_session:
+        record = db_session.run("""
+            MATCH (p:VectorIndexPointer {id: 'active'})
+            RETURN p.dimensions AS dimensions, p.embedding_property AS embedding_property,
+                   p.announcement_index AS announcement_index, p.chunk_index AS chunk_index
+        """).single()
+    return dict(record) if record else vector_profile(DEFAULT_EMBEDDING_DIMENSIONS)
+
+
+def load_target_profiles() -> list[dict]:
+    """
+    적재할 때 임베딩을 저장할 프로필 목록: 활성 인덱스와 EMBEDDING_DIMENSIONS의 인덱스.
+    마이그레이션 중에는 둘이 달라, 새로 수집된 공지도 두 인덱스에 모두 들어갑니다.
+    """
+    active = load_active_profile()
+    target = vector_profile(EMBEDDING_DIMENSIONS)
+    return [active] if target["embedding_property"] == active["embedding_property"] else [active, target]
+
+
+def create_vector_indexes(session, profile: dict):
+    """프로필의 공지/청크 벡터 인덱스를 만듭니다."""
+    for index_name, label in ((profile["announcement_index"], "Announcement"), (profile["chunk_index"], "Chunk")):
+        try:
+            session.run(f"""
+                CREATE VECTOR INDEX {index_name} IF NOT EXISTS
+                FOR (n:{label}) ON (n.{profile["embedding_property"]})
+                OPTIONS {{ indexConfig: {{
+                    `vector.dimensions`: {int(profile["dimensions"])},
+                    `vector.similarity_function`: 'cosine'
+                }}}}
+            """)
+            logging.info(f"Vector index '{index_name}' is ready.")
+        except Exception as e:
+            logging.warning(f"Vector index may already exist: {e}")
+
+
+def chunked(items, size):
+    """리스트를 size 크기의 묶음으로 나눕니다."""
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+# 날짜 표기: 2025.09.01 / 2025-09-01 / 2025. 9. 1. / 2025년 9월 1일
+FULL_DATE_PATTERN = re.compile(r"(20\d{2})\s*[./\-년]\s*(\d{1,2})\s*[./\-월]\s*(\d{1,2})")
+# 기간의 끝 날짜(연도 생략 가능): "~ 9. 20.", "~ 2025.09.20"
+RANGE_END_PATTERN = re.compile(r"[^~∼\n]{0,25}[~∼]\s*(?:(20\d{2})\s*[./\-년]\s*)?(\d{1,2})\s*[./\-월]\s*(\d{1,2})")
+# "9월 20일(금) 18:00까지", "2025.09.20.까지"
+UNTIL_PATTERN = re.compile(
+    r"(?:(20\d{2})\s*[./\-년]\s*)?(\d{1,2})\s*[./\-월]\s*(\d{1,2})\s*일?\.?\s*(?:\([^)]{1,5}\))?\s*"
+    r"(?:\d{1,2}:\d{2}\s*)?까지"
+)
+# 작성 부서로 볼 수 있는 이름 (예: 학생지원과, 컴퓨터공학과, 국제교류센터)
+DEPARTMENT_PATTERN = re.compile(r"^[가-힣A-Za-z·\s]{1,30}(학과|학부|전공|과|팀|처|실|센터|단|원|본부|위원회)$")
+# 공지 상세 페이지에서 메타데이터가 적힌 항목 이름
+DETAIL_LABELS = {
+    "작성자": "department", "작성부서": "department", "담당부서": "department", "부서": "department",
+    "작성일": "posted_at", "등록일": "posted_at", "게시일": "posted_at",
+}
+
+
+def to_date(year, month, day):
+    """연, 월, 일 문자열/정수로 date를 만듭니다. 올바르지 않은 날짜면 None을 반환합니다."""
+    try:
+        return date(int(year), int(month), int(day))
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_post_date(text: str):
+    """문자열에서 첫 번째 날짜(연도 포함)를 찾아 ISO 형식(YYYY-MM-DD)으로 반환합니다."""
+    match = FULL_DATE_PATTERN.search(text or "")
+    parsed = to_date(*match.groups()) if match else None
+    return parsed.isoformat() if parsed else None
+
+
+def parse_row_metadata(row) -> dict:
+    """게시판 목록의 행(tr)에서 작성일과 작성 부서를 추출합니다. 찾지 못한 값은 None입니다."""
+    metadata = {'posted_at': None, 'department': None}
+    for cell in row.find_all('td'):
+        if 'left' in (cell.get('class') or []):
+            continue
+        text = cell.get_text(" ", strip=True)
+        if metadata['posted_at'] is None and FULL_DATE_PATTERN.fullmatch(text.rstrip('.')):
+            metadata['posted_at'] = parse_post_date(text)
+        elif metadata['department'] is None and DEPARTMENT_PATTERN.match(text):
+            metadata['department'] = text
+    return metadata
+
+
+def extract_detail_metadata(soup) -> dict:
+    """공지 상세 페이지의 '작성자', '등록일' 같은 항목에서 작성 부서와 작성일을 추출합니다."""
+    found = {}
+    for label in soup.find_all(['th', 'dt', 'span', 'strong', 'label']):
+        key = DETAIL_LABELS.get(label.get_text(strip=True).rstrip(':').strip())
+        if key is None or key in found:
+            continue
+        value_tag = label.find_next_sibling()
+        value = value_tag.get_text(" ", strip=True) if value_tag else ""
+        if key == "posted_at":
+            value = parse_post_date(value)
+        elif not DEPARTMENT_PATTERN.match(value):
+            value = None
+        if value:
+            found[key] = value
+    return found
+
+
+def extract_deadline(text: str, posted_at=None):
+    """
+    본문에서 신청/접수 기간의 끝 날짜("A ~ B"의 B, "B까지")를 찾아 마감일(ISO 형식)로 반환합니다.
+    연도가 생략된 날짜는 기간 시작일이나 작성일의 연도로 보완하며, 작성일 이후 1년 안의 날짜 중 가장 늦은 날짜를 씁니다.
+    """
+    posted = date.fromisoformat(posted_at) if posted_at else None
+    base_year = posted.year if posted else date.today().year
+    candidates = []
+
+    for start_match in FULL_DATE_PATTERN.finditer(text):
+        start = to_date(*start_match.groups())
+        end_match = RANGE_END_PATTERN.match(text, start_match.end())
+        if start is None or end_match is None:
+            continue
+        year, month, day = end_match.groups()
+        end = to_date(year or start.year, month, day)
+        if end is not None and end < start and not year:
+            end = to_date(start.year + 1, month, day)
+        candidates.append(end)
+
+    for match in UNTIL_PATTERN.finditer(text):
+        year, month, day = match.groups()
+        candidates.append(to_date(year or base_year, month, day))
+
+    lower = posted or date.today() - timedelta(days=365)
+    valid = [candidate for candidate in candidates
+             if candidate is not None and lower <= candidate <= lower + timedelta(days=365)]
+    return max(valid).isoformat() if valid else None
+
+
+def notify_answer_cache_invalidation(urls):
+    """
+    재수집된 공지의 url을 챗봇 API에 알려 해당 공지를 출처로 하는 답변 캐시를 비웁니다.
+    CHATBOT_API_URL이 설정되지 않았거나 API가 응답하지 않아도 파이프라인은 계속 진행합니다.
+    """
+    if not CHATBOT_API_URL or not urls:
+        return
+    try:
+        response = requests.post(
+            f"{CHATBOT_API_URL.rstrip('/')}/api/v1/cache/invalidate",
+            json={"urls": list(urls)},
+            headers={"X-Cache-Invalidation-Token": CACHE_INVALIDATION_TOKEN} if CACHE_INVALIDATION_TOKEN else None,
+            timeout=5
+        )
+        response.raise_for_status()
+        logging.info(f"Answer cache invalidated: {response.json()}")
+    except requests.exceptions.RequestException as e:
+        logging.warning(f"Failed to invalidate chatbot answer cache: {e}")
 
 
 def extract_text_from_file(file_path):
@@ -49,7 +309,8 @@ def extract_text_from_file(file_path):
                 capture_output=True,  # 표준 출력(stdout)과 표준 에러(stderr)를 캡처
                 text=True,  # 결과를 문자열(text)로 디코딩
                 check=True,  # 명령어 실패 시 예외 발생
-                encoding='utf-8'  # UTF-8로 인코딩
+                encoding='utf-8',  # UTF-8로 인코딩
+                timeout=ATTACHMENT_PARSE_TIMEOUT  # 멈춘 변환 프로세스가 태스크를 붙잡지 않도록 제한
             )
             # 캡처된 표준 출력(stdout)을 text 변수에 저장
             text = result.stdout
@@ -74,11 +335,784 @@ def extract_text_from_file(file_path):
         logging.error(f"Command 'hwp5-to-text' not found. Please install it using 'pip install hwp5-to-text'.")
     except subprocess.CalledProcessError as e:
         logging.error(f"hwp5-to-text failed for {file_path}: {e.stderr}")
+    except subprocess.TimeoutExpired:
+        logging.error(f"hwp5-to-text timed out for {file_path}")
     except Exception as e:
         logging.error(f"Error extracting text from {file_path}: {e}")
     return text
 
 
+class AttachmentParser:
+    """
+    첨부파일 파싱용 워커 풀. 태스크 실행마다 하나를 만들어 그 태스크가 가져오는 모든 공지가 함께 쓰며,
+    캐시에 없어 실제로 파싱할 첨부파일이 처음 들어올 때 풀을 띄웁니다.
+    데몬 프로세스 안처럼 자식 프로세스를 만들 수 없는 환경에서는 스레드 풀로 대체합니다.
+    여러 스레드에서 동시에 호출할 수 있으며, 풀을 교체할 때마다 세대(generation)를 올립니다.
+    """
+
+    def __init__(self, workers: int = ATTACHMENT_PARSE_WORKERS):
+        self.workers = workers
+        self.uses_threads = False
+        self.generation = 0
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        if self.uses_threads:
+            return ThreadPoolExecutor(max_workers=self.workers)
+        return ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self, file_path: str):
+        """파싱을 제출하고 (future, 제출한 풀의 세대)를 반환합니다."""
+        with self._lock:
+            if self._executor is None:
+                self._executor = self._start()
+            try:
+                return self._executor.submit(extract_text_from_file, file_path), self.generation
+            except (AssertionError, OSError, RuntimeError) as e:
+                # 프로세스 풀은 첫 submit()에서 워커 프로세스를 띄우므로, 여기서 실패하면 스레드 풀로 바꿉니다.
+                if self.uses_threads:
+                    raise
+                logging.warning(f"Process pool unavailable ({e}), parsing attachments in threads instead.")
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self.uses_threads = True
+                self.generation += 1
+                self._executor = self._start()
+                return self._executor.submit(extract_text_from_file, file_path), self.generation
+
+    def restart(self, generation: int):
+        """
+        제한 시간을 넘긴 파싱을 멈추기 위해 generation 세대의 풀을 버리고, 다음 submit()에서 새 풀을 띄웁니다.
+        다른 스레드가 이미 그 풀을 교체했으면 아무것도 하지 않습니다.
+        프로세스 풀이면 워커 프로세스를 강제 종료합니다. 스레드는 강제로 멈출 수 없으므로 멈춘 스레드는 남겨 두고
+        남은 파일만 새 스레드 풀에서 파싱합니다. (이때 멈춘 파싱을 끊을 수 있는 것은 hwp5-to-text의 subprocess 제한 시간뿐입니다.)
+        """
+        with self._lock:
+            if generation != self.generation or self._executor is None:
+                return
+            executor, self._executor = self._executor, None
+            self.generation += 1
+        processes = list((getattr(executor, "_processes", None) or {}).values())
+        executor.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            if process.is_alive():
+                process.kill()
+                process.join(timeout=5)
+        if processes:
+            logging.warning(f"Killed {len(processes)} attachment parsing worker process(es) after a parse timeout.")
+
+    def close(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def lookup_cached_attachment_text(sha256: str):
+    """파일 내용의 SHA-256으로 이전에 추출해 둔 첨부파일 텍스트를 조회합니다. 없으면 None을 반환합니다."""
+    records, _, _ = get_neo4j_driver().execute_query(
+        "MATCH (f:Attachment {sha256: $sha256}) RETURN f.text AS text", sha256=sha256
+    )
+    return records[0]["text"] if records else None
+
+
+def process_attachments(session, attachments: list[tuple[str, str]], source_url: str, parser: AttachmentParser):
+    """
+    첨부파일들을 동시에 다운로드하고, 다운로드가 끝나는 대로 parser의 워커 풀에서 파싱합니다.
+    파일 내용의 SHA-256으로 Attachment 노드를 조회하여, 이전에 추출한 적 있는 파일은 파싱을 건너뜁니다.
+    파일당 ATTACHMENT_PARSE_TIMEOUT초 안에 파싱되지 않으면 워커를 종료하고 그 파일을 건너뛰며,
+    그 때문에 중단된 나머지 파일은 새 풀에서 다시 파싱합니다.
+    결과는 게시물에 표시된 원래 순서대로 합쳐 반환합니다.
+
+    :return: (합쳐진 첨부파일 텍스트, Attachment 노드로 저장할 레코드 목록)
+    """
+    if not attachments:
+        return "", []
+
+    temp_dir = "/tmp/school_files"
+    os.makedirs(temp_dir, exist_ok=True)
+
+    def download(file_name, file_url):
+        logging.info(f"Downloading file: '{file_name}' from {file_url}")
+        file_response = session.get(file_url)
+        file_response.raise_for_status()
+        data = file_response.content
+        sha256 = hashlib.sha256(data).hexdigest()
+
+        cached_text = lookup_cached_attachment_text(sha256)
+        if cached_text is not None:
+            logging.info(f"Attachment text cache hit: '{file_name}' ({sha256[:12]})")
+            return sha256, None, cached_text
+
+        # 표시 이름이 같은 파일끼리 충돌하지 않도록 고유한 임시 경로에 확장자만 유지하여 저장
+        _, extension = os.path.splitext(file_name)
+        fd, temp_file_path = tempfile.mkstemp(suffix=extension.lower(), dir=temp_dir)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return sha256, temp_file_path, None
+
+    texts = [None] * len(attachments)
+    hashes = [None] * len(attachments)
+    newly_extracted = set()
+    temp_paths = {}
+    try:
+        with ThreadPoolExecutor(max_workers=ATTACHMENT_DOWNLOAD_WORKERS) as download_executor:
+            download_futures = {
+                download_executor.submit(download, file_name, file_url): index
+                for index, (file_name, file_url) in enumerate(attachments)
+            }
+            parse_futures = {}
+            for future in as_completed(download_futures):
+                index = download_futures[future]
+                try:
+                    hashes[index], temp_file_path, cached_text = future.result()
+                    if temp_file_path is None:
+                        texts[index] = cached_text
+                        continue
+                    temp_paths[index] = temp_file_path
+                    parse_futures[index] = parser.submit(temp_file_path)
+                except Exception as file_e:
+                    logging.error(f"Failed to download file {attachments[index][0]} from {source_url}: {file_e}")
+
+        order = list(parse_futures)
+        for index in order:
+            for attempt in range(2):
+                future, generation = parse_futures[index]
+                try:
+                    texts[index] = future.result(timeout=ATTACHMENT_PARSE_TIMEOUT)
+                    newly_extracted.add(index)
+                except FutureTimeoutError:
+                    logging.error(f"Parsing timed out for file {attachments[index][0]} from {source_url}")
+                    # 멈춘 워커를 종료하면 같은 풀의 대기 중인 작업도 함께 실패하며, 그 파일들은 아래에서 새 풀에 다시 넣습니다.
+                    parser.restart(generation)
+                except (BrokenProcessPool, FutureCancelledError):
+                    # 이 공지나 같은 태스크의 다른 공지에서 파싱 시간 초과로 풀을 교체했으면 새 풀에서 한 번 더 파싱합니다.
+                    if attempt == 0:
+                        parse_futures[index] = parser.submit(temp_paths[index])
+                        continue
+                    logging.error(f"Parsing was interrupted twice for file {attachments[index][0]} from {source_url}")
+                except Exception as file_e:
+                    logging.error(f"Failed to process file {attachments[index][0]} from {source_url}: {file_e}")
+                break
+    finally:
+        for temp_file_path in temp_paths.values():
+            try:
+                os.remove(temp_file_path)
+            except OSError:
+                pass
+
+    file_content = ""
+    attachment_records = []
+    for position, ((file_name, _), file_text, sha256) in enumerate(zip(attachments, texts, hashes)):
+        if file_text is None:
+            continue
+        # 깔끔하게 추출된 파일 이름을 사용합니다.
+        file_content += f"\n\n--- 첨부파일: {file_name} ---\n{file_text}"
+        # 추출에 실패해 빈 텍스트가 된 파일은 다음 실행에서 다시 시도하도록 캐시하지 않습니다.
+        if file_text:
+            attachment_records.append({
+                "sha256": sha256, "name": file_name, "position": position,
+                # 캐시에서 가져온 텍스트는 이미 저장되어 있으므로 다시 보내지 않습니다.
+                "text": file_text if position in newly_extracted else None
+            })
+    return file_content, attachment_records
+
+
+def load_ingestion_state(urls: list[str]) -> dict:
+    """
+    이미 저장된 공지들의 content_hash, ETag, Last-Modified 값을 url별로 조회합니다.
+    예전 스키마 버전으로 저장된 공지는 304 응답으로 건너뛰지 않도록 ETag/Last-Modified를 돌려주지 않습니다.
+    """
+    if not urls:
+        return {}
+    driver = get_neo4j_driver()
+    with driver.session() as db_session:
+        result = db_session.run("""
+            MATCH (a:Announcement) WHERE a.url IN $urls
+            WITH a, a.schema_version = $schema_version AS current
+            RETURN a.url AS url, a.content_hash AS content_hash,
+                   CASE WHEN current THEN a.etag END AS etag,
+                   CASE WHEN current THEN a.last_modified END AS last_modified
+        """, urls=urls, schema_version=INGESTION_SCHEMA_VERSION)
+        return {record["url"]: dict(record) for record in result}
+
+
+def compute_content_hash(title: str, content: str, file_params: list[str]) -> str:
+    """제목, 본문, 첨부파일 식별자로 공지 내용의 해시를 계산합니다."""
+    digest = hashlib.sha256()
+    for part in [INGESTION_SCHEMA_VERSION, title, content, *file_params]:
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def fetch_announcement_document(announcement: dict, parser: AttachmentParser):
+    """
+    개별 공지사항 페이지를 파싱하고, 본문과 첨부파일 내용을 추출하여 저장할 문서(dict)를 만듭니다.
+    파일명 추출 로직을 수정하여 정확한 이름만 가져옵니다. 첨부파일은 태스크가 만든 parser로 파싱합니다.
+
+    announcement에 이전 수집 시의 etag/last_modified/content_hash가 있으면 조건부 GET과
+    내용 해시 비교를 수행하고, 변경되지 않은 공지는 첨부파일 다운로드 없이 None을 반환합니다.
+    """
+    url = announcement['url']
+    title = announcement['title']
+    logging.info(f"Processing: {title} ({url})")
+
+    conditional_headers = {}
+    if announcement.get('etag'):
+        conditional_headers['If-None-Match'] = announcement['etag']
+    if announcement.get('last_modified'):
+        conditional_headers['If-Modified-Since'] = announcement['last_modified']
+
+    with requests.Session() as s:
+        response = s.get(url, headers=conditional_headers)
+        if response.status_code == 304:
+            logging.info(f"Not modified (HTTP 304), skipping: {title}")
+            return None
+        response.raise_for_status()
+        soup = BeautifulSoup(response.text, 'html.parser')
+
+        # 본문 내용 추출
+        content_div = soup.select_one('div.bbs-view-content')
+        content = content_div.get_text(separator='\n', strip=True) if content_div else ""
+        detail_metadata = extract_detail_metadata(soup)
+
+        attachment_div = soup.select_one('div.bbs_detail_file')
+        attachment_params = []
+        if attachment_div:
+            for params_div in attachment_div.find_all('div', style="display: none"):
+                attachment_params.append(params_div.get_text(strip=True))
+
+        content_hash = compute_content_hash(title, content, attachment_params)
+        if content_hash == announcement.get('content_hash'):
+            logging.info(f"Content unchanged, skipping: {title}")
+            return None
+
+        # 첨부파일 처리
+        attachments = []
+        if attachment_div:
+            for file_link_tag in attachment_div.find_all('a'):
+                file_params_div = file_link_tag.find_next_sibling('div', style="display: none")
+                if not file_params_div:
+                    continue
+
+                file_params = file_params_div.get_text(strip=True)
+
+                # --- ★★★ 여기가 수정된 부분입니다 ★★★ ---
+                # <a> 태그의 자식 노드 중 첫 번째 요소(텍스트)만 가져와서 공백을 제거합니다.
+                file_name = file_link_tag.contents[0].strip()
+                # ----------------------------------------
+
+                base_download_url = "https://www.ut.ac.kr/cmm/fms/FileDown.do"
+                attachments.append((file_name, f"{base_download_url}{file_params}"))
+
+        if attachments:
+            # 동시 다운로드 수만큼 커넥션을 재사용할 수 있도록 풀 크기를 맞춥니다.
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=ATTACHMENT_DOWNLOAD_WORKERS)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+        file_content, attachment_records = process_attachments(s, attachments, url, parser)
+
+    # 청크는 잘리지 않은 전체 텍스트로 만들고, 문서 단위 임베딩용 full_text만 8000자로 자릅니다.
+    chunks = split_into_chunks(f"본문:\n{content}\n\n첨부파일 내용:\n{file_content}", CHUNK_SIZE, CHUNK_OVERLAP)
+    full_text = f"제목: {title}\n\n본문:\n{content}\n\n첨부파일 내용:\n{file_content}"
+    if len(full_text) > 8000:
+        full_text = full_text[:8000]
+
+    # 작성일과 작성 부서는 목록 페이지 값을 사용하고, 목록에 없을 때(예전 스키마 재수집 등)만 상세 페이지 값으로 채웁니다.
+    # 마감일의 연도 생략 날짜도 이 작성일을 기준으로 해석합니다.
+    posted_at = announcement.get('posted_at') or detail_metadata.get('posted_at')
+    department = announcement.get('department') or detail_metadata.get('department')
+
+    return {
+        "url": url, "title": title, "content": content,
+        "board_id": announcement.get('board_id'), "board_name": announcement.get('board_name'),
+        "ntt_id": announcement.get('ntt_id'),
+        "posted_at": posted_at, "department": department,
+        "deadline": extract_deadline(f"{title}\n{content}", posted_at),
+        "file_content": file_content, "full_text": full_text, "chunks": chunks,
+        "attachments": attachment_records,
+        "content_hash": content_hash,
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified')
+    }
+
+
+def store_documents_in_neo4j(documents: list[dict]):
+    """
+    문서와 그 청크들을 EMBEDDING_BATCH_SIZE 단위의 embed_documents 요청으로 임베딩하고,
+    NEO4J_WRITE_BATCH_SIZE 단위의 UNWIND ... MERGE 트랜잭션으로 저장합니다.
+    청크는 (:Chunk)-[:PART_OF]->(:Announcement) 관계로 연결되며, 기존 청크는 교체됩니다.
+    임베딩은 대상 프로필(활성 인덱스와 마이그레이션 대상) 중 가장 긴 차원으로 한 번 받아 프로필별로 줄인 뒤,
+    db.create.setNodeVectorProperty로 float32 벡터 속성에 저장합니다.
+    게시판과 작성 부서는 (:Announcement)-[:POSTED_IN]->(:Board), (:Announcement)-[:POSTED_BY]->(:Department)로 연결합니다.
+    """
+    if not documents:
+        return
+
+    # 문서 단위 텍스트와 청크 텍스트(제목을 앞에 붙여 문맥 보강)를 한꺼번에 배치 임베딩
+    embedding_targets = []
+    for doc in documents:
+        embedding_targets.append((doc, None, doc["full_text"]))
+        doc["chunk_rows"] = []
+        for index, chunk_text in enumerate(doc.get("chunks", [])):
+            row = {"url": doc["url"], "id": f"{doc['url']}#{index}", "index": index, "text": chunk_text}
+            doc["chunk_rows"].append(row)
+            embedding_targets.append((doc, row, f"제목: {doc['title']}\n{chunk_text}"))
+
+    profiles = load_target_profiles()
+    embeddings = get_embeddings(max(profile["dimensions"] for profile in profiles))
+    for batch in chunked(embedding_targets, EMBEDDING_BATCH_SIZE):
+        vectors = embeddings.embed_documents([text for _, _, text in batch])
+        for (doc, row, _), vector in zip(batch, vectors):
+            (doc if row is None else row)["embeddings"] = {
+                profile["embedding_property"]: shorten_embedding(vector, profile["dimensions"])
+                for profile in profiles
+            }
+
+    def write_batch(tx, rows, chunk_rows, attachment_rows):
+        tx.run("""
+            UNWIND $rows AS row
+            MERGE (a:Announcement {url: row.url})
+            SET a.title = row.title,
+                a.content = row.content,
+                a.file_content = row.file_content,
+                a.full_text = row.full_text,
+                a.board_id = row.board_id,
+                a.board_name = row.board_name,
+                a.ntt_id = row.ntt_id,
+                a.department = row.department,
+                a.posted_at = date(row.posted_at),
+                a.deadline = date(row.deadline),
+                a.content_hash = row.content_hash,
+                a.etag = row.etag,
+                a.last_modified = row.last_modified,
+                a.schema_version = $schema_version,
+                a.createdAt = datetime()
+            WITH a
+            OPTIONAL MATCH (a)-[old_attachment:HAS_ATTACHMENT]->(:Attachment)
+            DELETE old_attachment
+            WITH DISTINCT a
+            OPTIONAL MATCH (a)-[old_metadata:POSTED_IN|POSTED_BY]->()
+            DELETE old_metadata
+            WITH DISTINCT a
+            OPTIONAL MATCH (old:Chunk)-[:PART_OF]->(a)
+            DETACH DELETE old
+        """, rows=rows, schema_version=INGESTION_SCHEMA_VERSION).consume()
+        tx.run("""
+            UNWIND $rows AS row
+            MATCH (a:Announcement {url: row.url})
+            UNWIND keys(row.embeddings) AS property
+            CALL db.create.setNodeVectorProperty(a, property, row.embeddings[property])
+        """, rows=rows).consume()
+        tx.run("""
+            UNWIND $rows AS row
+            MATCH (a:Announcement {url: row.url})
+            FOREACH (_ IN CASE WHEN row.board_id IS NULL THEN [] ELSE [1] END |
+                MERGE (b:Board {id: row.board_id})
+                SET b.name = coalesce(row.board_name, row.board_id)
+                MERGE (a)-[:POSTED_IN]->(b))
+            FOREACH (_ IN CASE WHEN row.department IS NULL THEN [] ELSE [1] END |
+                MERGE (d:Department {name: row.department})
+                MERGE (a)-[:POSTED_BY]->(d))
+        """, rows=rows).consume()
+        tx.run("""
+            UNWIND $chunk_rows AS row
+            MATCH (a:Announcement {url: row.url})
+            MERGE (c:Chunk {id: row.id})
+            SET c.index = row.index,
+                c.text = row.text
+            MERGE (c)-[:PART_OF]->(a)
+            WITH c, row
+            UNWIND keys(row.embeddings) AS property
+            CALL db.create.setNodeVectorProperty(c, property, row.embeddings[property])
+        """, chunk_rows=chunk_rows).consume()
+        tx.run("""
+            UNWIND $attachment_rows AS row
+            MATCH (a:Announcement {url: row.url})
+            MERGE (f:Attachment {sha256: row.sha256})
+            ON CREATE SET f.text = row.text, f.createdAt = datetime()
+            MERGE (a)-[r:HAS_ATTACHMENT]->(f)
+            SET r.name = row.name, r.position = row.position
+        """, attachment_rows=attachment_rows).consume()
+
+    driver = get_neo4j_driver()
+    with driver.session() as db_session:
+        for batch in chunked(documents, NEO4J_WRITE_BATCH_SIZE):
+            rows = [{key: value for key, value in doc.items() if key not in ("chunks", "chunk_rows", "attachments")}
+                    for doc in batch]
+            chunk_rows = [row for doc in batch for row in doc["chunk_rows"]]
+            attachment_rows = [{**attachment, "url": doc["url"]} for doc in batch
+                               for attachment in doc.get("attachments", [])]
+            db_session.execute_write(write_batch, rows, chunk_rows, attachment_rows)
+            logging.info(f"Stored {len(batch)} announcements ({len(chunk_rows)} chunks) in Neo4j.")
+
+    notify_answer_cache_invalidation([doc["url"] for doc in documents])
+
+
+def parse_boards(config: str) -> list[dict]:
+    """KNUT_BOARDS 설정 문자열을 [{'id': bbsId, 'name': 게시판 이름}] 목록으로 변환합니다."""
+    boards = []
+    for item in config.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        board_id, _, name = item.partition(':')
+        boards.append({'id': board_id.strip(), 'name': name.strip() or board_id.strip()})
+    return boards
+
+
+def parse_board_page(html: str, board: dict) -> list[dict]:
+    """
+    게시판 목록 페이지 HTML에서 공지 목록을 추출합니다.
+    고정 공지는 a 태그, 일반 공지는 form 태그로 되어 있어 분기 처리하며, 고정 공지는 pinned=True로 표시합니다.
+    """
+    soup = BeautifulSoup(html, 'html.parser')
+    table_body = soup.select_one('table.basic_table > tbody')
+    if not table_body:
+        return []
+
+    posts = []
+    for row in table_body.find_all('tr'):
+        # 1. 고정 공지 처리 (<a> 태그)
+        notice_link = row.select_one('td.left div.list_subject a')
+        if notice_link:
+            title = notice_link.text.strip()
+            link = notice_link.get('href', '')
+            ntt_id = parse_qs(urlparse(link).query).get('nttId', [None])[0]
+            if title and link:
+                posts.append({'title': title, 'url': requests.compat.urljoin(KNUT_BASE_URL, link),
+                              'ntt_id': ntt_id, 'pinned': True, **parse_row_metadata(row)})
+            continue  # 고정 공지 처리 후 다음 행으로
+
+        # 2. 일반 공지 처리 (<form> 태그)
+        form_tag = row.select_one('td.left div.list_subject form')
+        if form_tag:
+            action_url = form_tag.get('action')
+
+            # form 내부의 모든 input 태그를 딕셔너리로 만듦
+            params = {
+                inp.get('name'): inp.get('value')
+                for inp in form_tag.find_all('input') if inp.get('name')
+            }
+
+            title = params.get('nttSj') or form_tag.select_one('input[type="submit"]').get('value', '').strip()
+
+            if title and action_url and 'nttId' in params:
+                # URL 쿼리 스트링으로 변환 (예: nttId=1234&bbsId=...)
+                query_string = requests.compat.urlencode(params)
+                posts.append({'title': title, 'url': f"{KNUT_BASE_URL}{action_url}?{query_string}",
+                              'ntt_id': params['nttId'], 'pinned': False, **parse_row_metadata(row)})
+
+    for post in posts:
+        post['board_id'] = board['id']
+        post['board_name'] = board['name']
+    return posts
+
+
+class HostRateLimiter:
+    """같은 호스트로 보내는 요청 사이에 최소 간격을 두는 비동기 rate limiter."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._next_time = 0.0
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+def is_retryable_http_error(error: Exception) -> bool:
+    """연결 오류/타임아웃과 429, 5xx 응답만 다시 시도할 가치가 있는 일시적 오류로 봅니다."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(error, httpx.TransportError)
+
+
+async def fetch_documents(announcements: list[dict], parser: AttachmentParser) -> list[dict]:
+    """
+    공지 상세 페이지를 CRAWL_CONCURRENCY개씩 동시에, CRAWL_REQUESTS_PER_SECOND 간격을 지켜 수집해 저장할 문서 목록을 반환합니다.
+    상세 페이지와 첨부파일은 동기 클라이언트로 받으므로 공지마다 스레드에서 처리하고, 첨부파일 파싱은 parser를 함께 씁니다.
+    변경되지 않았거나 수집에 실패한 공지는 결과에서 제외합니다.
+    """
+    semaphore = asyncio.Semaphore(CRAWL_CONCURRENCY)
+    limiter = HostRateLimiter(CRAWL_REQUESTS_PER_SECOND)
+
+    async def fetch(announcement: dict):
+        async with semaphore:
+            await limiter.wait()
+            try:
+                return await asyncio.to_thread(fetch_announcement_document, announcement, parser)
+            except Exception as e:
+                logging.error(f"Failed to process URL {announcement.get('url', 'N/A')}: {e}", exc_info=True)
+                return None
+
+    documents = await asyncio.gather(*(fetch(announcement) for announcement in announcements))
+    return [document for document in documents if document]
+
+
+def load_known_post_ids() -> set:
+    """
+    현재 스키마 버전으로 저장된 공지의 nttId 집합을 조회합니다. nttId 속성이 없는 예전 공지는 url에서 추출합니다.
+    예전 스키마의 공지는 포함하지 않으므로, 그런 공지가 있는 페이지에서는 탐색을 멈추지 않고 다시 수집합니다.
+    """
+    records, _, _ = get_neo4j_driver().execute_query(
+        "MATCH (a:Announcement) WHERE a.schema_version = $schema_version RETURN a.ntt_id AS ntt_id, a.url AS url",
+        schema_version=INGESTION_SCHEMA_VERSION
+    )
+    known = set()
+    for record in records:
+        ntt_id = record["ntt_id"] or parse_qs(urlparse(record["url"]).query).get('nttId', [None])[0]
+        if ntt_id:
+            known.add(ntt_id)
+    return known
+
+
+def load_outdated_announcements(exclude_urls: set, boards: list[dict], limit: int) -> list[dict]:
+    """
+    예전 스키마 버전으로 저장된 공지를 최근 저장 순으로 limit개까지 조회해, 다시 처리할 공지 목록 형식으로 반환합니다.
+    목록 페이지 탐색 범위 밖의 공지도 게시일/부서/마감일 메타데이터와 청크를 갖도록, 실행마다 조금씩 다시 처리합니다.
+    """
+    records, _, _ = get_neo4j_driver().execute_query("""
+        MATCH (a:Announcement)
+        WHERE coalesce(a.schema_version, '') <> $schema_version AND NOT a.url IN $exclude_urls
+        RETURN a.url AS url, a.title AS title, a.ntt_id AS ntt_id, a.board_id AS board_id
+        ORDER BY a.createdAt DESC
+        LIMIT $limit
+    """, schema_version=INGESTION_SCHEMA_VERSION, exclude_urls=list(exclude_urls), limit=limit)
+
+    board_names = {board['id']: board['name'] for board in boards}
+    announcements = []
+    for record in records:
+        query = parse_qs(urlparse(record["url"]).query)
+        board_id = record["board_id"] or query.get('bbsId', [None])[0]
+        announcements.append({
+            'title': record["title"], 'url': record["url"],
+            'ntt_id': record["ntt_id"] or query.get('nttId', [None])[0],
+            'pinned': False, 'board_id': board_id, 'board_name': board_names.get(board_id, board_id),
+        })
+    return announcements
+
+
+async def crawl_boards(boards: list[dict], known_ids: set, max_pages: int = CRAWL_MAX_PAGES) -> list[dict]:
+    """
+    여러 게시판의 목록 페이지를 비동기로 동시에 수집합니다.
+    게시판마다 CRAWL_CONCURRENCY 페이지씩 묶어 동시에 요청하고, 묶음 안에서 새 일반 공지가 하나도 없는
+    페이지를 만나면(이미 수집된 구간에 도달) 그 게시판의 페이지 탐색을 멈춥니다.
+    중복 제거는 nttId 집합으로 합니다.
+    일시적으로 실패한 페이지는 CRAWL_PAGE_RETRIES번까지 다시 요청하고, 그래도 실패하면 예외를 발생시켜
+    실패한 페이지를 '이미 수집된 구간'으로 잘못 보고 이후 페이지를 건너뛰지 않게 합니다.
+    """
+    limiter = HostRateLimiter(CRAWL_REQUESTS_PER_SECOND)
+    seen_ids = set()
+    announcements = []
+
+    limits = httpx.Limits(max_connections=CRAWL_CONCURRENCY, max_keepalive_connections=CRAWL_CONCURRENCY)
+    async with httpx.AsyncClient(limits=limits, timeout=30.0, follow_redirects=True) as client:
+
+        async def fetch_page(board, page_index):
+            board_url = f"{KNUT_BASE_URL}/cop/bbs/{board['id']}/selectBoardList.do"
+            for attempt in range(CRAWL_PAGE_RETRIES + 1):
+                await limiter.wait()
+                try:
+                    response = await client.get(board_url, params={'pageIndex': page_index})
+                    response.raise_for_status()
+                    return parse_board_page(response.text, board)
+                except httpx.HTTPError as e:
+                    if attempt == CRAWL_PAGE_RETRIES or not is_retryable_http_error(e):
+                        raise RuntimeError(f"Failed to retrieve page {page_index} of board {board['id']}: {e}") from e
+                    delay = CRAWL_RETRY_BASE_DELAY * (2 ** attempt) + random.uniform(0, CRAWL_RETRY_BASE_DELAY)
+                    logging.warning(f"Retrying page {page_index} of board {board['id']} in {delay:.1f}s "
+                                    f"({attempt + 1}/{CRAWL_PAGE_RETRIES}): {e}")
+                    await asyncio.sleep(delay)
+
+        async def crawl_board(board):
+            page_index = 1
+            while page_index <= max_pages:
+                window = range(page_index, min(page_index + CRAWL_CONCURRENCY, max_pages + 1))
+                pages = await asyncio.gather(*(fetch_page(board, index) for index in window))
+
+                reached_known = False
+                for posts in pages:
+                    regular_posts = [post for post in posts if not post['pinned']]
+                    for post in posts:
+                        post_key = post['ntt_id'] or post['url']
+                        if post_key not in seen_ids:
+                            seen_ids.add(post_key)
+                            announcements.append(post)
+                    # 빈 페이지(마지막 페이지 이후)이거나 새 일반 공지가 없으면 이후 페이지는 이미 수집된 구간
+                    if not regular_posts or all(post['ntt_id'] in known_ids for post in regular_posts):
+                        reached_known = True
+                        break
+                if reached_known:
+                    break
+                page_index += len(window)
+            logging.info(f"Crawled board {board['name']} ({board['id']}) up to page {page_index}.")
+
+        await asyncio.gather(*(crawl_board(board) for board in boards))
+
+    return announcements
+
+
+# 마이그레이션 백필: 대상 속성이 비어 있는 노드를 배치로 읽어, 활성 속성의 벡터를 줄이거나(차원이 충분하면) 새로 임베딩합니다.
+BACKFILL_READ_QUERIES = {
+    "Announcement": """
+        MATCH (n:Announcement)
+        WHERE n[$target] IS NULL AND n.full_text <> ''
+        RETURN n.url AS key, n[$source] AS source, n.full_text AS text
+        LIMIT $limit
+    """,
+    "Chunk": """
+        MATCH (n:Chunk)-[:PART_OF]->(a:Announcement)
+        WHERE n[$target] IS NULL AND n.text <> ''
+        RETURN n.id AS key, n[$source] AS source, '제목: ' + a.title + '\\n' + n.text AS text
+        LIMIT $limit
+    """,
+}
+
+BACKFILL_WRITE_QUERIES = {
+    "Announcement": """
+        UNWIND $rows AS row
+        MATCH (n:Announcement {url: row.key})
+        CALL db.create.setNodeVectorProperty(n, $target, row.embedding)
+    """,
+    "Chunk": """
+        UNWIND $rows AS row
+        MATCH (n:Chunk {id: row.key})
+        CALL db.create.setNodeVectorProperty(n, $target, row.embedding)
+    """,
+}
+
+# 여러 질문을 한 인덱스로 검색하여 질문(i)별 공지 url을 점수 순으로 반환합니다. 청크 인덱스는 부모 공지 url로 바꿉니다.
+RECALL_SEARCH_QUERY = """
+UNWIND range(0, size($embeddings) - 1) AS i
+CALL db.index.vector.queryNodes($index, $k, $embeddings[i]) YIELD node, score
+OPTIONAL MATCH (node)-[:PART_OF]->(parent:Announcement)
+RETURN i, coalesce(parent.url, node.url) AS url, score
+ORDER BY i, score DESC
+"""
+
+
+def backfill_vector_property(label: str, source: dict, target: dict) -> int:
+    """label 노드들의 target 프로필 벡터 속성을 채우고, 채운 노드 수를 반환합니다."""
+    filled = 0
+    driver = get_neo4j_driver()
+    with driver.session() as db_session:
+        while True:
+            records = list(db_session.run(BACKFILL_READ_QUERIES[label], target=target["embedding_property"],
+                                          source=source["embedding_property"], limit=MIGRATION_BATCH_SIZE))
+            if not records:
+                return filled
+
+            rows, to_embed = [], []
+            for record in records:
+                vector = record["source"]
+                if vector is not None and len(vector) >= target["dimensions"]:
+                    rows.append({"key": record["key"], "embedding": shorten_embedding(list(vector), target["dimensions"])})
+                else:
+                    to_embed.append(record)
+            embeddings = get_embeddings(target["dimensions"])
+            for batch in chunked(to_embed, EMBEDDING_BATCH_SIZE):
+                vectors = embeddings.embed_documents([record["text"] for record in batch])
+                rows.extend({"key": record["key"], "embedding": vector} for record, vector in zip(batch, vectors))
+
+            db_session.execute_write(
+                lambda tx: tx.run(BACKFILL_WRITE_QUERIES[label], rows=rows,
+                                  target=target["embedding_property"]).consume()
+            )
+            filled += len(rows)
+            logging.info(f"Backfilled {filled} {label} nodes into '{target['embedding_property']}'.")
+
+
+def search_vector_index(index_name: str, embeddings: list[list[float]], k: int, fanout: int) -> list[list[str]]:
+    """질문별 상위 k개 공지 url (청크 인덱스는 fanout배를 검색해 공지 단위로 묶습니다)."""
+    with get_neo4j_driver().session() as db_session:
+        records = list(db_session.run(RECALL_SEARCH_QUERY, index=index_name, k=k * fanout, embeddings=embeddings))
+    results = [[] for _ in embeddings]
+    for record in records:
+        urls = results[record["i"]]
+        if record["url"] not in urls and len(urls) < k:
+            urls.append(record["url"])
+    return results
+
+
+def measure_recall(active: dict, target: dict, sample_size: int = MIGRATION_SAMPLE_SIZE,
+                   k: int = MIGRATION_RECALL_K) -> dict:
+    """
+    공지 제목을 질문으로 삼아 활성 인덱스와 새 인덱스의 검색 결과를 비교합니다.
+    - overlap: 새 인덱스 top-k가 활성 인덱스 top-k를 되찾은 비율 (활성 인덱스 대비 재현율)
+    - self_recall: 제목의 원래 공지가 top-k 안에 들어온 비율 (인덱스별)
+    - vector_bytes: 공지/청크 벡터를 float32로 저장했을 때의 크기 추정치 (인덱스별)
+    """
+    with get_neo4j_driver().session() as db_session:
+        records = list(db_session.run(
+            "MATCH (a:Announcement) WHERE a.title IS NOT NULL RETURN a.url AS url, a.title AS title ORDER BY a.url"
+        ))
+        counts = db_session.run("""
+            MATCH (a:Announcement) WITH count(a) AS announcements
+            OPTIONAL MATCH (c:Chunk) RETURN announcements, count(c) AS chunks
+        """).single()
+    sample = random.Random(0).sample(records, min(sample_size, len(records)))
+    if not sample:
+        return {}
+
+    # 두 인덱스 중 긴 차원으로 한 번 임베딩하고, 각 인덱스 차원으로 줄여 검색합니다.
+    dimensions = max(active["dimensions"], target["dimensions"])
+    vectors = get_embeddings(dimensions).embed_documents([record["title"] for record in sample])
+    vector_count = counts["announcements"] + counts["chunks"]
+
+    result = {"sample_size": len(sample), "k": k}
+    for kind, fanout in (("announcement", 1), ("chunk", CHUNK_SEARCH_FANOUT)):
+        found = {}
+        for name, profile in (("active", active), ("target", target)):
+            found[name] = search_vector_index(profile[f"{kind}_index"],
+                                              [shorten_embedding(vector, profile["dimensions"]) for vector in vectors],
+                                              k, fanout)
+        overlaps = [len(set(new) & set(old)) / len(old) for new, old in zip(found["target"], found["active"]) if old]
+        result[f"{kind}_overlap"] = round(sum(overlaps) / len(overlaps), 4) if overlaps else 0.0
+        for name in ("active", "target"):
+            hits = sum(record["url"] in urls for record, urls in zip(sample, found[name]))
+            result[f"{kind}_self_recall_{name}"] = round(hits / len(sample), 4)
+    for name, profile in (("active", active), ("target", target)):
+        result[f"vector_bytes_{name}"] = vector_count * profile["dimensions"] * 4
+    return result
+
+
+def drop_vector_profile(profile: dict):
+    """프로필의 공지/청크 벡터 인덱스를 지우고, 노드의 임베딩 속성을 MIGRATION_BATCH_SIZE개씩 제거합니다."""
+    embedding_property = profile["embedding_property"]
+    with get_neo4j_driver().session() as db_session:
+        for index_name in (profile["announcement_index"], profile["chunk_index"]):
+            db_session.run(f"DROP INDEX {index_name} IF EXISTS").consume()
+            logging.info(f"Dropped vector index '{index_name}'.")
+
+        for label in ("Announcement", "Chunk"):
+            removed = 0
+            while True:
+                count = db_session.execute_write(lambda tx: tx.run(f"""
+                    MATCH (n:{label}) WHERE n.`{embedding_property}` IS NOT NULL
+                    WITH n LIMIT $limit
+                    REMOVE n.`{embedding_property}`
+                    RETURN count(n) AS removed
+                """, limit=MIGRATION_BATCH_SIZE).single()["removed"])
+                if not count:
+                    break
+                removed += count
+            logging.info(f"Removed '{embedding_property}' from {removed} {label} nodes.")
+
+
 @dag(
     dag_id='knut_announcement_pipeline',
     start_date=pendulum.datetime(2024, 5, 20, tz="Asia/Seoul"),
@@ -89,192 +1123,240 @@ def extract_text_from_file(file_path):
 def school_announcement_pipeline_neo4j():
     @task
     def setup_database_constraints():
-        """Neo4j에 제약조건과 벡터 인덱스를 생성합니다."""
+        """Neo4j에 제약조건, 벡터 인덱스, 전문(full-text) 인덱스를 생성합니다."""
         logging.info("Setting up Neo4j constraints and vector index...")
         driver = get_neo4j_driver()
         with driver.session() as session:
             session.run("CREATE CONSTRAINT announcement_url IF NOT EXISTS FOR (a:Announcement) REQUIRE a.url IS UNIQUE")
+            session.run("CREATE CONSTRAINT chunk_id IF NOT EXISTS FOR (c:Chunk) REQUIRE c.id IS UNIQUE")
+            session.run("CREATE CONSTRAINT attachment_sha256 IF NOT EXISTS FOR (f:Attachment) REQUIRE f.sha256 IS UNIQUE")
+            # 평가 테스트셋의 증분 생성과 벡터 미러 동기화가 createdAt 범위 조회를 사용합니다.
+            session.run("CREATE INDEX announcement_created_at IF NOT EXISTS FOR (a:Announcement) ON (a.createdAt)")
+            # 챗봇의 날짜/부서/게시판 조건 검색과 목록 질문이 사용하는 메타데이터 인덱스
+            session.run("CREATE INDEX announcement_posted_at IF NOT EXISTS FOR (a:Announcement) ON (a.posted_at)")
+            session.run("CREATE INDEX announcement_deadline IF NOT EXISTS FOR (a:Announcement) ON (a.deadline)")
+            session.run("CREATE CONSTRAINT board_id IF NOT EXISTS FOR (b:Board) REQUIRE b.id IS UNIQUE")
+            session.run("CREATE CONSTRAINT department_name IF NOT EXISTS FOR (d:Department) REQUIRE d.name IS UNIQUE")
 
-            try:
-                session.run("""
-                    CREATE VECTOR INDEX announcement_embeddings IF NOT EXISTS
-                    FOR (a:Announcement) ON (a.embedding)
-                    OPTIONS { indexConfig: {
-                        `vector.dimensions`: 1536,
-                        `vector.similarity_function`: 'cosine'
-                    }}
-                """)
-                logging.info("Vector index 'announcement_embeddings' is ready.")
-            except Exception as e:
-                logging.warning(f"Vector index may already exist: {e}")
-        driver.close()
+            # 활성 인덱스와 EMBEDDING_DIMENSIONS의 인덱스(마이그레이션 대상)를 모두 유지합니다.
+            for profile in load_target_profiles():
+                create_vector_indexes(session, profile)
+
+            session.run("""
+                CREATE FULLTEXT INDEX announcement_fulltext IF NOT EXISTS
+                FOR (a:Announcement) ON EACH [a.title, a.full_text]
+                OPTIONS { indexConfig: { `fulltext.analyzer`: 'cjk' } }
+            """)
+            logging.info("Full-text index 'announcement_fulltext' is ready.")
 
     @task
     def scrape_announcements() -> list[dict]:
         """
-        국립한국교통대학교 일반소식 게시판을 스크래핑하여
+        KNUT_BOARDS에 설정된 게시판들을 비동기로 페이지를 넘기며 스크래핑하여
         올바른 상세 페이지 URL을 생성하는 태스크.
         """
-        BASE_URL = "https://www.ut.ac.kr"
-        BOARD_URL = f"{BASE_URL}/cop/bbs/BBSMSTR_000000000059/selectBoardList.do"
-
-        logging.info(f"Scraping started for: {BOARD_URL}")
+        boards = parse_boards(KNUT_BOARDS)
+        logging.info(f"Scraping started for boards: {[board['name'] for board in boards]}")
 
         try:
-            response = requests.get(BOARD_URL)
-            response.raise_for_status()
-            soup = BeautifulSoup(response.text, 'html.parser')
-            announcements = []
-
-            table_body = soup.select_one('table.basic_table > tbody')
-            if not table_body:
-                logging.warning("Could not find the announcement table body.")
-                return []
-
-            for row in table_body.find_all('tr'):
-                # 고정 공지는 a 태그, 일반 공지는 form 태그로 되어 있어 분기 처리
-
-                # 1. 고정 공지 처리 (<a> 태그)
-                notice_link = row.select_one('td.left div.list_subject a')
-                if notice_link:
-                    title = notice_link.text.strip()
-                    link = notice_link.get('href', '')
-
-                    if title and link:
-                        full_link = requests.compat.urljoin(BASE_URL, link)
-                        # 중복 추가 방지
-                        if not any(ann['url'] == full_link for ann in announcements):
-                            announcements.append({'title': title, 'url': full_link})
-                    continue  # 고정 공지 처리 후 다음 행으로
-
-                # 2. 일반 공지 처리 (<form> 태그)
-                form_tag = row.select_one('td.left div.list_subject form')
-                if form_tag:
-                    action_url = form_tag.get('action')
-
-                    # form 내부의 모든 input 태그를 딕셔너리로 만듦
-                    params = {
-                        inp.get('name'): inp.get('value')
-                        for inp in form_tag.find_all('input') if inp.get('name')
-                    }
-
-                    title = params.get('nttSj') or form_tag.select_one('input[type="submit"]').get('value', '').strip()
-
-                    if title and action_url and 'nttId' in params:
-                        # URL 쿼리 스트링으로 변환 (예: nttId=1234&bbsId=...)
-                        query_string = requests.compat.urlencode(params)
-                        # 완전한 URL 조립
-                        full_link = f"{BASE_URL}{action_url}?{query_string}"
-
-                        if not any(ann['url'] == full_link for ann in announcements):
-                            announcements.append({'title': title, 'url': full_link})
+            known_ids = load_known_post_ids()
+        except Exception as e:
+            logging.warning(f"Could not load known post ids, crawling up to CRAWL_MAX_PAGES: {e}")
+            known_ids = set()
 
+        try:
+            announcements = asyncio.run(crawl_boards(boards, known_ids))
             logging.info(f"Scraped {len(announcements)} announcements.")
             # 디버깅을 위해 추출된 URL 중 하나를 로그로 출력
             if announcements:
                 logging.info(f"Example URL: {announcements[0]['url']}")
-
             return announcements
 
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to retrieve the webpage {BOARD_URL}. Error: {e}")
-            return []
         except Exception as e:
+            # 일부 페이지만 수집된 결과로 진행하면 빠진 공지가 다음 실행에서도 '이미 수집된 구간'에 가려질 수 있으므로,
+            # 태스크를 실패시켜 Airflow 재시도로 다시 수집합니다.
             logging.error(f"An error occurred during scraping: {e}", exc_info=True)
-            return []
+            raise
+
+    @task
+    def include_outdated_announcements(announcements: list[dict]) -> list[dict]:
+        """
+        INGESTION_SCHEMA_VERSION을 올린 뒤 목록 페이지 탐색으로는 다시 만나지 않는 예전 공지를
+        SCHEMA_BACKFILL_BATCH_SIZE개씩 수집 대상에 더하는 태스크. 모두 현재 스키마로 저장되면 더할 공지가 없습니다.
+        """
+        if SCHEMA_BACKFILL_BATCH_SIZE <= 0:
+            return announcements
+        outdated = load_outdated_announcements(
+            {ann['url'] for ann in announcements}, parse_boards(KNUT_BOARDS), SCHEMA_BACKFILL_BATCH_SIZE
+        )
+        if outdated:
+            logging.info(f"Re-ingesting {len(outdated)} announcements stored with an older schema version.")
+        return announcements + outdated
+
+    @task
+    def attach_ingestion_state(announcements: list[dict]) -> list[dict]:
+        """
+        스크래핑된 공지 목록에 이전 수집 상태(content_hash, etag, last_modified)를 붙이는 태스크.
+        한 번의 쿼리로 조회하여 이후 태스크들이 변경되지 않은 공지를 건너뛸 수 있게 합니다.
+        """
+        state = load_ingestion_state([ann['url'] for ann in announcements])
+        logging.info(f"{len(state)} of {len(announcements)} announcements were ingested before.")
+        return [{**ann, **state.get(ann['url'], {})} for ann in announcements]
 
     @task
     def process_and_store_in_neo4j(announcement: dict):
         """
-        개별 공지사항 페이지를 파싱하고, 본문과 첨부파일 내용을 추출하여 Neo4j에 저장하는 태스크.
-        파일명 추출 로직을 수정하여 정확한 이름만 가져옵니다.
+        개별 공지사항을 수집하여 곧바로 Neo4j에 저장하는 태스크 (INGESTION_MODE=per_item).
         """
         try:
-            url = announcement['url']
-            title = announcement['title']
-            logging.info(f"Processing: {title} ({url})")
-
-            with requests.Session() as s:
-                response = s.get(url)
-                response.raise_for_status()
-                soup = BeautifulSoup(response.text, 'html.parser')
-
-                # 본문 내용 추출
-                content_div = soup.select_one('div.bbs-view-content')
-                content = content_div.get_text(separator='\n', strip=True) if content_div else ""
-
-                # 첨부파일 처리
-                file_content = ""
-                temp_dir = "/tmp/school_files"
-                os.makedirs(temp_dir, exist_ok=True)
-
-                attachment_div = soup.select_one('div.bbs_detail_file')
-                if attachment_div:
-                    for file_link_tag in attachment_div.find_all('a'):
-                        file_params_div = file_link_tag.find_next_sibling('div', style="display: none")
-                        if not file_params_div:
-                            continue
-
-                        file_params = file_params_div.get_text(strip=True)
-
-                        # --- ★★★ 여기가 수정된 부분입니다 ★★★ ---
-                        # <a> 태그의 자식 노드 중 첫 번째 요소(텍스트)만 가져와서 공백을 제거합니다.
-                        file_name = file_link_tag.contents[0].strip()
-                        # ----------------------------------------
-
-                        base_download_url = "https://www.ut.ac.kr/cmm/fms/FileDown.do"
-                        full_file_url = f"{base_download_url}{file_params}"
-
-                        logging.info(f"Downloading file: '{file_name}' from {full_file_url}")
-
-                        try:
-                            file_response = s.get(full_file_url)
-                            file_response.raise_for_status()
-
-                            temp_file_path = os.path.join(temp_dir, file_name)
-                            with open(temp_file_path, 'wb') as f:
-                                f.write(file_response.content)
-
-                            file_text = extract_text_from_file(temp_file_path)
-                            # 깔끔하게 추출된 파일 이름을 사용합니다.
-                            file_content += f"\n\n--- 첨부파일: {file_name} ---\n{file_text}"
-
-                            os.remove(temp_file_path)
-                        except Exception as file_e:
-                            logging.error(f"Failed to process file {file_name} from {url}: {file_e}")
-
-                # 임베딩 및 DB 저장
-                full_text = f"제목: {title}\n\n본문:\n{content}\n\n첨부파일 내용:\n{file_content}"
-                if len(full_text) > 8000:
-                    full_text = full_text[:8000]
-
-                embedding_vector = embeddings.embed_query(full_text)
-
-                driver = get_neo4j_driver()
-                with driver.session() as db_session:
-                    db_session.run("""
-                        MERGE (a:Announcement {url: $url})
-                        SET a.title = $title,
-                            a.content = $content,
-                            a.file_content = $file_content,
-                            a.full_text = $full_text,
-                            a.embedding = $embedding,
-                            a.createdAt = datetime()
-                    """, {
-                        "url": url, "title": title, "content": content,
-                        "file_content": file_content, "full_text": full_text, "embedding": embedding_vector
-                    })
-                driver.close()
-                logging.info(f"Successfully stored in Neo4j: {title}")
-
+            with AttachmentParser() as parser:
+                document = fetch_announcement_document(announcement, parser)
+            if document is None:
+                return
+            store_documents_in_neo4j([document])
+            logging.info(f"Successfully stored in Neo4j: {document['title']}")
         except Exception as e:
             logging.error(f"Failed to process URL {announcement.get('url', 'N/A')}: {e}", exc_info=True)
 
+    @task
+    def ingest_announcements_batch(announcements: list[dict]) -> int:
+        """
+        공지사항을 한 태스크에서 동시에 수집하고, NEO4J_WRITE_BATCH_SIZE개씩 배치 임베딩 후 일괄 저장하는 태스크 (INGESTION_MODE=batch).
+        문서는 태스크 안에서 바로 저장하므로 XCom에는 공지 목록과 저장한 개수만 오갑니다.
+        """
+        stored = 0
+        with AttachmentParser() as parser:
+            for batch in chunked(announcements, NEO4J_WRITE_BATCH_SIZE):
+                documents = asyncio.run(fetch_documents(batch, parser))
+                store_documents_in_neo4j(documents)
+                stored += len(documents)
+        logging.info(f"Stored {stored} new or changed announcements in batch mode.")
+        return stored
+
     # 태스크 실행 순서 정의
     setup_task = setup_database_constraints()
-    scraped_list = scrape_announcements()
+    scraped_list = attach_ingestion_state(include_outdated_announcements(scrape_announcements()))
     setup_task >> scraped_list
-    process_and_store_in_neo4j.expand(announcement=scraped_list)
+    if INGESTION_MODE == "per_item":
+        process_and_store_in_neo4j.expand(announcement=scraped_list)
+    else:
+        ingest_announcements_batch(scraped_list)
+
+
+school_announcement_pipeline_neo4j()
+
+
+@dag(
+    dag_id='knut_vector_index_migration',
+    start_date=pendulum.datetime(2024, 5, 20, tz="Asia/Seoul"),
+    schedule=None,
+    catchup=False,
+    tags=['knut', 'chatbot', 'neo4j'],
+)
+def vector_index_migration():
+    """
+    EMBEDDING_DIMENSIONS 차원의 벡터 인덱스를 기존 인덱스 옆에 만들어 채우고, 재현율을 비교한 뒤
+    기준(MIGRATION_MIN_RECALL)을 넘으면 활성 인덱스 포인터를 한 트랜잭션으로 전환합니다. (수동 실행)
+    기본적으로 기존 인덱스와 속성은 그대로 두므로, 포인터를 되돌리면 바로 이전 인덱스로 돌아갈 수 있습니다.
+    MIGRATION_DROP_PREVIOUS=true이면 전환한 경우에만 MIGRATION_DROP_DELAY_SECONDS 뒤 이전 인덱스와 임베딩 속성을 지웁니다.
+    """
+
+    @task
+    def create_target_indexes() -> dict:
+        target = vector_profile(EMBEDDING_DIMENSIONS)
+        with get_neo4j_driver().session() as session:
+            create_vector_indexes(session, target)
+        return target
+
+    @task
+    def backfill_embeddings(target: dict) -> dict:
+        """새 속성이 비어 있는 공지와 청크를 채웁니다. 활성 벡터가 더 길면 API 호출 없이 줄여서 저장합니다."""
+        active = load_active_profile()
+        return {label: backfill_vector_property(label, active, target) for label in ("Announcement", "Chunk")}
+
+    @task
+    def await_target_indexes(target: dict, backfilled: dict) -> dict:
+        logging.info(f"Backfilled: {backfilled}")
+        with get_neo4j_driver().session() as session:
+            for index_name in (target["announcement_index"], target["chunk_index"]):
+                session.run("CALL db.awaitIndex($name, 3600)", name=index_name).consume()
+        return target
+
+    @task
+    def compare_recall(target: dict) -> dict:
+        """활성 인덱스와 새 인덱스의 재현율/저장 크기를 비교해 VectorIndexMigration 노드에 기록합니다."""
+        active = load_active_profile()
+        if active["embedding_property"] == target["embedding_property"]:
+            logging.info("Target index is already active; nothing to compare.")
+            return {}
+        result = measure_recall(active, target)
+        logging.info(f"Recall comparison {active['dimensions']} -> {target['dimensions']} dims: {result}")
+        with get_neo4j_driver().session() as session:
+            session.run("""
+                CREATE (m:VectorIndexMigration)
+                SET m = $result, m.from_dimensions = $from_dimensions, m.to_dimensions = $to_dimensions,
+                    m.measuredAt = datetime()
+            """, result=result, from_dimensions=active["dimensions"], to_dimensions=target["dimensions"]).consume()
+        return result
+
+    @task
+    def switch_active_index(target: dict, result: dict):
+        """
+        재현율이 기준 이상이면 활성 인덱스 포인터를 새 인덱스로 바꿉니다. 챗봇은 다음 포인터 갱신부터 새 인덱스를 검색합니다.
+        전환했으면 이전 프로필을, 이미 새 인덱스가 활성이면 None을 반환합니다.
+        """
+        if not result:
+            return None
+        recall = min(result["announcement_overlap"], result["chunk_overlap"])
+        if recall < MIGRATION_MIN_RECALL:
+            raise ValueError(f"Recall {recall} is below MIGRATION_MIN_RECALL ({MIGRATION_MIN_RECALL}); "
+                             f"keeping the current index active.")
+        previous = load_active_profile()
+        with get_neo4j_driver().session() as session:
+            session.execute_write(lambda tx: tx.run("""
+                MERGE (p:VectorIndexPointer {id: 'active'})
+                SET p.previous_dimensions = p.dimensions,
+                    p.previous_embedding_property = p.embedding_property,
+                    p.dimensions = $dimensions,
+                    p.embedding_property = $embedding_property,
+                    p.announcement_index = $announcement_index,
+                    p.chunk_index = $chunk_index,
+                    p.switchedAt = datetime()
+            """, **target).consume())
+        logging.info(f"Active vector index switched to {target}.")
+        return previous
+
+    @task.sensor(poke_interval=60, timeout=MIGRATION_DROP_DELAY_SECONDS + 3600, mode="reschedule")
+    def await_pointer_refresh(previous) -> bool:
+        """
+        포인터를 전환한 지 MIGRATION_DROP_DELAY_SECONDS가 지나 챗봇 API가 새 인덱스를 검색할 때까지 기다립니다.
+        reschedule 모드라 기다리는 동안 워커 슬롯을 차지하지 않습니다. 지울 인덱스가 없으면 바로 통과합니다.
+        """
+        if not previous or not MIGRATION_DROP_PREVIOUS:
+            return True
+        with get_neo4j_driver().session() as session:
+            record = session.run(
+                "MATCH (p:VectorIndexPointer {id: 'active'}) RETURN p.switchedAt.epochSeconds AS switched"
+            ).single()
+        return record is None or time.time() - record["switched"] >= MIGRATION_DROP_DELAY_SECONDS
+
+    @task
+    def drop_previous_index(previous):
+        """
+        전환 전의 인덱스와 임베딩 속성을 지웁니다(MIGRATION_DROP_PREVIOUS=true일 때만).
+        재현율 기준을 넘지 못하면 switch_active_index가 실패하므로 실행되지 않습니다.
+        """
+        if not previous or not MIGRATION_DROP_PREVIOUS:
+            logging.info("Keeping the previous vector index.")
+            return
+        if previous["embedding_property"] == load_active_profile()["embedding_property"]:
+            raise ValueError(f"Refusing to drop the active vector index {previous}.")
+        drop_vector_profile(previous)
+
+    target = create_target_indexes()
+    ready = await_target_indexes(target, backfill_embeddings(target))
+    previous = switch_active_index(ready, compare_recall(ready))
+    await_pointer_refresh(previous) >> drop_previous_index(previous)
 
 
-school_announcement_pipeline_neo4j()
\ No newline at end of file
+vector_index_migration()
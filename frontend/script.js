@@ -11,6 +11,7 @@ document.addEventListener('DOMContentLoaded', () => {
     // API 엔드포인트
     const API_BASE_URL = 'http://localhost:8000/api/v1';
     const CHAT_URL = `${API_BASE_URL}/chat`;
+    const CHAT_STREAM_URL = `${API_BASE_URL}/chat/stream`;
     const EVAL_START_URL = `${API_BASE_URL}/evaluate`;
     const EVAL_STATUS_URL = `${API_BASE_URL}/evaluate/status`;
 
@@ -30,23 +31,55 @@ document.addEventListener('DOMContentLoaded', () => {
             textNode.textContent = text;
             messageElement.appendChild(textNode);
 
-            if (sources.length > 0) {
-                const sourcesElement = document.createElement('div');
-                sourcesElement.classList.add('sources');
-                let sourcesHTML = '<strong>출처:</strong><ul>';
-                sources.forEach(source => {
-                    sourcesHTML += `<li><a href="${source.url}" target="_blank">${source.title}</a></li>`;
-                });
-                sourcesHTML += '</ul>';
-                sourcesElement.innerHTML = sourcesHTML;
-                messageElement.appendChild(sourcesElement);
-            }
+            renderSources(messageElement, sources);
         }
         chatWindow.appendChild(messageElement);
         chatWindow.scrollTop = chatWindow.scrollHeight; // 항상 아래로 스크롤
         return messageElement;
     }
 
+    // 메시지 요소 아래에 출처 목록을 표시하는 함수
+    function renderSources(messageElement, sources) {
+        if (!sources || sources.length === 0) return;
+
+        const sourcesElement = document.createElement('div');
+        sourcesElement.classList.add('sources');
+        let sourcesHTML = '<strong>출처:</strong><ul>';
+        sources.forEach(source => {
+            sourcesHTML += `<li><a href="${source.url}" target="_blank">${source.title}</a></li>`;
+        });
+        sourcesHTML += '</ul>';
+        sourcesElement.innerHTML = sourcesHTML;
+        messageElement.appendChild(sourcesElement);
+    }
+
+    // SSE 스트림을 읽어 이벤트 단위로 콜백을 호출하는 함수
+    async function readEventStream(response, onEvent) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder('utf-8');
+        let buffer = '';
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+
+                let eventName = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                onEvent(eventName, data ? JSON.parse(data) : null);
+            }
+        }
+    }
+
     // 챗봇 폼 제출 이벤트 처리
     chatForm.addEventListener('submit', async (e) => {
         e.preventDefault();
@@ -58,23 +91,45 @@ document.addEventListener('DOMContentLoaded', () => {
         const loadingMessage = addMessage('', 'bot', true);
 
         try {
-            const response = await fetch(CHAT_URL, {
+            const response = await fetch(CHAT_STREAM_URL, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
                 body: JSON.stringify({ question: userMessage }),
             });
 
-            chatWindow.removeChild(loadingMessage); // 로딩 메시지 제거
-
             if (!response.ok) {
+                chatWindow.removeChild(loadingMessage); // 로딩 메시지 제거
                 const errorData = await response.json();
                 throw new Error(errorData.detail || '서버에서 오류가 발생했습니다.');
             }
 
-            const data = await response.json();
-            addMessage(data.answer, 'bot', false, data.sources);
+            // 첫 이벤트가 도착하면 로딩 메시지를 답변 메시지로 교체하고 토큰을 이어 붙임
+            let botMessage = null;
+            let answerNode = null;
+            const ensureBotMessage = () => {
+                if (botMessage) return;
+                chatWindow.removeChild(loadingMessage);
+                botMessage = addMessage('', 'bot');
+                answerNode = botMessage.firstChild;
+            };
+
+            await readEventStream(response, (eventName, data) => {
+                if (eventName === 'sources') {
+                    ensureBotMessage();
+                    renderSources(botMessage, data);
+                } else if (eventName === 'token') {
+                    ensureBotMessage();
+                    answerNode.textContent += data;
+                    chatWindow.scrollTop = chatWindow.scrollHeight;
+                } else if (eventName === 'error') {
+                    throw new Error(data.detail || '서버에서 오류가 발생했습니다.');
+                }
+            });
+
+            ensureBotMessage();
         } catch (error) {
             console.error('Chat Error:', error);
+            if (loadingMessage.parentNode) chatWindow.removeChild(loadingMessage);
             addMessage(`오류가 발생했습니다: ${error.message}`, 'bot');
         }
     });
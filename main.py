@@ -1,13 +1,52 @@
+import argparse
+import os
+import shutil
+
 import uvicorn
 import logging
 
+from app.config import settings
+
 logging.basicConfig(level=logging.INFO)
 
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="한국교통대학교 챗봇 API 서버")
+    parser.add_argument("--prod", action="store_true",
+                        help="운영 모드: 코드 자동 리로드 없이 여러 워커 프로세스로 실행합니다.")
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS,
+                        help="운영 모드의 워커 수 (기본: API_WORKERS, 0이면 CPU 코어 수)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    uvicorn.run(
-        "app.api:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
-        log_level="info"
-    )
\ No newline at end of file
+    args = parse_args()
+    if args.prod:
+        # 워커끼리는 메모리를 공유하지 않으므로, 평가 작업 상태는 SQLite 작업 저장소로,
+        # 답변 캐시 무효화 요청은 SQLite 무효화 기록으로 공유합니다. (답변 캐시 자체는 워커마다 따로 둡니다)
+        # 메트릭도 prometheus_client 멀티프로세스 모드로 워커별 파일에 기록하고 /metrics에서 합칩니다.
+        # (이전 실행의 파일이 남아 있으면 값이 섞이므로 시작할 때 비웁니다)
+        metrics_dir = os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", os.path.join(settings.CACHE_DIR, "prometheus"))
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+        os.makedirs(metrics_dir, exist_ok=True)
+        workers = args.workers or os.cpu_count() or 1
+        # OpenAI 요청 한도는 워커마다 따로 적용되므로, 각 워커가 한도를 워커 수로 나눈 몫만 쓰도록 알려 줍니다.
+        os.environ["OPENAI_LIMIT_WORKERS"] = str(workers)
+        uvicorn.run(
+            "app.api:app",
+            host=args.host,
+            port=args.port,
+            workers=workers,
+            log_level="info",
+            timeout_graceful_shutdown=30
+        )
+    else:
+        uvicorn.run(
+            "app.api:app",
+            host=args.host,
+            port=args.port,
+            reload=True,
+            log_level="info"
+        )
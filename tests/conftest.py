@@ -0,0 +1,7 @@
+import os
+import tempfile
+
+# app.config.settings와 OpenAI 클라이언트가 import 시점에 읽는 환경 변수. 실제 API는 호출하지 않습니다.
+os.environ.setdefault("OPENAI_API_KEY", "sk-test")
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="knut_chatbot_test_"))
+os.environ.setdefault("WARMUP_ON_STARTUP", "false")
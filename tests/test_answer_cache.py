@@ -0,0 +1,151 @@
+import asyncio
+
+import pytest
+
+from app.rag.cache import InvalidationLog, SemanticAnswerCache, extract_numbers, normalize_question
+
+
+class FakeEmbeddings:
+    """질문별로 정해 둔 벡터를 돌려주는 임베딩. 등록하지 않은 질문은 조회에 실패합니다."""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+        self.calls = 0
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        return self.vectors[text]
+
+
+def payload(answer, *urls):
+    return {"answer": answer, "sources": [{"url": url} for url in urls]}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("app.rag.cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def test_normalize_question_ignores_spacing_case_and_trailing_punctuation():
+    assert normalize_question("  수강신청  기간은 언제야?? ") == "수강신청 기간은 언제야"
+    assert normalize_question("KNUT 도서관") == normalize_question("knut 도서관!")
+
+
+def test_extract_numbers_is_order_and_zero_padding_insensitive():
+    assert extract_numbers("2024년 03월 1학기") == ("1", "2024", "3")
+    assert extract_numbers("1학기 2024년 3월") == ("1", "2024", "3")
+    assert extract_numbers("등록금 납부 기간") == ()
+
+
+def test_exact_hit_skips_embedding():
+    embeddings = FakeEmbeddings({})
+    cache = SemanticAnswerCache(embeddings)
+    cache.put("수강신청 기간은?", None, payload("3월"))
+
+    cached, embedding = asyncio.run(cache.alookup("수강신청   기간은"))
+
+    assert cached == payload("3월")
+    assert embedding is None
+    assert embeddings.calls == 0
+    assert cache.stats()["exact_hits"] == 1
+
+
+def test_semantic_hit_requires_threshold():
+    embeddings = FakeEmbeddings({"수강 신청 언제": [0.99, 0.14], "기숙사 신청": [0.0, 1.0]})
+    cache = SemanticAnswerCache(embeddings, similarity_threshold=0.95)
+    cache.put("수강신청 기간", [1.0, 0.0], payload("3월"))
+
+    hit, embedding = asyncio.run(cache.alookup("수강 신청 언제"))
+    miss, _ = asyncio.run(cache.alookup("기숙사 신청"))
+
+    assert hit == payload("3월")
+    assert embedding == [0.99, 0.14]
+    assert miss is None
+    assert cache.stats()["semantic_hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_semantic_hit_requires_same_numbers():
+    vector = [1.0, 0.0]
+    embeddings = FakeEmbeddings({"2학기 등록금 납부 기간": vector, "1학기 등록금 납부 기간은": vector})
+    cache = SemanticAnswerCache(embeddings, similarity_threshold=0.9)
+    cache.put("1학기 등록금 납부 기간", vector, payload("2월"))
+
+    assert asyncio.run(cache.alookup("2학기 등록금 납부 기간"))[0] is None
+    assert asyncio.run(cache.alookup("1학기 등록금 납부 기간은"))[0] == payload("2월")
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = SemanticAnswerCache(FakeEmbeddings({}), ttl_seconds=60)
+    cache.put("학사일정", [1.0, 0.0], payload("일정"))
+
+    clock[0] += 59
+    assert cache.lookup_by_embedding("학사일정", [1.0, 0.0]) == payload("일정")
+    clock[0] += 2
+    assert cache.lookup_by_embedding("학사일정", [1.0, 0.0]) is None
+    assert len(cache) == 0
+
+
+def test_lru_evicts_least_recently_used():
+    cache = SemanticAnswerCache(FakeEmbeddings({}), max_entries=2)
+    cache.put("a", None, payload("A"))
+    cache.put("b", None, payload("B"))
+    assert cache.lookup_by_embedding("a", [1.0]) == payload("A")  # a를 최근 사용으로 갱신
+
+    cache.put("c", None, payload("C"))
+
+    assert len(cache) == 2
+    assert cache.lookup_by_embedding("a", [1.0]) == payload("A")
+    assert cache.lookup_by_embedding("c", [1.0]) == payload("C")
+    assert cache.lookup_by_embedding("b", [1.0]) is None
+
+
+def test_invalidate_sources_removes_entries_citing_the_url():
+    cache = SemanticAnswerCache(FakeEmbeddings({}))
+    cache.put("장학금", [1.0, 0.0], payload("장학", "https://example.com/1"))
+    cache.put("기숙사", [0.0, 1.0], payload("기숙사", "https://example.com/2"))
+
+    assert cache.invalidate_sources(["https://example.com/1"]) == 1
+    assert cache.lookup_by_embedding("장학금", [1.0, 0.0]) is None
+    assert cache.lookup_by_embedding("기숙사", [0.0, 1.0]) == payload("기숙사", "https://example.com/2")
+
+
+def test_invalidation_log_is_shared_between_caches(tmp_path):
+    path = str(tmp_path / "invalidations.sqlite3")
+    first = SemanticAnswerCache(FakeEmbeddings({}), invalidation_log=InvalidationLog(path))
+    second = SemanticAnswerCache(FakeEmbeddings({}), invalidation_log=InvalidationLog(path))
+    for cache in (first, second):
+        cache.put("장학금", [1.0, 0.0], payload("장학", "https://example.com/1"))
+
+    assert first.invalidate_sources(["https://example.com/1"]) == 1
+
+    # 다른 워커의 캐시는 다음 조회 때 공유 기록을 읽어 같은 항목을 지웁니다.
+    assert second.lookup_by_embedding("장학금", [1.0, 0.0]) is None
+    assert second.stats()["applied_invalidation_id"] == first.stats()["applied_invalidation_id"]
+
+
+def test_shared_invalidations_are_polled_at_most_once_per_interval(tmp_path):
+    path = str(tmp_path / "invalidations.sqlite3")
+    first = SemanticAnswerCache(FakeEmbeddings({}), invalidation_log=InvalidationLog(path))
+    second = SemanticAnswerCache(FakeEmbeddings({}), invalidation_log=InvalidationLog(path),
+                                 invalidation_poll_seconds=60)
+    for cache in (first, second):
+        cache.put("장학금", [1.0, 0.0], payload("장학", "https://example.com/1"))
+    assert second.lookup_by_embedding("장학금", [1.0, 0.0]) == payload("장학", "https://example.com/1")
+
+    first.invalidate_sources(["https://example.com/1"])
+
+    # 방금 기록을 읽었으므로 간격이 지나기 전까지는 공유 기록을 다시 읽지 않습니다.
+    assert second.lookup_by_embedding("장학금", [1.0, 0.0]) == payload("장학", "https://example.com/1")
+    assert second.invalidate_sources([]) == 1
+
+
+def test_cache_ignores_invalidations_recorded_before_it_started(tmp_path):
+    log = InvalidationLog(str(tmp_path / "invalidations.sqlite3"))
+    log.append(["https://example.com/1"])
+    cache = SemanticAnswerCache(FakeEmbeddings({}), invalidation_log=log)
+    cache.put("장학금", [1.0, 0.0], payload("장학", "https://example.com/1"))
+
+    assert cache.lookup_by_embedding("장학금", [1.0, 0.0]) == payload("장학", "https://example.com/1")
@@ -0,0 +1,38 @@
+from app.rag.chunking import split_into_chunks
+
+
+def test_short_text_is_a_single_chunk():
+    assert split_into_chunks("본문:\n  첫 줄  \n\n둘째 줄", chunk_size=100, overlap=10) == ["본문:\n첫 줄\n둘째 줄"]
+
+
+def test_empty_text_has_no_chunks():
+    assert split_into_chunks("", chunk_size=100, overlap=10) == []
+    assert split_into_chunks("\n  \n", chunk_size=100, overlap=10) == []
+
+
+def test_chunks_respect_size_and_overlap():
+    lines = [f"{index:02d}" + "가" * 18 for index in range(20)]
+    chunks = split_into_chunks("\n".join(lines), chunk_size=100, overlap=30)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    # 다음 청크는 앞 청크의 끝 overlap 글자로 시작합니다.
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.startswith(previous[-30:])
+    # 모든 줄이 어느 청크엔가 들어 있습니다.
+    assert all(any(line in chunk for chunk in chunks) for line in lines)
+
+
+def test_long_line_is_split_with_overlap():
+    line = "".join(chr(ord("가") + index) for index in range(250))
+    chunks = split_into_chunks(line, chunk_size=100, overlap=20)
+
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0] == line[:100]
+    assert chunks[1].startswith(line[80:100])
+    assert chunks[-1].endswith(line[-20:])
+
+
+def test_zero_overlap_does_not_repeat_text():
+    lines = ["a" * 40, "b" * 40, "c" * 40]
+    assert split_into_chunks("\n".join(lines), chunk_size=90, overlap=0) == ["a" * 40 + "\n" + "b" * 40, "c" * 40]
@@ -0,0 +1,78 @@
+import pytest
+from langchain_core.documents import Document
+
+from app.rag.context import ContextPacker
+
+
+@pytest.fixture
+def packer():
+    # 토크나이저 파일을 내려받지 않도록 글자 수 추정(1.5자당 1토큰)을 사용합니다.
+    packer = ContextPacker(model="gpt-4o", max_tokens=400, min_score=0.5, near_duplicate_threshold=0.85,
+                           use_tokenizer=False)
+    packer.load_encoding()
+    return packer
+
+
+def doc(text, source, score=0.9):
+    return Document(page_content=text, metadata={"source": source, "score": score})
+
+
+def test_drops_low_score_and_duplicates(packer):
+    documents = [
+        doc("장학금 신청은 3월 2일부터 3월 15일까지 학생지원과에서 받습니다.", "u1"),
+        doc("같은 공지의 다른 청크", "u1"),
+        doc("장학금 신청은 3월 2일부터 3월 15일까지 학생지원과에서 받습니다.", "u2"),
+        doc("기숙사 입사 신청 안내", "u3", score=0.2),
+        doc("수강신청 정정 기간은 3월 4일부터 3월 8일까지입니다.", "u4"),
+    ]
+
+    packed = packer.pack(documents)
+
+    assert [document.metadata["source"] for document in packed] == ["u1", "u4"]
+    assert packer.stats()["documents_in"] == 5
+    assert packer.stats()["documents_out"] == 2
+
+
+def test_drops_near_duplicates(packer):
+    base = "2025학년도 1학기 국가장학금 2차 신청 안내. 신청 기간은 3월 2일부터 3월 15일까지이며 한국장학재단 홈페이지에서 신청합니다."
+    packed = packer.pack([doc(base, "u1"), doc(base + " 문의: 학생지원과", "u2")])
+
+    assert [document.metadata["source"] for document in packed] == ["u1"]
+
+
+def test_keeps_retrieval_order_within_budget(packer):
+    documents = [doc(f"{index}번 공지 " + "가" * 150, f"u{index}") for index in range(3)]
+
+    packed = packer.pack(documents)
+
+    assert [document.metadata["source"] for document in packed] == ["u0", "u1", "u2"]
+    assert sum(packer.count_tokens(document.page_content) for document in packed) <= packer.max_tokens
+
+
+def test_truncates_document_that_exceeds_remaining_budget(packer):
+    first = doc("첫 공지 " + "가" * 300, "u1")
+    second = doc("둘째 공지 첫 문단\n\n" + "나" * 600, "u2")
+
+    packed = packer.pack([first, second])
+
+    assert len(packed) == 2
+    assert packed[1].metadata["truncated"] is True
+    assert packed[1].page_content.startswith("둘째 공지 첫 문단")
+    assert sum(packer.count_tokens(document.page_content) for document in packed) <= packer.max_tokens + 1
+
+
+def test_drops_document_when_too_little_budget_remains(packer):
+    documents = [doc("가" * 540, "u1"), doc("나" * 300, "u2")]
+
+    packed = packer.pack(documents)
+
+    assert [document.metadata["source"] for document in packed] == ["u1"]
+
+
+def test_stats_track_saved_tokens(packer):
+    packer.pack([doc("가" * 30, "u1"), doc("가" * 30, "u1")])
+
+    stats = packer.stats()
+    assert stats["tokens_in"] == 40
+    assert stats["tokens_out"] == 20
+    assert stats["tokens_saved"] == 20
@@ -0,0 +1,48 @@
+import asyncio
+import sqlite3
+
+from app.rag.embedding import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts):
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def test_disk_cache_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    underlying = CountingEmbeddings()
+    CachedEmbeddings(underlying, "model", cache_path=path).embed_query("수강 신청")
+
+    second = CachedEmbeddings(underlying, "model", cache_path=path)
+    assert asyncio.run(second.aembed_query("수강   신청")) == [5.0, 1.0]
+    assert underlying.calls == 1
+    assert second.stats()["disk_hits"] == 1
+
+
+def test_locked_disk_cache_falls_back_to_memory(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    cache = CachedEmbeddings(CountingEmbeddings(), "model", cache_path=path, db_timeout=0.05)
+    # 다른 워커가 쓰기 잠금을 잡고 있는 상황
+    other = sqlite3.connect(path)
+    other.execute("BEGIN EXCLUSIVE")
+    try:
+        assert asyncio.run(cache.aembed_documents(["a", "bb"])) == [[1.0, 1.0], [2.0, 1.0]]
+        assert asyncio.run(cache.aembed_query("bb")) == [2.0, 1.0]
+    finally:
+        other.rollback()
+        other.close()
+    assert cache.stats()["memory_hits"] == 1
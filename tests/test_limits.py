@@ -0,0 +1,168 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from app.config import settings
+from app.limits.admission import AdmissionController, Overloaded
+from app.limits.outbound import (OutboundRateLimiter, OutboundRateLimitTimeout, RateLimitedTransport,
+                                 estimate_request_tokens)
+
+
+# --- OutboundRateLimiter ---
+
+def drain(limiter, priority, tokens=1):
+    """기다리지 않고 꺼낼 수 있는 만큼 요청을 꺼내고 그 수를 반환합니다."""
+    count = 0
+    while True:
+        try:
+            limiter.acquire_sync(priority, tokens, max_wait=0)
+        except OutboundRateLimitTimeout:
+            return count
+        count += 1
+
+
+def test_timeout_is_a_dedicated_httpx_timeout():
+    limiter = OutboundRateLimiter(requests_per_minute=1, tokens_per_minute=0)
+    limiter.acquire_sync("interactive", 1, max_wait=0)
+
+    with pytest.raises(OutboundRateLimitTimeout) as error:
+        asyncio.run(limiter.acquire("interactive", 1, max_wait=0.1))
+    assert isinstance(error.value, httpx.TimeoutException)
+    assert limiter.stats()["waiting"] == {"interactive": 0, "background": 0}
+
+
+def test_background_only_uses_its_share():
+    limiter = OutboundRateLimiter(requests_per_minute=10, tokens_per_minute=0, background_share=0.5)
+
+    assert drain(limiter, "background") == 5
+    # 남은 몫은 채팅(interactive) 요청이 씁니다.
+    assert drain(limiter, "interactive") == 5
+
+
+def test_background_yields_to_waiting_interactive_requests():
+    limiter = OutboundRateLimiter(requests_per_minute=10, tokens_per_minute=0, background_share=1.0)
+    limiter._waiting["interactive"] = 1
+
+    assert drain(limiter, "background") == 0
+    limiter._waiting["interactive"] = 0
+    assert drain(limiter, "background") == 10
+
+
+def test_token_budget_limits_large_requests():
+    limiter = OutboundRateLimiter(requests_per_minute=0, tokens_per_minute=1000)
+
+    assert drain(limiter, "interactive", tokens=300) == 3
+
+
+def test_budget_is_split_between_workers():
+    limiter = OutboundRateLimiter(requests_per_minute=60, tokens_per_minute=0, workers=3)
+
+    assert drain(limiter, "interactive") == 20
+
+
+def test_pause_blocks_all_requests():
+    limiter = OutboundRateLimiter(requests_per_minute=100, tokens_per_minute=0)
+    limiter.pause(10)
+
+    assert drain(limiter, "interactive") == 0
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_estimate_request_tokens():
+    chat = httpx.Request("POST", "https://api.openai.com/v1/chat/completions", content=json.dumps({
+        "messages": [{"role": "user", "content": "가" * 30}], "max_tokens": 100,
+    }).encode())
+    embeddings = httpx.Request("POST", "https://api.openai.com/v1/embeddings", content=json.dumps({
+        "input": ["가" * 15, [1, 2, 3]],
+    }).encode())
+
+    assert estimate_request_tokens(chat) == 20 + 100
+    assert estimate_request_tokens(embeddings) == 10 + 3
+
+
+def test_transport_retries_429(monkeypatch):
+    monkeypatch.setattr(settings, "OPENAI_RATE_LIMIT_BASE_DELAY", 0.01)
+    responses = [httpx.Response(429, headers={"retry-after-ms": "1"}), httpx.Response(200, json={"ok": True})]
+    limiter = OutboundRateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    transport = RateLimitedTransport(limiter, "interactive", max_retries=2)
+    transport._transport = httpx.MockTransport(lambda request: responses.pop(0))
+
+    with httpx.Client(transport=transport) as client:
+        response = client.post("https://api.openai.com/v1/embeddings", json={"input": "질문"})
+
+    assert response.status_code == 200
+    assert limiter.stats()["rate_limited"] == 1
+    assert limiter.stats()["acquired"]["interactive"] == 2
+
+
+# --- AdmissionController ---
+
+def test_admission_queues_then_admits():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+        first = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        waiting = controller.stats()["waiting"]
+        first.release()
+        second = await waiter
+        second.release()
+        return waiting, controller.stats()
+
+    waiting, stats = asyncio.run(scenario())
+
+    assert waiting == 1
+    assert stats["active"] == 0
+    assert stats["admitted"] == 2
+
+
+def test_admission_rejects_when_queue_is_full():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=1.0)
+        ticket = await controller.acquire()
+        waiter = asyncio.ensure_future(controller.acquire())
+        await asyncio.sleep(0.01)
+        with pytest.raises(Overloaded) as error:
+            await controller.acquire()
+        ticket.release()
+        (await waiter).release()
+        return error.value, controller.stats()
+
+    error, stats = asyncio.run(scenario())
+
+    assert error.reason == "queue_full"
+    assert error.retry_after == 1
+    assert stats["rejected"] == {"queue_full": 1, "timeout": 0}
+
+
+def test_admission_times_out_in_queue():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+        async with controller.admit():
+            with pytest.raises(Overloaded) as error:
+                await controller.acquire()
+        return error.value, controller.stats()
+
+    error, stats = asyncio.run(scenario())
+
+    assert error.reason == "timeout"
+    assert stats["waiting"] == 0
+    assert stats["active"] == 0
+    assert stats["rejected"]["timeout"] == 1
+
+
+def test_ticket_release_is_idempotent():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=0.05)
+        ticket = await controller.acquire()
+        ticket.release()
+        ticket.release()
+        # 슬롯이 한 번만 반납되었으므로 두 요청이 동시에 들어올 수는 없습니다.
+        await controller.acquire()
+        with pytest.raises(Overloaded):
+            await controller.acquire()
+        return controller.stats()
+
+    assert asyncio.run(scenario())["active"] == 1
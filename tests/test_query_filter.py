@@ -0,0 +1,88 @@
+from datetime import date
+
+import pytest
+
+from app.graph.query_filter import QueryFilter, parse_query_filter
+
+# 2025-09-17은 수요일입니다.
+TODAY = date(2025, 9, 17)
+DEPARTMENTS = ["학생지원과", "컴퓨터공학과", "공학과", "국제교류센터"]
+BOARDS = ["일반소식", "장학안내"]
+
+
+def parse(question):
+    return parse_query_filter(question, DEPARTMENTS, BOARDS, today=TODAY)
+
+
+@pytest.mark.parametrize("question, expected", [
+    ("오늘 올라온 공지", (date(2025, 9, 17), date(2025, 9, 17))),
+    ("어제 게시된 공지 알려줘", (date(2025, 9, 16), date(2025, 9, 16))),
+    ("이번 주 공지 보여줘", (date(2025, 9, 15), date(2025, 9, 17))),
+    ("지난주 올라온 공지", (date(2025, 9, 8), date(2025, 9, 14))),
+    ("지난달 공지사항", (date(2025, 8, 1), date(2025, 8, 31))),
+    ("최근 7일 공지", (date(2025, 9, 10), date(2025, 9, 17))),
+    ("3월 공지 목록", (date(2025, 3, 1), date(2025, 3, 31))),
+    ("11월 공지 목록", (date(2024, 11, 1), date(2024, 11, 30))),
+    ("2024년 2월 공지", (date(2024, 2, 1), date(2024, 2, 29))),
+])
+def test_posting_date_ranges(question, expected):
+    query_filter = parse(question)
+
+    assert (query_filter.date_from, query_filter.date_to) == expected
+    assert query_filter.is_listing
+
+
+def test_date_without_posting_cue_is_not_a_filter():
+    query_filter = parse("이번 주 금요일까지 내야 하는 서류는?")
+
+    assert query_filter.is_empty()
+    assert not query_filter.is_listing
+
+
+def test_specific_day_is_not_a_month_filter():
+    assert parse("9월 20일 공지").date_from is None
+
+
+def test_deadline_conditions():
+    closing_soon = parse("마감 임박 공지")
+    open_only = parse("아직 마감 전인 장학 공지")
+
+    assert (closing_soon.deadline_from, closing_soon.deadline_to) == (TODAY, date(2025, 9, 24))
+    assert (open_only.deadline_from, open_only.deadline_to) == (TODAY, None)
+    assert open_only.board == "장학안내"
+
+
+def test_longest_department_name_wins():
+    query_filter = parse("컴퓨터공학과 공지 알려줘")
+
+    assert query_filter.department == "컴퓨터공학과"
+    assert query_filter.is_listing
+
+
+def test_name_stem_needs_a_cue_word():
+    assert parse("장학 공지 보여줘").board == "장학안내"
+    assert parse("장학금은 얼마야?").board is None
+
+
+def test_question_with_topic_is_not_listing():
+    query_filter = parse("학생지원과 기숙사 신청 방법")
+
+    assert query_filter.department == "학생지원과"
+    assert not query_filter.is_listing
+
+
+def test_match_clause_uses_relationships_and_date_parameters():
+    query_filter = parse("지난주 학생지원과 공지 중 마감 전인 것")
+
+    clause, parameters = query_filter.match_clause("a")
+
+    assert "(a)-[:POSTED_BY]->(:Department {name: $department})" in clause
+    assert "a.posted_at >= date($date_from)" in clause
+    assert "a.deadline >= date($deadline_from)" in clause
+    assert parameters == {"department": "학생지원과", "date_from": "2025-09-08", "date_to": "2025-09-14",
+                          "deadline_from": "2025-09-17"}
+    assert query_filter.describe() == "지난주 게시, 마감 전, 학생지원과"
+
+
+def test_empty_filter_matches_all_announcements():
+    assert QueryFilter().match_clause() == ("MATCH (a:Announcement)", {})
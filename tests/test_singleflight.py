@@ -0,0 +1,137 @@
+import asyncio
+
+import pytest
+
+from app.rag.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    async def scenario():
+        flight = SingleFlight()
+        calls = 0
+        release = asyncio.Event()
+
+        async def work():
+            nonlocal calls
+            calls += 1
+            await release.wait()
+            return "answer"
+
+        waiters = [asyncio.ensure_future(flight.do("질문", work)) for _ in range(3)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters)
+        return flight, calls, results
+
+    flight, calls, results = asyncio.run(scenario())
+
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 3
+    assert [leader for _, leader in results] == [True, False, False]
+    assert flight.stats() == {"in_flight": 0, "executions": {"invoke": 1, "stream": 0},
+                              "coalesced": {"invoke": 2, "stream": 0}}
+
+
+def test_different_keys_and_later_calls_run_again():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work(key):
+            calls.append(key)
+            return key
+
+        await asyncio.gather(flight.do("a", lambda: work("a")), flight.do("b", lambda: work("b")))
+        await flight.do("a", lambda: work("a"))
+        return calls
+
+    assert asyncio.run(scenario()) == ["a", "b", "a"]
+
+
+def test_error_is_shared_and_key_is_released():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0)
+            raise RuntimeError("boom")
+
+        results = await asyncio.gather(flight.do("q", fail), flight.do("q", fail), return_exceptions=True)
+
+        async def succeed():
+            return "ok"
+
+        return results, await flight.do("q", succeed)
+
+    results, retried = asyncio.run(scenario())
+
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert retried == ("ok", True)
+
+
+def test_cancelled_leader_does_not_cancel_followers():
+    async def scenario():
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def work():
+            await release.wait()
+            return "answer"
+
+        leader = asyncio.ensure_future(flight.do("q", work))
+        follower = asyncio.ensure_future(flight.do("q", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+        return await follower, leader
+
+    (result, leader_flag), leader = asyncio.run(scenario())
+
+    assert result == "answer"
+    assert leader_flag is False
+    assert leader.cancelled()
+
+
+def test_stream_subscribers_receive_every_item():
+    async def scenario():
+        flight = SingleFlight()
+        step = asyncio.Event()
+
+        async def tokens():
+            yield "안"
+            await step.wait()
+            yield "녕"
+
+        async def collect(iterator):
+            return [item async for item in iterator]
+
+        first, first_leader = flight.stream("q", tokens)
+        first_task = asyncio.ensure_future(collect(first))
+        await asyncio.sleep(0.01)
+        # 첫 항목이 나온 뒤에 합류한 구독자도 처음부터 받습니다.
+        second, second_leader = flight.stream("q", tokens)
+        second_task = asyncio.ensure_future(collect(second))
+        step.set()
+        return await first_task, await second_task, first_leader, second_leader, flight
+
+    first, second, first_leader, second_leader, flight = asyncio.run(scenario())
+
+    assert first == second == ["안", "녕"]
+    assert (first_leader, second_leader) == (True, False)
+    assert flight.stats()["executions"]["stream"] == 1
+    assert flight.stats()["coalesced"]["stream"] == 1
+
+
+def test_stream_error_reaches_subscribers():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def tokens():
+            yield "a"
+            raise ValueError("stream failed")
+
+        iterator, _ = flight.stream("q", tokens)
+        return [item async for item in iterator]
+
+    with pytest.raises(ValueError, match="stream failed"):
+        asyncio.run(scenario())
@@ -0,0 +1,77 @@
+import os
+
+import pytest
+
+from app.graph import vector_mirror
+from app.graph.vector_mirror import URL_SET_QUERY, VectorIndexMirror
+
+
+class Record(dict):
+    def data(self):
+        return dict(self)
+
+
+class FakeDriver:
+    """변경된 공지 쿼리에는 since 이후의 announcements를, url 목록 쿼리에는 현재 url들을 돌려주는 드라이버."""
+
+    def __init__(self):
+        self.announcements = {}
+
+    def put(self, url, embedding, created):
+        self.announcements[url] = Record(url=url, title=url, text=url, chunk_index=0,
+                                         embedding=embedding, created=created)
+
+    def execute_query(self, query, parameters=None):
+        if query == URL_SET_QUERY:
+            return [Record(url=url) for url in self.announcements], None, None
+        since = parameters["since"]
+        return [record for record in self.announcements.values() if record["created"] > since], None, None
+
+
+@pytest.fixture
+def driver(monkeypatch):
+    driver = FakeDriver()
+    monkeypatch.setattr(vector_mirror.graph_driver, "get_neo4j_driver", lambda: driver)
+    return driver
+
+
+def urls(mirror, embedding):
+    return [row["url"] for row in mirror.search(embedding, 10)]
+
+
+def test_incremental_sync_replaces_changed_and_drops_deleted(tmp_path, driver):
+    mirror = VectorIndexMirror(str(tmp_path))
+    driver.put("a", [1.0, 0.0], 1)
+    driver.put("b", [0.0, 1.0], 2)
+    assert mirror.sync() == 2
+
+    driver.put("a", [0.0, 1.0], 3)
+    del driver.announcements["b"]
+    assert mirror.sync() == 2
+
+    assert urls(mirror, [0.0, 1.0]) == ["a"]
+    assert mirror.sync() == 0
+
+
+def test_previous_generation_is_kept_for_one_sync(tmp_path, driver):
+    mirror = VectorIndexMirror(str(tmp_path))
+    for created in (1, 2, 3):
+        driver.put(f"u{created}", [1.0, 0.0], created)
+        mirror.sync()
+
+    files = sorted(name for name in os.listdir(tmp_path) if name.endswith(".f32"))
+    assert files == ["document_vectors_2.f32", "document_vectors_3.f32"]
+
+
+def test_other_worker_picks_up_new_generations(tmp_path, driver):
+    writer = VectorIndexMirror(str(tmp_path))
+    reader = VectorIndexMirror(str(tmp_path))
+    driver.put("a", [1.0, 0.0], 1)
+    writer.sync()
+    assert urls(reader, [1.0, 0.0]) == ["a"]
+
+    for created in (2, 3, 4):
+        driver.put(f"u{created}", [1.0, 0.0], created)
+        writer.sync()
+
+    assert len(urls(reader, [1.0, 0.0])) == 4